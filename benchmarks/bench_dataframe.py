@@ -0,0 +1,117 @@
+#
+# Lockstep Software Development Kit for Python
+#
+# (c) 2021-2022 Lockstep, Inc.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+#
+# @author     Ted Spence <tspence@lockstep.io>
+# @copyright  2021-2022 Lockstep, Inc.
+# @version    2022.4
+# @link       https://github.com/Lockstep-Network/lockstep-sdk-python
+#
+
+"""
+Compares two ways of building a pandas DataFrame from pages of the
+invoice and customer summary views:
+
+* `records`: collect every record in a list of dictionaries, then call
+  `pandas.DataFrame(records)`
+* `columnar`: decode each page into a `ColumnarBatch`, then call
+  `to_dataframe()`
+
+Peak memory is measured with tracemalloc, which also sees allocations
+made by numpy and pandas. Requires pandas:
+
+    python benchmarks/bench_dataframe.py --scales 100000 1000000
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import pandas
+from lockstep import ColumnarBatch, CustomerSummaryModel, InvoiceSummaryModel
+from lockstep.serialization import DEFAULT_INTERN_FIELDS
+from mock_server import make_view_record
+
+RESULTS_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+PAGE_SIZE = 1000
+VIEWS = {
+    "summary": (InvoiceSummaryModel, DEFAULT_INTERN_FIELDS | {"status", "customerName"}),
+    "customer-summary": (CustomerSummaryModel, DEFAULT_INTERN_FIELDS - {"companyId"}),
+}
+
+
+def pages(view: str, records: int):
+    for start in range(0, records, PAGE_SIZE):
+        yield [make_view_record(view, i) for i in range(start, min(records, start + PAGE_SIZE))]
+
+
+def build_records(view: str, records: int):
+    rows = []
+    for page in pages(view, records):
+        rows.extend(page)
+    return pandas.DataFrame(rows)
+
+
+def build_columnar(view: str, records: int):
+    model, categorical = VIEWS[view]
+    batch = ColumnarBatch(model, categorical=categorical)
+    for page in pages(view, records):
+        batch.extend(page)
+    return batch.to_dataframe()
+
+
+def run(view: str, records: int, method: str) -> dict:
+    build = build_records if method == "records" else build_columnar
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    frame = build(view, records)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        "view": view,
+        "records": records,
+        "method": method,
+        "seconds": seconds,
+        "peak_mb": peak / 1e6,
+        "frame_mb": frame.memory_usage(deep=True).sum() / 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[100000])
+    parser.add_argument("--views", nargs="+", choices=list(VIEWS), default=list(VIEWS))
+    parser.add_argument("--output", help="where to write the report; defaults to benchmarks/results/<timestamp>.json")
+    args = parser.parse_args()
+
+    results = []
+    for view in args.views:
+        for records in args.scales:
+            for method in ("records", "columnar"):
+                result = run(view, records, method)
+                results.append(result)
+                print(f"{view:>16} {records:>8} {method:>8}: {result['seconds']:7.3f}s peak {result['peak_mb']:8.1f} MB "
+                      f"frame {result['frame_mb']:8.1f} MB")
+
+    os.makedirs(RESULTS_DIRECTORY, exist_ok=True)
+    output = args.output or os.path.join(RESULTS_DIRECTORY, time.strftime("dataframe-%Y%m%d-%H%M%S.json"))
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"benchmark": "dataframe", "python": platform.python_version(), "pandas": pandas.__version__, "results": results}, f, indent=2)
+    print(f"\nReport written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#
+# Lockstep Software Development Kit for Python
+#
+# (c) 2021-2022 Lockstep, Inc.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+#
+# @author     Ted Spence <tspence@lockstep.io>
+# @copyright  2021-2022 Lockstep, Inc.
+# @version    2022.4
+# @link       https://github.com/Lockstep-Network/lockstep-sdk-python
+#
+
+"""
+Compares HTTP/1.1 and HTTP/2 transports with many requests in flight
+against the local mock server. Requires `httpx` and `h2`.
+
+For each transport it sends `--requests` small queries with
+`--concurrency` in flight and reports requests per second and the
+number of connections the server accepted:
+
+    python benchmarks/bench_http2.py --requests 2000 --concurrency 200 --latency 0.02
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_server import MockLockstepServer, MockHttp2Server
+from lockstep.async_lockstep_api import AsyncLockstepApi
+from lockstep.lockstep_api import LockstepApi
+
+RESULTS_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+PAGE_SIZE = 20
+
+
+def run_threaded(url: str, http2: bool, requests: int, concurrency: int) -> int:
+    client = LockstepApi(url, "lockstep-benchmarks")
+    client.with_api_key("benchmark")
+    if http2:
+        client.with_http2(maxConnections=4, maxStreamsPerConnection=concurrency, priorKnowledge=True)
+    fetch = lambda n: len(client.invoices.query_invoices(None, None, None, PAGE_SIZE, n % 50)["records"])
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return sum(executor.map(fetch, range(requests)))
+
+
+def run_async(url: str, http2: bool, requests: int, concurrency: int) -> int:
+    async def run():
+        # With HTTP/1.1 every request in flight needs its own connection
+        maxConnections = 4 if http2 else concurrency
+        async with AsyncLockstepApi(url, "lockstep-benchmarks", http2, maxConnections, concurrency, priorKnowledge=http2) as client:
+            client.with_api_key("benchmark")
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def fetch(n):
+                async with semaphore:
+                    return len((await client.invoices.query_invoices(None, None, None, PAGE_SIZE, n % 50))["records"])
+
+            return sum(await asyncio.gather(*(fetch(n) for n in range(requests))))
+
+    return asyncio.run(run())
+
+
+# (mode, transport) -> (runner, http2)
+CASES = {
+    ("threaded", "requests HTTP/1.1"): (run_threaded, False),
+    ("threaded", "httpx HTTP/2"): (run_threaded, True),
+    ("async", "httpx HTTP/1.1"): (run_async, False),
+    ("async", "httpx HTTP/2"): (run_async, True),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds of simulated server latency")
+    parser.add_argument("--output", help="where to write results; defaults to benchmarks/results/<timestamp>.json")
+    args = parser.parse_args()
+
+    results = []
+    for (mode, transport), (runner, http2) in CASES.items():
+        with MockLockstepServer(records=1000, latency=args.latency) as server, MockHttp2Server(server, workers=args.concurrency + 16) as frontend:
+            start = time.perf_counter()
+            records = runner(frontend.url if http2 else server.url, http2, args.requests, args.concurrency)
+            seconds = time.perf_counter() - start
+            connections = frontend.connectionCount if http2 else server.connectionCount
+        result = {"mode": mode, "transport": transport, "requests": args.requests, "records": records, "seconds": round(seconds, 3),
+                  "requestsPerSecond": round(args.requests / seconds, 1), "connections": connections}
+        results.append(result)
+        print(f"{mode:>8} {transport:>18}: {result['requestsPerSecond']:>8} req/s, {connections:>5} connections")
+
+    os.makedirs(RESULTS_DIRECTORY, exist_ok=True)
+    output = args.output or os.path.join(RESULTS_DIRECTORY, time.strftime("http2-%Y%m%d-%H%M%S.json"))
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"benchmark": "http2", "python": platform.python_version(), "settings": vars(args), "results": results}, f, indent=2)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#
+# Lockstep Software Development Kit for Python
+#
+# (c) 2021-2022 Lockstep, Inc.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+#
+# @author     Ted Spence <tspence@lockstep.io>
+# @copyright  2021-2022 Lockstep, Inc.
+# @version    2022.4
+# @link       https://github.com/Lockstep-Network/lockstep-sdk-python
+#
+
+"""
+Measures the resident memory of decoding and retaining a large invoice
+scan with and without string interning.
+
+Each mode runs in a fresh subprocess so that peak resident memory is
+not shared between runs:
+
+    python benchmarks/bench_intern.py --records 1000000
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+PAGE_SIZE = 1000
+
+
+def make_page(pageNumber: int, pageSize: int) -> str:
+    """
+    Builds one page of synthetic invoices as JSON text, so that every
+    string value is a fresh object the way it is after a real API call.
+    """
+    records = []
+    for i in range(pageNumber * pageSize, (pageNumber + 1) * pageSize):
+        records.append({
+            "groupKey": "7d4b2bfb-3b58-4b8a-9a8e-2b8f1a0f2d11",
+            "invoiceId": f"00000000-0000-0000-0000-{i:012d}",
+            "companyId": f"10000000-0000-0000-0000-{i % 20:012d}",
+            "customerId": f"20000000-0000-0000-0000-{i % 5000:012d}",
+            "appEnrollmentId": f"30000000-0000-0000-0000-{i % 3:012d}",
+            "erpKey": f"INV-{i}",
+            "invoiceTypeCode": "Invoice",
+            "invoiceStatusCode": ("Open", "Closed", "Past Due")[i % 3],
+            "termsCode": ("Net 30", "Net 60", "Due on receipt")[i % 3],
+            "currencyCode": ("USD", "EUR", "CAD")[i % 3],
+            "totalAmount": 100.0 + i % 1000,
+            "outstandingBalanceAmount": float(i % 100),
+            "invoiceDate": "2022-01-15",
+            "paymentDueDate": "2022-02-14",
+            "createdUserId": "40000000-0000-0000-0000-000000000001",
+            "modifiedUserId": "40000000-0000-0000-0000-000000000001",
+        })
+    return json.dumps({"records": records, "totalCount": None})
+
+
+def run(records: int, intern: bool) -> dict:
+    from lockstep.models.invoicemodel import InvoiceModel
+    from lockstep.serialization import ModelDecoder
+
+    decoder = ModelDecoder(internStrings=intern)
+    retained = []
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    for pageNumber in range((records + PAGE_SIZE - 1) // PAGE_SIZE):
+        page = json.loads(make_page(pageNumber, PAGE_SIZE))
+        retained.extend(decoder.decode_records(InvoiceModel, page["records"]))
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "intern": intern,
+        "records": len(retained),
+        "seconds": round(elapsed, 3),
+        "peak_rss_mb": round(peak / 1024, 1),
+        "scan_rss_mb": round((peak - baseline) / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=1000000)
+    parser.add_argument("--mode", choices=["plain", "intern"])
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run(args.records, args.mode == "intern")))
+        return
+
+    results = []
+    for mode in ("plain", "intern"):
+        output = subprocess.run([sys.executable, __file__, "--records", str(args.records), "--mode", mode],
+                                check=True, capture_output=True, text=True).stdout
+        results.append(json.loads(output))
+    plain, interned = results
+    for result in results:
+        print(f"{'intern' if result['intern'] else 'plain':>6}: {result['records']} invoices, "
+              f"{result['seconds']}s, scan RSS {result['scan_rss_mb']} MB")
+    if plain["scan_rss_mb"]:
+        saved = 1 - interned["scan_rss_mb"] / plain["scan_rss_mb"]
+        print(f"resident memory reduction: {saved:.1%}")
+
+
+if __name__ == "__main__":
+    main()
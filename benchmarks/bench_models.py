@@ -0,0 +1,380 @@
+#
+# Lockstep Software Development Kit for Python
+#
+# (c) 2021-2022 Lockstep, Inc.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+#
+# @author     Ted Spence <tspence@lockstep.io>
+# @copyright  2021-2022 Lockstep, Inc.
+# @version    2022.4
+# @link       https://github.com/Lockstep-Network/lockstep-sdk-python
+#
+
+"""
+Micro-benchmarks for decoding and encoding `InvoiceModel` (with lines,
+payments and custom field values), `PaymentModel` and
+`InvoiceHistoryModel` in four representations:
+
+* `dataclass`: the `lockstep.models` dataclasses, via `ModelDecoder`
+* `slotted`: equivalent dataclasses declared with `slots=True`
+* `lazy`: a thin wrapper over the JSON dictionary that decodes nested
+  models on first access and re-encodes only those when written back
+* `columnar`: a `ColumnarBatch` per model, with nested lists flattened
+  into child batches
+
+Each (model, scale, representation) runs in a fresh subprocess so that
+peak resident memory is measured independently. The report is written
+as JSON to `benchmarks/results/`:
+
+    python benchmarks/bench_models.py --scales 10000 100000 1000000
+"""
+
+import argparse
+import dataclasses
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import typing
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import lockstep
+from lockstep.columnar import ColumnarBatch
+from lockstep.serialization import ModelDecoder, encode_model, nested_list_fields
+
+RESULTS_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+PAGE_SIZE = 1000
+REPRESENTATIONS = ("dataclass", "slotted", "lazy", "columnar")
+MODELS = ("InvoiceModel", "PaymentModel", "InvoiceHistoryModel")
+GROUP_KEY = "7d4b2bfb-3b58-4b8a-9a8e-2b8f1a0f2d11"
+
+
+def uid(namespace: int, index: int) -> str:
+    return f"{namespace:08d}-0000-0000-0000-{index:012d}"
+
+
+def make_invoice(i: int) -> dict:
+    invoice = {
+        "groupKey": GROUP_KEY,
+        "invoiceId": uid(1, i),
+        "companyId": uid(3, i % 20),
+        "customerId": uid(3, 100 + i % 5000),
+        "erpKey": f"INV-{i}",
+        "salespersonName": f"Rep {i % 12}",
+        "invoiceTypeCode": "Invoice",
+        "invoiceStatusCode": ("Open", "Closed", "Past Due")[i % 3],
+        "termsCode": ("Net 30", "Net 60", "Due on receipt")[i % 3],
+        "currencyCode": ("USD", "EUR", "CAD")[i % 3],
+        "totalAmount": 100.0 + i % 1000,
+        "salesTaxAmount": 5.0,
+        "outstandingBalanceAmount": float(i % 100),
+        "invoiceDate": "2022-01-15",
+        "paymentDueDate": "2022-02-14",
+        "created": "2022-01-15T10:00:00",
+        "modified": "2022-01-16T10:00:00",
+        "appEnrollmentId": uid(4, i % 3),
+        "isVoided": False,
+        "inDispute": i % 50 == 0,
+    }
+    invoice["lines"] = [{
+        "invoiceLineId": uid(5, i * 2 + n),
+        "groupKey": GROUP_KEY,
+        "invoiceId": invoice["invoiceId"],
+        "lineNumber": str(n + 1),
+        "productCode": f"SKU-{(i + n) % 300}",
+        "description": "Consulting services",
+        "unitPrice": 50.0,
+        "quantity": 1.0 + n,
+        "totalAmount": 50.0 * (1 + n),
+    } for n in range(2)]
+    invoice["payments"] = [{
+        "groupKey": GROUP_KEY,
+        "paymentAppliedId": uid(6, i),
+        "invoiceId": invoice["invoiceId"],
+        "paymentId": uid(2, i),
+        "applyToInvoiceDate": "2022-02-01",
+        "paymentAppliedAmount": 25.0,
+        "paymentAmount": 100.0,
+        "unappliedAmount": 0.0,
+    }]
+    invoice["customFieldValues"] = [{
+        "groupKey": GROUP_KEY,
+        "customFieldDefinitionId": uid(7, 1),
+        "recordKey": invoice["invoiceId"],
+        "stringValue": f"Region {i % 8}",
+    }]
+    return invoice
+
+
+def make_payment(i: int) -> dict:
+    return {
+        "groupKey": GROUP_KEY,
+        "paymentId": uid(2, i),
+        "companyId": uid(3, i % 20),
+        "erpKey": f"PAY-{i}",
+        "paymentType": "Check",
+        "tenderType": ("Check", "Wire", "Card")[i % 3],
+        "isOpen": i % 4 == 0,
+        "paymentDate": "2022-02-01",
+        "postDate": "2022-02-02",
+        "paymentAmount": 100.0 + i % 500,
+        "unappliedAmount": float(i % 10),
+        "currencyCode": ("USD", "EUR", "CAD")[i % 3],
+        "created": "2022-02-01T10:00:00",
+        "modified": "2022-02-01T10:00:00",
+        "appEnrollmentId": uid(4, i % 3),
+        "isVoided": False,
+        "inDispute": False,
+    }
+
+
+def make_invoice_history(i: int) -> dict:
+    record = make_invoice(i)
+    for name in ("lines", "payments", "customFieldValues"):
+        del record[name]
+    record["invoiceHistoryId"] = uid(8, i)
+    return record
+
+
+GENERATORS = {"InvoiceModel": make_invoice, "PaymentModel": make_payment, "InvoiceHistoryModel": make_invoice_history}
+# Numeric and string fields read by the access pass
+ACCESS_FIELDS = {
+    "InvoiceModel": ("totalAmount", "invoiceStatusCode"),
+    "PaymentModel": ("paymentAmount", "tenderType"),
+    "InvoiceHistoryModel": ("totalAmount", "invoiceStatusCode"),
+}
+
+
+def load_model(name: str) -> type:
+    return getattr(lockstep, name)
+
+
+_slotted = {}
+
+
+def slotted(model: type) -> type:
+    """Returns a copy of a model dataclass, and of its nested models, declared with `slots=True`"""
+    if model not in _slotted:
+        _slotted[model] = None
+        fields = []
+        for name, hint in typing.get_type_hints(model).items():
+            if dataclasses.is_dataclass(hint):
+                hint = slotted(hint)
+            elif typing.get_origin(hint) is list and dataclasses.is_dataclass(typing.get_args(hint)[0]):
+                hint = list[slotted(typing.get_args(hint)[0])]
+            fields.append((name, hint, dataclasses.field(default=None)))
+        _slotted[model] = dataclasses.make_dataclass("Slotted" + model.__name__, fields, slots=True)
+    return _slotted[model]
+
+
+_nested_models = {}
+
+
+def nested_models(model: type) -> dict:
+    """Returns the fields of a model that hold nested models, as field name to (nested model, whether it is a list)"""
+    if model not in _nested_models:
+        nested = {name: (hint, False) for name, hint in typing.get_type_hints(model).items() if dataclasses.is_dataclass(hint)}
+        nested.update({name: (hint, True) for name, hint in nested_list_fields(model).items()})
+        _nested_models[model] = nested
+    return _nested_models[model]
+
+
+class LazyRecord:
+    """Wraps a JSON dictionary and decodes nested models on first access"""
+
+    __slots__ = ("_model", "_data", "_nested")
+
+    _decoder = ModelDecoder()
+
+    def __init__(self, model: type, data: dict):
+        self._model = model
+        self._data = data
+        self._nested = None
+
+    def __getattr__(self, name: str):
+        value = self._data.get(name)
+        nested = nested_models(self._model).get(name)
+        if value is None or nested is None:
+            return value
+        if self._nested is None:
+            self._nested = {}
+        if name not in self._nested:
+            model, isList = nested
+            self._nested[name] = [self._decoder.decode(model, item) for item in value] if isList else self._decoder.decode(model, value)
+        return self._nested[name]
+
+    def to_json(self) -> dict:
+        """
+        Returns a JSON-ready dictionary like `encode_model`. Fields that
+        were never decoded are copied from the original dictionary; nested
+        models that were decoded may have been changed, so they are
+        encoded again.
+        """
+        result = {name: value for name, value in self._data.items() if value is not None}
+        if self._nested:
+            for name, value in self._nested.items():
+                result[name] = [encode_model(item) for item in value] if isinstance(value, list) else encode_model(value)
+        return result
+
+
+class Representation:
+    """Decodes pages into retained records, encodes them back and reads fields from them"""
+
+    def __init__(self, model: type):
+        self.model = model
+
+    def decode(self, records: list[dict]):
+        raise NotImplementedError
+
+    def encode(self):
+        raise NotImplementedError
+
+    def access(self, number: str, text: str) -> float:
+        raise NotImplementedError
+
+
+class DataclassRepresentation(Representation):
+    def __init__(self, model: type):
+        super().__init__(model)
+        self.decoder = ModelDecoder()
+        self.records = []
+
+    def decode(self, records):
+        self.records.extend(self.decoder.decode_records(self.model, records))
+
+    def encode(self):
+        for record in self.records:
+            encode_model(record)
+
+    def access(self, number, text):
+        total = 0.0
+        for record in self.records:
+            value = getattr(record, number)
+            if value is not None and getattr(record, text) is not None:
+                total += value
+        return total
+
+
+class SlottedRepresentation(DataclassRepresentation):
+    def __init__(self, model: type):
+        super().__init__(slotted(model))
+
+
+class LazyRepresentation(DataclassRepresentation):
+    def decode(self, records):
+        model = self.model
+        self.records.extend([LazyRecord(model, record) for record in records])
+
+    def encode(self):
+        for record in self.records:
+            record.to_json()
+
+
+class ColumnarRepresentation(Representation):
+    def __init__(self, model: type):
+        super().__init__(model)
+        self.batch = ColumnarBatch(model)
+        self.children = {name: ColumnarBatch(nested) for name, nested in nested_list_fields(model).items()}
+
+    def decode(self, records):
+        self.batch.extend(records)
+        for name, child in self.children.items():
+            child.extend([item for record in records for item in record.get(name) or ()])
+
+    def encode(self):
+        self.batch.to_records()
+        for child in self.children.values():
+            child.to_records()
+
+    def access(self, number, text):
+        labels = self.batch.values(text)
+        return sum(value for value, label in zip(self.batch.column(number), labels) if value == value and label is not None)
+
+
+REPRESENTATION_CLASSES = {
+    "dataclass": DataclassRepresentation,
+    "slotted": SlottedRepresentation,
+    "lazy": LazyRepresentation,
+    "columnar": ColumnarRepresentation,
+}
+
+
+def run(model_name: str, records: int, representation: str) -> dict:
+    model = load_model(model_name)
+    generate = GENERATORS[model_name]
+    target = REPRESENTATION_CLASSES[representation](model)
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    decode_seconds = 0.0
+    for start in range(0, records, PAGE_SIZE):
+        # Round-trip through JSON text so strings are fresh objects, as after a real API call
+        page = json.loads(json.dumps([generate(i) for i in range(start, min(start + PAGE_SIZE, records))]))
+        started = time.perf_counter()
+        target.decode(page)
+        decode_seconds += time.perf_counter() - started
+    del page
+
+    started = time.perf_counter()
+    target.access(*ACCESS_FIELDS[model_name])
+    access_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    target.encode()
+    encode_seconds = time.perf_counter() - started
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "model": model_name,
+        "representation": representation,
+        "records": records,
+        "decode_seconds": round(decode_seconds, 4),
+        "decode_records_per_second": round(records / decode_seconds) if decode_seconds else None,
+        "access_seconds": round(access_seconds, 4),
+        "encode_seconds": round(encode_seconds, 4),
+        "encode_records_per_second": round(records / encode_seconds) if encode_seconds else None,
+        "peak_rss_mb": round(peak / 1024, 1),
+        "retained_rss_mb": round((peak - baseline) / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--models", nargs="+", choices=MODELS, default=list(MODELS))
+    parser.add_argument("--representations", nargs="+", choices=REPRESENTATIONS, default=list(REPRESENTATIONS))
+    parser.add_argument("--output", help="where to write the report; defaults to benchmarks/results/<timestamp>.json")
+    parser.add_argument("--worker", nargs=3, metavar=("MODEL", "RECORDS", "REPRESENTATION"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        model, records, representation = args.worker
+        print(json.dumps(run(model, int(records), representation)))
+        return
+
+    results = []
+    for model in args.models:
+        for records in args.scales:
+            for representation in args.representations:
+                output = subprocess.run([sys.executable, __file__, "--worker", model, str(records), representation],
+                                        check=True, capture_output=True, text=True).stdout
+                result = json.loads(output)
+                results.append(result)
+                print(f"{model:>20} {records:>8} {representation:>10}: decode {result['decode_seconds']:8.3f}s "
+                      f"access {result['access_seconds']:7.3f}s encode {result['encode_seconds']:8.3f}s "
+                      f"retained {result['retained_rss_mb']:8.1f} MB")
+
+    os.makedirs(RESULTS_DIRECTORY, exist_ok=True)
+    output = args.output or os.path.join(RESULTS_DIRECTORY, time.strftime("models-%Y%m%d-%H%M%S.json"))
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"benchmark": "models", "python": platform.python_version(), "page_size": PAGE_SIZE, "results": results}, f, indent=2)
+    print(f"\nReport written to {output}")
+
+
+if __name__ == "__main__":
+    main()
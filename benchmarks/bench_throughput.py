@@ -0,0 +1,240 @@
+#
+# Lockstep Software Development Kit for Python
+#
+# (c) 2021-2022 Lockstep, Inc.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+#
+# @author     Ted Spence <tspence@lockstep.io>
+# @copyright  2021-2022 Lockstep, Inc.
+# @version    2022.4
+# @link       https://github.com/Lockstep-Network/lockstep-sdk-python
+#
+
+"""
+End-to-end throughput benchmarks against the local mock server.
+
+Measures records per second for paging, bulk create, retrieve fan-out
+and sync upload in sequential ("sync") and thread pool ("threaded")
+modes with `LockstepApi`, and in "async" mode with `AsyncLockstepApi`
+awaiting every request on one event loop. Results are written to
+`benchmarks/results/` and can be compared with an earlier run:
+
+    python benchmarks/bench_throughput.py --records 20000 --latency 0.01
+    python benchmarks/bench_throughput.py --baseline benchmarks/results/<earlier>.json
+
+A run can be recorded to a cassette and replayed later without the mock
+server, either at full speed or with the recorded timings:
+
+    python benchmarks/bench_throughput.py --record benchmarks/results/run.jsonl.gz
+    python benchmarks/bench_throughput.py --replay benchmarks/results/run.jsonl.gz --timing recorded
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_server import MockLockstepServer, entity_id
+from lockstep.async_lockstep_api import AsyncLockstepApi
+from lockstep.lockstep_api import LockstepApi
+from lockstep.models.invoicemodel import InvoiceModel
+from lockstep.pagination import scan
+from lockstep.sync_zip import SyncZipBuilder
+from lockstep.transports import CassetteTransport
+
+RESULTS_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+PAGE_SIZE = 500
+CREATE_BATCH = 100
+
+
+def make_client(url: str, transport=None) -> LockstepApi:
+    client = LockstepApi(url, "lockstep-benchmarks")
+    client.with_api_key("benchmark")
+    client.with_transport(transport)
+    return client
+
+
+def make_async_client(url: str, workers: int, transport=None) -> AsyncLockstepApi:
+    # One HTTP/1.1 connection per worker, like the thread pool; cassettes run through an AsyncTransportAdapter
+    client = AsyncLockstepApi(url, "lockstep-benchmarks", http2=False, maxConnections=workers, maxStreamsPerConnection=1)
+    client.with_api_key("benchmark")
+    if transport is not None:
+        client.with_transport(transport)
+    return client
+
+
+def page_numbers(records: int) -> list[int]:
+    return list(range((records + PAGE_SIZE - 1) // PAGE_SIZE))
+
+
+# Each scenario takes (client, records, mode, workers) and returns the number of records processed.
+# In "async" mode the client is an AsyncLockstepApi, so every call returns an awaitable.
+
+def bench_paging(client, records, mode, workers):
+    query = client.invoices.query_invoices
+    if mode == "sync":
+        return sum(1 for _ in scan(query, None, None, None, PAGE_SIZE))
+    fetch = lambda n: query(None, None, None, PAGE_SIZE, n)
+    return run_parallel(fetch, page_numbers(records), mode, workers, lambda n, page: len(page["records"]))
+
+
+def bench_bulk_create(client, records, mode, workers):
+    batches = [[InvoiceModel(invoiceId=entity_id(1, i), erpKey=f"NEW-{i}", totalAmount=1.0) for i in range(start, min(start + CREATE_BATCH, records))]
+               for start in range(0, records, CREATE_BATCH)]
+    create = lambda batch: client.invoices.create_invoices(batch)
+    created = lambda batch, result: len(batch) if result is not None else 0
+    if mode == "sync":
+        return sum(created(batch, create(batch)) for batch in batches)
+    return run_parallel(create, batches, mode, workers, created)
+
+
+def bench_retrieve(client, records, mode, workers):
+    # Fan-out of single-record GETs; retrieve_many is reported separately as its own mode
+    ids = [entity_id(1, i) for i in range(records)]
+    if mode == "retrieve_many":
+        return len(client.invoices.retrieve_many(ids, None, workers).records)
+    fetch = lambda id: client.invoices.retrieve_invoice(id, None)
+    found = lambda id, result: 1 if "invoiceId" in result else 0
+    if mode == "sync":
+        return sum(found(id, fetch(id)) for id in ids)
+    return run_parallel(fetch, ids, mode, workers, found)
+
+
+def bench_sync_upload(client, records, mode, workers):
+    shards = 1 if mode == "sync" else workers
+    per_shard = (records + shards - 1) // shards
+
+    def upload(shard):
+        start = shard * per_shard
+        invoices = (InvoiceModel(invoiceId=entity_id(1, i), erpKey=f"INV-{i}", totalAmount=float(i)) for i in range(start, min(start + per_shard, records)))
+        return client.sync.upload_sync_file(SyncZipBuilder().add("Invoices", invoices), f"shard-{shard}.zip")
+
+    uploaded = lambda shard, result: min(per_shard, records - shard * per_shard) if "syncRequestId" in result else 0
+    if mode == "sync":
+        return uploaded(0, upload(0))
+    return run_parallel(upload, list(range(shards)), mode, workers, uploaded)
+
+
+def run_parallel(function, items: list, mode: str, workers: int, count):
+    """
+    Calls `function` for every item, at most `workers` at a time, and
+    sums `count(item, result)`. In "async" mode `function` returns an
+    awaitable and the sum is returned as a coroutine.
+    """
+    if mode == "threaded":
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return sum(executor.map(lambda item: count(item, function(item)), items))
+
+    async def run_async():
+        semaphore = asyncio.Semaphore(workers)
+
+        async def one(item):
+            async with semaphore:
+                return count(item, await function(item))
+
+        return sum(await asyncio.gather(*(one(item) for item in items)))
+
+    return run_async()
+
+
+SCENARIOS = {
+    "paging": (bench_paging, ("sync", "threaded", "async")),
+    "bulk_create": (bench_bulk_create, ("sync", "threaded", "async")),
+    "retrieve": (bench_retrieve, ("sync", "threaded", "async", "retrieve_many")),
+    "sync_upload": (bench_sync_upload, ("sync", "threaded", "async")),
+}
+
+
+def run_benchmarks(args) -> list[dict]:
+    # Sync uploads contain timestamps, so cassettes match requests without their bodies
+    if args.replay:
+        with CassetteTransport(args.replay, "replay", timing=args.timing, matchBody=False) as transport:
+            return run_scenarios(args, "http://replay.invalid/", transport)
+    with MockLockstepServer(records=args.records, latency=args.latency) as server:
+        transport = CassetteTransport(args.record, "record", matchBody=False) if args.record else None
+        try:
+            return run_scenarios(args, server.url, transport)
+        finally:
+            if transport is not None:
+                transport.close()
+
+
+def run_scenarios(args, url: str, transport) -> list[dict]:
+    client = make_client(url, transport)
+    results = []
+    for name in args.scenarios:
+        function, modes = SCENARIOS[name]
+        for mode in modes:
+            count = args.retrieve_records if name == "retrieve" else args.records
+            start = time.perf_counter()
+            if mode == "async":
+                processed = run_async_scenario(function, url, transport, count, args.workers)
+            else:
+                processed = function(client, count, mode, args.workers)
+            seconds = time.perf_counter() - start
+            result = {"scenario": name, "mode": mode, "records": processed, "seconds": round(seconds, 4),
+                      "recordsPerSecond": round(processed / seconds, 1) if seconds else None}
+            results.append(result)
+            print(f"{name:>12} {mode:>14}: {processed:>8} records in {seconds:7.3f}s = {result['recordsPerSecond']:>10} rec/s")
+    return results
+
+
+def run_async_scenario(function, url: str, transport, records: int, workers: int) -> int:
+    async def run():
+        client = make_async_client(url, workers, transport)
+        try:
+            return await function(client, records, "async", workers)
+        finally:
+            # A cassette is shared with the other scenarios and closed by run_benchmarks
+            if transport is None:
+                await client.aclose()
+
+    return asyncio.run(run())
+
+
+def compare(results: list[dict], baseline_path: str):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {(r["scenario"], r["mode"]): r for r in json.load(f)["results"]}
+    print(f"\nChange against {baseline_path}:")
+    for result in results:
+        before = baseline.get((result["scenario"], result["mode"]))
+        if before and before["recordsPerSecond"] and result["recordsPerSecond"]:
+            change = result["recordsPerSecond"] / before["recordsPerSecond"] - 1
+            print(f"{result['scenario']:>12} {result['mode']:>14}: {change:+.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=20000, help="records per paging, create and upload scenario")
+    parser.add_argument("--retrieve-records", type=int, default=1000, help="records fetched by id in the retrieve scenario")
+    parser.add_argument("--latency", type=float, default=0.005, help="seconds of simulated server latency")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--baseline", help="an earlier results file to compare against")
+    parser.add_argument("--record", metavar="CASSETTE", help="record the responses of this run to a cassette")
+    parser.add_argument("--replay", metavar="CASSETTE", help="replay a recorded cassette instead of starting the mock server")
+    parser.add_argument("--timing", choices=["fast", "recorded"], default="fast", help="replay at full speed or with the recorded timings")
+    parser.add_argument("--output", help="where to write results; defaults to benchmarks/results/<timestamp>.json")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args)
+    os.makedirs(RESULTS_DIRECTORY, exist_ok=True)
+    output = args.output or os.path.join(RESULTS_DIRECTORY, time.strftime("throughput-%Y%m%d-%H%M%S.json"))
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"benchmark": "throughput", "python": platform.python_version(), "settings": vars(args), "results": results}, f, indent=2)
+    print(f"\nResults written to {output}")
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
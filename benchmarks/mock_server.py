@@ -0,0 +1,627 @@
+#
+# Lockstep Software Development Kit for Python
+#
+# (c) 2021-2022 Lockstep, Inc.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+#
+# @author     Ted Spence <tspence@lockstep.io>
+# @copyright  2021-2022 Lockstep, Inc.
+# @version    2022.4
+# @link       https://github.com/Lockstep-Network/lockstep-sdk-python
+#
+
+"""
+A local mock of the Lockstep Platform API for benchmarks and offline
+experiments. It serves deterministic synthetic data for the
+`/api/v1/...` routes used by the clients and can inject latency, 429
+and 5xx responses.
+
+Only the standard library is required, except for the HTTP/2 front end
+`MockHttp2Server`, which needs the `h2` package. Run it standalone with:
+
+    python benchmarks/mock_server.py --port 8080 --records 100000 [--http2-port 8081]
+
+or start it in-process with `MockLockstepServer(...).start()`.
+"""
+
+import argparse
+import asyncio
+import http.client
+import io
+import json
+import random
+import re
+import threading
+import time
+import urllib.parse
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Entity route name -> (primary key field, id namespace)
+ENTITIES = {
+    "Invoices": ("invoiceId", 1),
+    "Payments": ("paymentId", 2),
+    "Companies": ("companyId", 3),
+    "Contacts": ("contactId", 4),
+    "Activities": ("activityId", 5),
+    "Attachments": ("attachmentId", 6),
+    "InvoiceHistory": ("invoiceHistoryId", 7),
+    "Sync": ("syncRequestId", 8),
+}
+
+GROUP_KEY = "7d4b2bfb-3b58-4b8a-9a8e-2b8f1a0f2d11"
+CURRENCIES = ("USD", "EUR", "CAD")
+_QUOTED = re.compile(r"'((?:[^']|'')*)'")
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Benchmarks open many connections at once; the default backlog of 5 resets them
+    request_queue_size = 1024
+    connectionCount = 0
+
+    def process_request(self, request, client_address):
+        self.connectionCount += 1
+        super().process_request(request, client_address)
+
+
+def entity_id(namespace: int, index: int) -> str:
+    """Returns the deterministic id of the record at `index`"""
+    return str(uuid.UUID(int=(namespace << 96) | index))
+
+
+def entity_index(value: str) -> tuple[int, int]:
+    """Returns the `(namespace, index)` encoded in an id, or None"""
+    try:
+        number = uuid.UUID(value).int
+    except ValueError:
+        return None
+    return number >> 96, number & ((1 << 96) - 1)
+
+
+def make_record(entity: str, index: int) -> dict:
+    """Builds the synthetic record at `index` of an entity"""
+    key, namespace = ENTITIES[entity]
+    record = {
+        key: entity_id(namespace, index),
+        "groupKey": GROUP_KEY,
+        "companyId": entity_id(3, index % 50),
+        "appEnrollmentId": entity_id(9, index % 3),
+        "created": "2022-01-01T00:00:00",
+        "modified": "2022-01-02T00:00:00",
+    }
+    day = 1 + index % 28
+    month = 1 + (index // 28) % 12
+    if entity in ("Invoices", "InvoiceHistory"):
+        record.update({
+            "invoiceId": entity_id(1, index),
+            "customerId": entity_id(3, 50 + index % 5000),
+            "erpKey": f"INV-{index}",
+            "invoiceTypeCode": "Invoice",
+            "invoiceStatusCode": "Closed" if index % 3 == 0 else "Open",
+            "termsCode": "Net 30",
+            "currencyCode": CURRENCIES[index % 3],
+            "salespersonName": f"Rep {index % 12}",
+            "totalAmount": float(100 + index % 900),
+            "outstandingBalanceAmount": 0.0 if index % 3 == 0 else float(index % 100),
+            "invoiceDate": f"2022-{month:02d}-{day:02d}",
+            "paymentDueDate": f"2022-{month:02d}-{day:02d}",
+            "invoiceClosedDate": f"2022-{month:02d}-{min(28, day + 10):02d}" if index % 3 == 0 else None,
+        })
+    elif entity == "Payments":
+        record.update({
+            "erpKey": f"PAY-{index}",
+            "paymentType": "Check",
+            "currencyCode": CURRENCIES[index % 3],
+            "paymentDate": f"2022-{month:02d}-{day:02d}",
+            "paymentAmount": float(50 + index % 500),
+            "unappliedAmount": 0.0,
+        })
+    elif entity == "Companies":
+        record.update({"companyName": f"Company {index}", "companyType": "Customer", "erpKey": f"CUST-{index}"})
+    elif entity == "Contacts":
+        record.update({"contactName": f"Contact {index}", "emailAddress": f"contact{index}@example.com"})
+    elif entity == "Activities":
+        record.update({"activityName": f"Activity {index}", "activityTypeCode": "Note", "isOpen": index % 2 == 0})
+    elif entity == "Attachments":
+        record.update({"fileName": f"document-{index}.pdf", "tableKey": "Invoice", "objectKey": entity_id(1, index), "isArchived": False})
+    elif entity == "Sync":
+        record.update({"statusCode": "Success"})
+    return record
+
+
+def make_view_record(view: str, index: int) -> dict:
+    """Builds the synthetic summary view record at `index`"""
+    day = 1 + index % 28
+    month = 1 + (index // 28) % 12
+    if view == "summary":
+        closed = index % 3 == 0
+        return {
+            "groupKey": GROUP_KEY,
+            "customerId": entity_id(3, 50 + index % 5000),
+            "invoiceId": entity_id(1, index),
+            "invoiceNumber": f"INV-{index}",
+            "invoiceDate": f"2022-{month:02d}-{day:02d}",
+            "customerName": f"Company {50 + index % 5000}",
+            "status": "Closed" if closed else "Open",
+            "paymentDueDate": f"2022-{month:02d}-{day:02d}",
+            "invoiceAmount": float(100 + index % 900),
+            "outstandingBalance": 0.0 if closed else float(index % 100),
+            "invoiceTypeCode": "Invoice",
+            "newestActivity": f"2022-{month:02d}-{day:02d}T12:00:00" if index % 4 else None,
+            "daysPastDue": 0 if closed else index % 90,
+            "paymentNumbers": [f"PAY-{index}"] if closed else [],
+            "paymentIds": [entity_id(2, index)] if closed else [],
+        }
+    return {
+        "groupKey": GROUP_KEY,
+        "companyId": entity_id(3, index),
+        "companyName": f"Company {index}",
+        "primaryContact": f"Contact {index}",
+        "outstandingInvoices": index % 20,
+        "totalInvoicesOpen": index % 20,
+        "totalInvoicesPastDue": index % 7,
+        "closedInvoices": index % 50,
+        "amountCollected": float(1000 + index % 9000),
+        "outstandingAmount": float(index % 5000),
+        "amountPastDue": float(index % 700),
+        "unappliedPayments": 0.0,
+        "percentOfTotalAr": (index % 100) / 1000.0,
+        "dso": float(index % 60),
+        "newestActivity": f"2022-{month:02d}-{day:02d}T12:00:00",
+    }
+
+
+# Summary views served by the mock, keyed by entity and view name
+VIEWS = {("Invoices", "summary"), ("Companies", "customer-summary")}
+
+
+class MockLockstepServer:
+    """
+    A threaded HTTP server that imitates the Lockstep Platform API.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, records: int = 10000, latency: float = 0.0, jitter: float = 0.0,
+                 rate429: float = 0.0, rate5xx: float = 0.0, attachmentSize: int = 64 * 1024, syncPolls: int = 2, seed: int = 0):
+        """
+        Construct a new mock server
+
+        Parameters
+        ----------
+        host : str
+            The interface to listen on
+        port : int
+            The port to listen on, or 0 to pick a free port
+        records : int
+            The number of records each entity has
+        latency : float
+            Seconds of delay added to every response
+        jitter : float
+            Up to this many extra seconds of random delay per response
+        rate429 : float
+            The fraction of requests answered with 429 Too Many Requests
+        rate5xx : float
+            The fraction of requests answered with 503 Service Unavailable
+        attachmentSize : int
+            The size in bytes of each attachment download
+        syncPolls : int
+            The number of status checks before an uploaded Sync task
+            reports success
+        seed : int
+            The seed for injected latency and errors
+        """
+        self.records = records
+        self.latency = latency
+        self.jitter = jitter
+        self.rate429 = rate429
+        self.rate5xx = rate5xx
+        self.attachmentSize = attachmentSize
+        self.syncPolls = syncPolls
+        self.random = random.Random(seed)
+        self.syncs = {}
+        self.requestCount = 0
+        self._lock = threading.Lock()
+        self._httpd = _Server((host, port), self._handler_class())
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    @property
+    def connectionCount(self) -> int:
+        """The number of connections accepted so far"""
+        return self._httpd.connectionCount
+
+    def start(self):
+        """Starts serving on a background thread and returns self"""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="lockstep-mock-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                server._dispatch(self, "GET")
+
+            def do_POST(self):
+                server._dispatch(self, "POST")
+
+            def do_PATCH(self):
+                server._dispatch(self, "PATCH")
+
+            def do_DELETE(self):
+                server._dispatch(self, "DELETE")
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def _dispatch(self, request, method: str):
+        url = urllib.parse.urlparse(request.path)
+        params = {k: v[-1] for k, v in urllib.parse.parse_qs(url.query).items()}
+        body = self._read_body(request)
+        with self._lock:
+            self.requestCount += 1
+            roll = self.random.random()
+            delay = self.latency + (self.random.random() * self.jitter if self.jitter else 0.0)
+        if delay:
+            time.sleep(delay)
+        if roll < self.rate429:
+            return self._send_json(request, 429, {"type": "about:blank", "title": "Too Many Requests", "status": 429}, {"Retry-After": "1"})
+        if roll < self.rate429 + self.rate5xx:
+            return self._send_json(request, 503, {"type": "about:blank", "title": "Service Unavailable", "status": 503})
+
+        parts = [p for p in url.path.split("/") if p][2:]
+        if not parts:
+            return self._not_found(request)
+        entity = parts[0]
+        if entity == "Status":
+            return self._send_json(request, 200, {"loggedIn": True, "environment": "mock", "version": "mock"})
+        if entity == "Reports":
+            return self._send_json(request, 200, self._report(parts[1] if len(parts) > 1 else ""))
+        if entity == "Sync" and method == "POST":
+            return self._create_sync(request, body)
+        if entity not in ENTITIES:
+            return self._not_found(request)
+
+        if len(parts) == 2 and parts[1] == "query" and method == "GET":
+            return self._query(request, entity, params)
+        if len(parts) == 3 and parts[1] == "views" and (entity, parts[2]) in VIEWS and method == "GET":
+            return self._query(request, entity, params, parts[2])
+        if len(parts) == 1 and method == "POST":
+            created = json.loads(body) if body else []
+            return self._send_json(request, 200, {"records": created if isinstance(created, list) else [created]})
+        if len(parts) == 3 and parts[2] == "download" and entity == "Attachments":
+            return self._download(request)
+        if len(parts) == 2:
+            record = self._lookup(entity, parts[1])
+            if record is None:
+                return self._not_found(request)
+            if method == "PATCH":
+                record.update(json.loads(body) if body else {})
+            return self._send_json(request, 200, record)
+        return self._not_found(request)
+
+    def _read_body(self, request) -> bytes:
+        if request.headers.get("Transfer-Encoding") == "chunked":
+            chunks = []
+            while True:
+                size = int(request.rfile.readline().strip() or b"0", 16)
+                if size == 0:
+                    request.rfile.readline()
+                    return b"".join(chunks)
+                chunks.append(request.rfile.read(size))
+                request.rfile.readline()
+        length = int(request.headers.get("Content-Length") or 0)
+        return request.rfile.read(length) if length else b""
+
+    def _lookup(self, entity: str, id: str) -> dict:
+        if entity == "Sync":
+            return self._sync_status(id)
+        decoded = entity_index(id)
+        if decoded is None or decoded[0] != ENTITIES[entity][1] or decoded[1] >= self.records:
+            return None
+        return make_record(entity, decoded[1])
+
+    def _query(self, request, entity: str, params: dict, view: str = None):
+        pageSize = int(params.get("pageSize") or 200)
+        pageNumber = int(params.get("pageNumber") or 0)
+        filter = params.get("filter") or ""
+        if " IN (" in filter.upper():
+            ids = [value.replace("''", "'") for value in _QUOTED.findall(filter[filter.upper().index(" IN ("):])]
+            matches = [r for r in (self._lookup(entity, id) for id in ids) if r is not None]
+            records = matches[pageNumber * pageSize:(pageNumber + 1) * pageSize]
+            total = len(matches)
+        else:
+            total = self.records
+            start = pageNumber * pageSize
+            build = make_record if view is None else (lambda entity, i: make_view_record(view, i))
+            records = [build(entity, i) for i in range(start, min(start + pageSize, total))]
+        return self._send_json(request, 200, {"records": records, "totalCount": total, "pageSize": pageSize, "pageNumber": pageNumber})
+
+    def _create_sync(self, request, body: bytes):
+        id = str(uuid.uuid4())
+        with self._lock:
+            self.syncs[id] = {"polls": 0, "bytes": len(body)}
+        return self._send_json(request, 200, {"syncRequestId": id, "groupKey": GROUP_KEY, "statusCode": "Ready"})
+
+    def _sync_status(self, id: str) -> dict:
+        with self._lock:
+            sync = self.syncs.get(id)
+            if sync is None:
+                return None
+            sync["polls"] += 1
+            done = sync["polls"] > self.syncPolls
+        return {
+            "syncRequestId": id,
+            "groupKey": GROUP_KEY,
+            "statusCode": "Success" if done else "In Progress",
+            "details": {"Invoices": {"insertCount": sync["bytes"] // 100, "updateCount": 0, "skipCount": 0, "errorCount": 0}} if done else None,
+        }
+
+    def _download(self, request):
+        size = self.attachmentSize
+        start = 0
+        rangeHeader = request.headers.get("Range")
+        if rangeHeader and rangeHeader.startswith("bytes="):
+            start = int(rangeHeader[len("bytes="):].split("-")[0] or 0)
+        request.send_response(206 if start else 200)
+        request.send_header("Content-Type", "application/pdf")
+        request.send_header("Content-Length", str(size - start))
+        if start:
+            request.send_header("Content-Range", f"bytes {start}-{size - 1}/{size}")
+        request.end_headers()
+        block = bytes(range(256)) * 256
+        remaining = size - start
+        while remaining > 0:
+            chunk = block[:min(len(block), remaining)]
+            request.wfile.write(chunk)
+            remaining -= len(chunk)
+
+    def _report(self, name: str) -> object:
+        if name == "cashflow":
+            return {"timeframe": 30, "paymentsCollected": 125000.0, "paymentsCollectedCount": 140, "invoicesBilled": 160000.0, "invoicesBilledCount": 210}
+        if name == "dailysalesoutstanding":
+            return [{"timeframe": "2022-01-01T00:00:00", "invoicesCount": 120, "dailySalesOutstanding": 42.5}]
+        if name == "riskrates":
+            return [{"groupKey": GROUP_KEY, "reportPeriod": "2022-01-01T00:00:00", "invoiceCount": 100, "totalInvoiceAmount": 50000.0, "atRiskCount": 12, "atRiskAmount": 6000.0, "atRiskCountPercentage": 12.0, "atRiskPercentage": 12.0}]
+        if name == "ar-header":
+            return {"groupKey": GROUP_KEY, "reportPeriod": "2022-01-01T00:00:00", "totalCustomers": 5000, "totalInvoices": self.records, "totalInvoicedAmount": 1000000.0}
+        if name == "aging":
+            return [{"bucket": b, "currencyCode": "USD", "outstandingBalance": 10000.0 / (i + 1)} for i, b in enumerate([0, 30, 60, 90, 120, 180])]
+        if name == "ar-aging-header":
+            return [{"groupKey": GROUP_KEY, "reportBucket": b, "totalCustomers": 10, "totalInvoicesOutstanding": 20, "totalOutstandingAmount": 5000.0, "totalArAmount": 50000.0, "percentageOfTotalAr": 10.0} for b in ("0", "30", "60", "90+")]
+        if name == "attachments-header":
+            return {"groupKey": GROUP_KEY, "companyId": None, "totalAttachments": self.records, "totalArchived": 0, "totalActive": self.records}
+        return {}
+
+    def _send_json(self, request, status: int, payload: object, headers: dict = None):
+        data = json.dumps(payload).encode("utf-8")
+        request.send_response(status)
+        request.send_header("Content-Type", "application/json")
+        request.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            request.send_header(name, value)
+        request.end_headers()
+        request.wfile.write(data)
+
+    def _not_found(self, request):
+        return self._send_json(request, 404, {"type": "about:blank", "title": "Not Found", "status": 404})
+
+
+class _BufferedRequest:
+    """
+    Presents one HTTP/2 stream through the parts of the
+    `BaseHTTPRequestHandler` interface used by `MockLockstepServer`.
+    """
+
+    def __init__(self, path: str, headers: list[tuple[str, str]], body: bytes):
+        self.path = path
+        self.headers = http.client.HTTPMessage()
+        for name, value in headers:
+            if not name.startswith(":") and name != "content-length":
+                self.headers[name] = value
+        self.headers["Content-Length"] = str(len(body))
+        self.rfile = io.BytesIO(body)
+        self.wfile = io.BytesIO()
+        self.status = 500
+        self.responseHeaders = []
+
+    def send_response(self, status: int):
+        self.status = status
+
+    def send_header(self, name: str, value: str):
+        self.responseHeaders.append((name.lower(), value))
+
+    def end_headers(self):
+        pass
+
+
+class MockHttp2Server:
+    """
+    A cleartext HTTP/2 (h2c, prior knowledge) front end for a
+    `MockLockstepServer`, serving the same routes and data. Requires the
+    `h2` package.
+    """
+
+    def __init__(self, mock: MockLockstepServer, host: str = "127.0.0.1", port: int = 0, workers: int = 256):
+        """
+        Construct a new HTTP/2 front end
+
+        Parameters
+        ----------
+        mock : MockLockstepServer
+            The server whose routes to serve
+        host : str
+            The interface to listen on
+        port : int
+            The port to listen on, or 0 to pick a free port
+        workers : int
+            The number of threads handling requests, which sleep for the
+            simulated latency
+        """
+        import h2.config  # noqa: F401
+        self.mock = mock
+        self.host = host
+        self.port = port
+        self.connectionCount = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._server = None
+        self._thread = None
+        self._writers = set()
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}/"
+
+    def start(self):
+        """Starts serving on a background thread and returns self"""
+        self._thread = threading.Thread(target=self._run, name="lockstep-mock-h2-server", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._executor.shutdown(wait=False)
+
+    async def _shutdown(self):
+        self._server.close()
+        for writer in list(self._writers):
+            writer.close()
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        self._server = self._loop.run_until_complete(asyncio.start_server(self._connection, self.host, self.port))
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+
+    async def _connection(self, reader, writer):
+        import h2.config
+        import h2.connection
+        import h2.events
+        import h2.exceptions
+        import h2.settings
+
+        self.connectionCount += 1
+        self._writers.add(writer)
+        connection = h2.connection.H2Connection(config=h2.config.H2Configuration(client_side=False, header_encoding="utf-8"))
+        connection.initiate_connection()
+        connection.update_settings({h2.settings.SettingCodes.MAX_CONCURRENT_STREAMS: 1000, h2.settings.SettingCodes.INITIAL_WINDOW_SIZE: 1 << 24})
+        connection.increment_flow_control_window(1 << 24)
+        writer.write(connection.data_to_send())
+        state = {"window": asyncio.Event()}
+        streams = {}
+        tasks = set()
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                for event in connection.receive_data(data):
+                    if isinstance(event, h2.events.RequestReceived):
+                        streams[event.stream_id] = (event.headers, [])
+                    elif isinstance(event, h2.events.DataReceived):
+                        streams[event.stream_id][1].append(event.data)
+                        connection.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+                    elif isinstance(event, h2.events.StreamEnded):
+                        headers, chunks = streams.pop(event.stream_id)
+                        task = asyncio.ensure_future(self._respond(connection, writer, state, event.stream_id, headers, b"".join(chunks)))
+                        tasks.add(task)
+                        task.add_done_callback(tasks.discard)
+                    elif isinstance(event, h2.events.WindowUpdated):
+                        state["window"].set()
+                        state["window"] = asyncio.Event()
+                    elif isinstance(event, h2.events.ConnectionTerminated):
+                        return
+                writer.write(connection.data_to_send())
+        except (ConnectionError, h2.exceptions.ProtocolError):
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            self._writers.discard(writer)
+            writer.close()
+
+    async def _respond(self, connection, writer, state: dict, streamId: int, headers: list, body: bytes):
+        import h2.exceptions
+
+        values = dict(headers)
+        request = _BufferedRequest(values[":path"], headers, body)
+        await asyncio.get_running_loop().run_in_executor(self._executor, self.mock._dispatch, request, values[":method"])
+        payload = request.wfile.getvalue()
+        try:
+            connection.send_headers(streamId, [(":status", str(request.status))] + request.responseHeaders, end_stream=not payload)
+            writer.write(connection.data_to_send())
+            offset = 0
+            while offset < len(payload):
+                window = min(connection.local_flow_control_window(streamId), connection.max_outbound_frame_size)
+                if window <= 0:
+                    await state["window"].wait()
+                    continue
+                connection.send_data(streamId, payload[offset:offset + window], end_stream=offset + window >= len(payload))
+                offset += window
+                writer.write(connection.data_to_send())
+        except h2.exceptions.StreamClosedError:
+            pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--records", type=int, default=10000)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--rate429", type=float, default=0.0)
+    parser.add_argument("--rate5xx", type=float, default=0.0)
+    parser.add_argument("--http2-port", type=int, help="also serve cleartext HTTP/2 on this port")
+    args = parser.parse_args()
+    server = MockLockstepServer(args.host, args.port, args.records, args.latency, args.jitter, args.rate429, args.rate5xx)
+    print(f"Mock Lockstep API listening on {server.url}")
+    if args.http2_port is not None:
+        frontend = MockHttp2Server(server, args.host, args.http2_port).start()
+        print(f"HTTP/2 (h2c) listening on {frontend.url}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
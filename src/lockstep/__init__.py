@@ -1,6 +1,27 @@
 from lockstep.lockstep_api import LockstepApi
+from lockstep.async_lockstep_api import AsyncLockstepApi
 from lockstep.error_result import ErrorResult
+from lockstep.error_result import LockstepError
 from lockstep.lockstep_response import LockstepResponse
+from lockstep.batch_retrieve import RetrieveManyResult
+from lockstep.bulk_update import BulkUpdateReport, BulkUpdateOutcome
+from lockstep.rate_limiter import RateLimiter
+from lockstep.tenant_pool import TenantPool, TenantClient, FairGate
+from lockstep.result_cache import ResultCache
+from lockstep.report_dashboard import ReportDashboard
+from lockstep.local_reports import DsoEngine, CashflowEngine
+from lockstep.serialization import ModelDecoder, IdentityMap, InternTable
+from lockstep.columnar import ColumnarBatch, to_dataframe
+from lockstep.parquet_export import ParquetExporter, ParquetExportReport, export_parquet, arrow_batches
+from lockstep.record_export import RecordExporter, RecordExportReport, export_records
+from lockstep.attachment_exporter import AttachmentExporter, AttachmentExportReport
+from lockstep.sync_zip import SyncZipBuilder
+from lockstep.sync_tracker import SyncTracker
+from lockstep.sharded_sync import ShardedSyncUploader, ShardedSyncReport
+from lockstep.metrics import MetricsRecorder
+from lockstep.tracing import Tracer, NoopTracer, OpenTelemetryTracer
+from lockstep.transports import Transport, RequestsTransport, FakeTransport, CassetteTransport, CassetteMissError
+from lockstep.transports import HttpxTransport, AsyncHttpxTransport, AsyncTransportAdapter
 from lockstep.clients.activities_client import ActivitiesClient
 from lockstep.clients.apikeys_client import ApiKeysClient
 from lockstep.clients.appenrollments_client import AppEnrollmentsClient
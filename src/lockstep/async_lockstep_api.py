@@ -0,0 +1,172 @@
+#
+# Lockstep Software Development Kit for Python
+#
+# (c) 2021-2022 Lockstep, Inc.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+#
+# @author     Ted Spence <tspence@lockstep.io>
+# @copyright  2021-2022 Lockstep, Inc.
+# @version    2022.4
+# @link       https://github.com/Lockstep-Network/lockstep-sdk-python
+#
+
+import inspect
+import time
+from lockstep.lockstep_api import LockstepApi
+from lockstep.metrics import normalize_path
+from lockstep.serialization import is_tracked
+from lockstep.transports import AsyncHttpxTransport, AsyncTransportAdapter
+
+"""Lockstep Platform API client for asyncio
+"""
+class AsyncLockstepApi(LockstepApi):
+    """
+    An asyncio version of `LockstepApi`. Every method of the client
+    objects, such as `client.invoices.query_invoices(...)`, returns an
+    awaitable instead of the parsed result:
+
+        async with AsyncLockstepApi("sbx", "MyApp") as client:
+            client.with_api_key(apiKey)
+            page = await client.invoices.query_invoices(None, None, None, 100, 0)
+
+    Requests are sent with `httpx`, over HTTP/2 by default, so hundreds
+    of concurrent calls share a few connections. Helpers built on
+    blocking calls, such as `scan` and the file downloads, require
+    `LockstepApi`.
+    """
+
+    def __init__(self, env: str, appname: str, http2: bool = True, maxConnections: int = 4, maxStreamsPerConnection: int = 100, priorKnowledge: bool = False):
+        """Construct a new AsyncLockstepApi client object
+
+        Parameters
+        ----------
+        env : str
+            Select the Lockstep Platform environment to use for this client. You
+            may select from either "prd", "sbx", or provide a full URL of a custom
+            environment.
+        appname : str
+            Provide a name for your application for logging and debugging.
+        http2 : bool
+            True to use HTTP/2 when the server supports it; otherwise
+            requests are sent over HTTP/1.1
+        maxConnections : int
+            The maximum number of connections to the server
+        maxStreamsPerConnection : int
+            The maximum number of concurrent requests per HTTP/2
+            connection
+        priorKnowledge : bool
+            True to speak HTTP/2 without negotiation, for servers on
+            cleartext `http://` URLs
+        """
+        self._transportOptions = (http2, maxConnections, maxStreamsPerConnection, priorKnowledge)
+        super().__init__(env, appname)
+
+    def _default_transport(self):
+        return AsyncHttpxTransport(*self._transportOptions)
+
+    def with_transport(self, transport):
+        """Configure the transport this API client sends requests through
+
+        The default is an `AsyncHttpxTransport`. A blocking transport,
+        such as a `FakeTransport` or `CassetteTransport`, is wrapped in an
+        `AsyncTransportAdapter`, which sends each request on a worker
+        thread.
+
+        Parameters
+        ----------
+        transport : Transport
+            The transport to use, or None to restore the default
+        """
+        if transport is not None and not inspect.iscoroutinefunction(transport.request):
+            transport = AsyncTransportAdapter(transport)
+        self.transport = transport or self._default_transport()
+
+    def with_http2(self, maxConnections: int = 4, maxStreamsPerConnection: int = 100, priorKnowledge: bool = False):
+        self.transport = AsyncHttpxTransport(True, maxConnections, maxStreamsPerConnection, priorKnowledge)
+
+    async def send_request(self, method: str, path: str, body: object, query_params: object):
+        """Send a request and parse the result
+
+        Parameters
+        ----------
+        method : str
+            The HTTP method for this request
+        path : str
+            The path of the API endpoint for this request
+        body : object
+            For POST, PUT, or PATCH, represents the body of the request. For other
+            requests, this value should be nil.
+        query_params : object
+            The list of query parameters for the request
+        """
+        if method == "PATCH" and is_tracked(body):
+            return await self._send_tracked_patch(path, body, query_params)
+        headers = self._build_headers()
+        data, query_params = self._encode_body(body, query_params, headers)
+        return await self._send_async(method, path, query_params, headers, data, body)
+
+    async def send_upload_request(self, method: str, path: str, query_params: object, body: object, contentType: str):
+        """Send a request with a streamed body and parse the result
+
+        Parameters
+        ----------
+        method : str
+            The HTTP method for this request
+        path : str
+            The path of the API endpoint for this request
+        query_params : object
+            The list of query parameters for the request
+        body : object
+            The request body, as bytes or an iterable of byte chunks
+        contentType : str
+            The content type of the request body
+        """
+        headers = self._build_headers()
+        headers["Content-Type"] = contentType
+        return await self._send_async(method, path, query_params, headers, body, None)
+
+    async def _resolved(self, value: object):
+        return value
+
+    async def _then(self, result: object, callback):
+        return callback(await result)
+
+    def send_stream_request(self, method: str, path: str, query_params: object, headers: dict = None):
+        raise NotImplementedError("Streamed downloads are not supported by AsyncLockstepApi; use LockstepApi")
+
+    async def _send_async(self, method: str, path: str, query_params: object, headers: dict, data: object, body: object):
+        url = self._build_url(path, query_params)
+        if self.rateLimiter is not None:
+            await self.rateLimiter.acquire_async()
+        endpoint = normalize_path(path)
+        attributes = {"http.method": method, "lockstep.endpoint": endpoint}
+        if isinstance(body, list):
+            attributes["lockstep.records"] = len(body)
+        with self.tracer.start_span("lockstep.request", attributes):
+            start = time.perf_counter()
+            with self.tracer.start_span("lockstep.http", {"http.method": method, "http.url": url, "lockstep.endpoint": endpoint}) as span:
+                response = await self.transport.request(method, url, headers, data)
+                span.set_attribute("http.status_code", response.status_code)
+            if response.status_code == 429:
+                self._throttled(response)
+            received = time.perf_counter()
+            with self.tracer.start_span("lockstep.decode"):
+                result = response.json()
+        if self.metrics is not None:
+            requestBytes = int(response.request.headers.get("Content-Length") or 0)
+            self.metrics.record_request(method, path, response.status_code, received - start, requestBytes, len(response.content))
+        if self.slowRequestThreshold is not None:
+            self._check_slow_request(method, path, query_params, response, start, received, time.perf_counter())
+        return result
+
+    async def aclose(self):
+        """Close the connections of this client"""
+        await self.transport.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
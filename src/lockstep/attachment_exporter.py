@@ -0,0 +1,219 @@
+#
+# Lockstep Software Development Kit for Python
+#
+# (c) 2021-2022 Lockstep, Inc.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+#
+# @author     Ted Spence <tspence@lockstep.io>
+# @copyright  2021-2022 Lockstep, Inc.
+# @version    2022.4
+# @link       https://github.com/Lockstep-Network/lockstep-sdk-python
+#
+
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from lockstep.pagination import scan
+from lockstep.searchlight import chunk_in_filters, quote_literal
+from lockstep.tracing import propagate
+
+MANIFEST_NAME = "manifest.json"
+
+@dataclass
+class AttachmentExportReport:
+    """
+    Summarizes a bulk attachment export. Failed attachments are keyed by
+    attachment id with the text of the last error.
+    """
+
+    downloaded: int = 0
+    skipped: int = 0
+    bytes: int = 0
+    failed: dict = field(default_factory=dict)
+    seconds: float = 0.0
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class AttachmentExporter:
+    """
+    Downloads every Attachment matching a filter into a local directory
+    using a bounded pool of workers, and records what was written in a
+    `manifest.json` file.
+
+    Running an export again against the same directory skips files whose
+    size (and optionally checksum) still matches the manifest, and
+    resumes partially downloaded files.
+    """
+
+    def __init__(self, client, directory: str, maxWorkers: int = 8, retries: int = 3, backoff: float = 1.0, verifyChecksum: bool = False):
+        """
+        Construct a new attachment exporter
+
+        Parameters
+        ----------
+        client : LockstepApi
+            The API client to export attachments with
+        directory : str
+            The directory to write files and the manifest into
+        maxWorkers : int
+            The maximum number of downloads to run at the same time
+        retries : int
+            The number of times to retry a failed download
+        backoff : float
+            The delay in seconds before the first retry; doubled for
+            each further retry
+        verifyChecksum : bool
+            True to compare the SHA-256 of existing files against the
+            manifest before skipping them, rather than only their size
+        """
+        self.client = client
+        self.directory = directory
+        self.maxWorkers = maxWorkers
+        self.retries = retries
+        self.backoff = backoff
+        self.verifyChecksum = verifyChecksum
+        os.makedirs(directory, exist_ok=True)
+        self.manifest = self._load_manifest()
+
+    def export(self, filter: str, order: str = "attachmentId asc", pageSize: int = 200) -> AttachmentExportReport:
+        """
+        Exports every Attachment matching a Searchlight filter.
+
+        Parameters
+        ----------
+        filter : str
+            The filter to use to select Attachments, in the [Searchlight
+            query syntax](https://github.com/tspence/csharp-searchlight)
+        order : str
+            The sort order used while paging through Attachments
+        pageSize : int
+            The page size used while paging through Attachments
+        """
+        return self._export([filter], order, pageSize)
+
+    def export_for_objects(self, tableKey: str, objectKeys: list[str], order: str = "attachmentId asc", pageSize: int = 200) -> AttachmentExportReport:
+        """
+        Exports every Attachment linked to a set of objects, for example
+        all files attached to a list of invoices.
+
+        Parameters
+        ----------
+        tableKey : str
+            The type of object the Attachments are linked to, such as
+            `Invoice`
+        objectKeys : list[str]
+            The unique IDs of the objects whose Attachments to export
+        order : str
+            The sort order used while paging through Attachments
+        pageSize : int
+            The page size used while paging through Attachments
+        """
+        prefix = f"tableKey EQ {quote_literal(tableKey)} AND "
+        filters = [prefix + f for _, f in chunk_in_filters("objectKey", objectKeys)]
+        return self._export(filters, order, pageSize)
+
+    def _export(self, filters: list[str], order: str, pageSize: int) -> AttachmentExportReport:
+        with self.client.tracer.start_span("lockstep.attachment_export", {"lockstep.directory": self.directory}) as span:
+            report = self._export_all(filters, order, pageSize)
+            span.set_attribute("lockstep.downloaded", report.downloaded)
+            span.set_attribute("lockstep.skipped", report.skipped)
+            return report
+
+    def _export_all(self, filters: list[str], order: str, pageSize: int) -> AttachmentExportReport:
+        report = AttachmentExportReport()
+        start = time.perf_counter()
+        pending = set()
+        download = propagate(self._download)
+        with ThreadPoolExecutor(max_workers=self.maxWorkers) as executor:
+            try:
+                for filter in filters:
+                    for attachment in scan(self.client.attachments.query_attachments, filter, None, order, pageSize):
+                        if attachment.get("isArchived"):
+                            continue
+                        if self._is_current(attachment):
+                            report.skipped += 1
+                            continue
+                        # Keep only a couple of pages of work queued at any time
+                        if len(pending) >= self.maxWorkers * 2:
+                            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                            self._collect(done, report)
+                        pending.add(executor.submit(download, attachment))
+                done, pending = wait(pending)
+                self._collect(done, report)
+            finally:
+                self._save_manifest()
+        report.seconds = time.perf_counter() - start
+        return report
+
+    def _target(self, attachment: dict) -> str:
+        name = re.sub(r"[^\w.\- ]", "_", attachment.get("fileName") or "")
+        return os.path.join(self.directory, f"{attachment['attachmentId']}-{name}" if name else attachment["attachmentId"])
+
+    def _is_current(self, attachment: dict) -> bool:
+        entry = self.manifest.get(attachment["attachmentId"])
+        if entry is None:
+            return False
+        path = os.path.join(self.directory, entry["file"])
+        if not os.path.exists(path) or os.path.getsize(path) != entry["size"]:
+            return False
+        return not self.verifyChecksum or _file_sha256(path) == entry["sha256"]
+
+    def _download(self, attachment: dict):
+        id = attachment["attachmentId"]
+        path = self._target(attachment)
+        for attempt in range(self.retries + 1):
+            try:
+                size = self.client.attachments.download_attachment_to_file(id, path, resume=True)
+                return attachment, path, size, _file_sha256(path), None
+            except Exception as e:
+                error = e
+                if attempt < self.retries:
+                    if self.client.metrics is not None:
+                        self.client.metrics.record_retry("GET", f"/api/v1/Attachments/{id}/download")
+                    time.sleep(self.backoff * (2 ** attempt))
+        return attachment, path, 0, None, error
+
+    def _collect(self, futures, report: AttachmentExportReport):
+        for future in futures:
+            attachment, path, size, sha256, error = future.result()
+            id = attachment["attachmentId"]
+            if error is not None:
+                report.failed[id] = str(error)
+                continue
+            report.downloaded += 1
+            report.bytes += size
+            self.manifest[id] = {
+                "attachmentId": id,
+                "tableKey": attachment.get("tableKey"),
+                "objectKey": attachment.get("objectKey"),
+                "fileName": attachment.get("fileName"),
+                "file": os.path.basename(path),
+                "size": size,
+                "sha256": sha256,
+            }
+
+    def _load_manifest(self) -> dict:
+        path = os.path.join(self.directory, MANIFEST_NAME)
+        if not os.path.exists(path):
+            return {}
+        with open(path, "r", encoding="utf-8") as f:
+            return {entry["attachmentId"]: entry for entry in json.load(f)["attachments"]}
+
+    def _save_manifest(self):
+        path = os.path.join(self.directory, MANIFEST_NAME)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"attachments": list(self.manifest.values())}, f, indent=2)
+        os.replace(path + ".tmp", path)
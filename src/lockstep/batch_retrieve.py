@@ -0,0 +1,89 @@
+#
+# Lockstep Software Development Kit for Python
+#
+# (c) 2021-2022 Lockstep, Inc.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+#
+# @author     Ted Spence <tspence@lockstep.io>
+# @copyright  2021-2022 Lockstep, Inc.
+# @version    2022.4
+# @link       https://github.com/Lockstep-Network/lockstep-sdk-python
+#
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from lockstep.searchlight import chunk_in_filters, DEFAULT_MAX_FILTER_LENGTH
+from lockstep.tracing import propagate, tracer_for
+
+@dataclass
+class RetrieveManyResult:
+    """
+    The outcome of a batch retrieve. Records are keyed by the ids that
+    were requested; ids the server did not return are listed in
+    `missing`, and ids whose query failed are listed in `failed` with the
+    matching error payloads in `errors`.
+    """
+
+    records: dict = field(default_factory=dict)
+    missing: list[str] = field(default_factory=list)
+    failed: list[str] = field(default_factory=list)
+    errors: list[object] = field(default_factory=list)
+
+
+def retrieve_many(query, keyField: str, ids: list[str], include: str, maxWorkers: int = 8, pageSize: int = 200, maxFilterLength: int = DEFAULT_MAX_FILTER_LENGTH) -> RetrieveManyResult:
+    """
+    Retrieves many records by id through a `query_*` method, using
+    chunked `IN (...)` filters that run concurrently instead of one
+    `retrieve_*` call per id.
+
+    Parameters
+    ----------
+    query : callable
+        A bound `query_*` method taking filter, include, order, pageSize
+        and pageNumber
+    keyField : str
+        The name of the primary key field, for example `invoiceId`
+    ids : list[str]
+        The unique Lockstep Platform ID numbers to retrieve
+    include : str
+        To fetch additional data on these objects, specify the list of
+        elements to retrieve
+    maxWorkers : int
+        The maximum number of queries to run at the same time
+    pageSize : int
+        The maximum number of ids to place in a single query
+    maxFilterLength : int
+        The maximum URL-encoded length of a single filter
+    """
+    result = RetrieveManyResult()
+    chunks = chunk_in_filters(keyField, ids, pageSize, maxFilterLength)
+    if not chunks:
+        return result
+
+    def run(chunk):
+        values, filter = chunk
+        return values, query(filter, include, None, len(values), 0)
+
+    found = {}
+    span = tracer_for(query).start_span("lockstep.retrieve_many", {"lockstep.ids": len(ids), "lockstep.queries": len(chunks)})
+    with span, ThreadPoolExecutor(max_workers=min(maxWorkers, len(chunks))) as executor:
+        for values, response in executor.map(propagate(run), chunks):
+            if not isinstance(response, dict) or "records" not in response:
+                result.failed.extend(values)
+                result.errors.append(response)
+                continue
+            for record in response["records"] or []:
+                key = record.get(keyField)
+                if key is not None:
+                    found[str(key).lower()] = record
+
+    failed = set(result.failed)
+    for id in dict.fromkeys(ids):
+        record = found.get(str(id).lower())
+        if record is not None:
+            result.records[id] = record
+        elif id not in failed:
+            result.missing.append(id)
+    return result
@@ -0,0 +1,171 @@
+#
+# Lockstep Software Development Kit for Python
+#
+# (c) 2021-2022 Lockstep, Inc.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+#
+# @author     Ted Spence <tspence@lockstep.io>
+# @copyright  2021-2022 Lockstep, Inc.
+# @version    2022.4
+# @link       https://github.com/Lockstep-Network/lockstep-sdk-python
+#
+
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from lockstep.error_result import error_status
+from lockstep.serialization import changed_fields, is_tracked
+from lockstep.tracing import propagate, tracer_for
+
+# Statuses worth retrying: timeouts, throttling and server errors
+TRANSIENT_STATUSES = frozenset([408, 429, 500, 502, 503, 504])
+
+
+@dataclass
+class BulkUpdateOutcome:
+    """
+    The result of updating one record. `result` is the updated record
+    returned by the API, or the error payload of the last attempt when
+    the update failed.
+    """
+
+    id: object
+    ok: bool = False
+    skipped: bool = False
+    attempts: int = 0
+    status: int = None
+    result: object = None
+    error: str = None
+    seconds: float = 0.0
+
+
+@dataclass
+class BulkUpdateReport:
+    """
+    Summarizes a bulk update. Outcomes are keyed by the id of each
+    record; updates with no changes are counted as skipped and not sent.
+    """
+
+    outcomes: dict = field(default_factory=dict)
+    succeeded: int = 0
+    failed: int = 0
+    skipped: int = 0
+    retries: int = 0
+    seconds: float = 0.0
+    updatesPerSecond: float = 0.0
+    latencyP50: float = 0.0
+    latencyP95: float = 0.0
+
+    @property
+    def failedIds(self) -> list:
+        return [id for id, outcome in self.outcomes.items() if not outcome.ok]
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def bulk_update(update, changes, path: str, maxWorkers: int = 8, retries: int = 3, backoff: float = 0.5) -> BulkUpdateReport:
+    """
+    Applies many PATCH updates through an `update_*` method with bounded
+    concurrency, retrying transient failures.
+
+    Requests go through the client's rate limiter, if it has one; a 429
+    response pauses the limiter for every thread before the retry, for
+    at least as long as its `Retry-After` header asks.
+
+    Parameters
+    ----------
+    update : callable
+        A bound `update_*` method taking an id and a body; ids that are
+        tuples are passed as several arguments
+    changes : iterable
+        `(id, changes)` pairs, where changes is a dictionary of field
+        names and new values, or a model; models decoded with change
+        tracking send only their modified fields and are skipped when
+        nothing changed
+    path : str
+        The endpoint template of the update, used for retry metrics
+    maxWorkers : int
+        The maximum number of updates to run at the same time
+    retries : int
+        The number of times to retry an update that failed with a
+        transient error
+    backoff : float
+        The delay in seconds before the first retry; doubled for each
+        further retry
+    """
+    client = getattr(getattr(update, "__self__", None), "client", None)
+    limiter = getattr(client, "rateLimiter", None)
+    metrics = getattr(client, "metrics", None)
+
+    def run(id, body) -> BulkUpdateOutcome:
+        outcome = BulkUpdateOutcome(id)
+        arguments = id if isinstance(id, tuple) else (id,)
+        start = time.perf_counter()
+        for attempt in range(retries + 1):
+            outcome.attempts = attempt + 1
+            try:
+                outcome.result = update(*arguments, body)
+                outcome.status = error_status(outcome.result)
+                outcome.error = None if outcome.status is None else outcome.result.get("title")
+            except Exception as e:
+                outcome.status, outcome.error = None, str(e)
+            if outcome.error is None:
+                outcome.ok = True
+                break
+            if attempt == retries or (outcome.status is not None and outcome.status not in TRANSIENT_STATUSES):
+                break
+            delay = backoff * (2 ** attempt)
+            if outcome.status == 429 and limiter is not None:
+                limiter.pause(delay)
+            if metrics is not None:
+                metrics.record_retry("PATCH", path)
+            time.sleep(delay)
+        outcome.seconds = time.perf_counter() - start
+        return outcome
+
+    report = BulkUpdateReport()
+    latencies = []
+
+    def collect(done):
+        for future in done:
+            outcome = future.result()
+            report.outcomes[outcome.id] = outcome
+            report.retries += outcome.attempts - 1
+            latencies.append(outcome.seconds)
+            if outcome.ok:
+                report.succeeded += 1
+            else:
+                report.failed += 1
+
+    start = time.perf_counter()
+    with tracer_for(update).start_span("lockstep.bulk_update", {"lockstep.endpoint": path}) as span:
+        pending = set()
+        runInSpan = propagate(run)
+        with ThreadPoolExecutor(max_workers=maxWorkers) as executor:
+            for id, body in changes:
+                if not body or (is_tracked(body) and not changed_fields(body)):
+                    report.outcomes[id] = BulkUpdateOutcome(id, ok=True, skipped=True)
+                    report.skipped += 1
+                    continue
+                # Keep only a few updates queued per worker so that large inputs are consumed lazily
+                if len(pending) >= maxWorkers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+                pending.add(executor.submit(runInSpan, id, body))
+            collect(wait(pending)[0])
+        span.set_attribute("lockstep.succeeded", report.succeeded)
+        span.set_attribute("lockstep.failed", report.failed)
+
+    report.seconds = time.perf_counter() - start
+    sent = report.succeeded + report.failed
+    report.updatesPerSecond = sent / report.seconds if report.seconds else 0.0
+    latencies.sort()
+    report.latencyP50 = _percentile(latencies, 0.5)
+    report.latencyP95 = _percentile(latencies, 0.95)
+    return report
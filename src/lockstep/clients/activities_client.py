@@ -13,6 +13,8 @@
 #
 
 from lockstep.lockstep_response import LockstepResponse
+from lockstep.bulk_update import bulk_update, BulkUpdateReport
+from lockstep.batch_retrieve import retrieve_many, RetrieveManyResult
 from lockstep.models.activitymodel import ActivityModel
 
 class ActivitiesClient:
@@ -195,3 +197,50 @@ class ActivitiesClient:
         """
         path = f"/api/v1/Activities/{activityId}/forward/{userId}"
         return self.client.send_request("POST", path, None, {"activityId": activityId, "userId": userId})
+
+    def retrieve_many(self, ids: list[str], include: str, maxWorkers: int = 8) -> RetrieveManyResult:
+        """
+        Retrieves many Activities by their unique identifiers using a
+        small number of concurrent queries rather than one request per
+        activity.
+
+        The ids are grouped into `activityId IN (...)` filters that respect
+        URL length limits and each group is fetched with a single call
+        to `query_activities`. Results are keyed by the requested id; ids that
+        were not found are listed in `missing`.
+
+        Parameters
+        ----------
+        ids : list[str]
+            The unique Lockstep Platform ID numbers to retrieve
+        include : str
+            To fetch additional data on this object, specify the list of
+            elements to retrieve. Available collections: Company,
+            Attachments, CustomFields, Notes, References, and
+            UserAssignedToName
+        maxWorkers : int
+            The maximum number of queries to run at the same time
+        """
+        return retrieve_many(self.query_activities, "activityId", ids, include, maxWorkers)
+
+    def bulk_update(self, changes, maxWorkers: int = 8, retries: int = 3) -> BulkUpdateReport:
+        """
+        Updates many Activities with concurrent PATCH calls, for mass
+        changes to activities.
+
+        Updates run through the client's rate limiter and are retried
+        when they fail with a transient error. The report lists the
+        outcome for each id along with throughput statistics.
+
+        Parameters
+        ----------
+        changes : iterable
+            `(id, changes)` pairs, where changes is a dictionary of the
+            fields to change and their new values
+        maxWorkers : int
+            The maximum number of updates to run at the same time
+        retries : int
+            The number of times to retry an update that failed with a
+            transient error
+        """
+        return bulk_update(self.update_activity, changes, "/api/v1/Activities/{id}", maxWorkers, retries)
@@ -13,6 +13,8 @@
 #
 
 from lockstep.lockstep_response import LockstepResponse
+from lockstep.bulk_update import bulk_update, BulkUpdateReport
+from lockstep.file_transfer import download_to_file, upload_file, DEFAULT_CHUNK_SIZE
 
 class AttachmentsClient:
 
@@ -128,7 +130,34 @@ class AttachmentsClient:
         path = f"/api/v1/Attachments/{id}/download"
         return self.client.send_request("GET", path, None, {"id": id})
 
-    def upload_attachment(self, tableName: str, objectId: str) -> LockstepResponse:
+    def download_attachment_to_file(self, id: str, destination, chunkSize: int = DEFAULT_CHUNK_SIZE, progress=None, resume: bool = False) -> int:
+        """
+        Streams the Attachment file to a local path or file object in
+        fixed size chunks and returns the size of the file in bytes.
+
+        The file is never held in memory. When `destination` is a path,
+        data is written to a `.part` file that is renamed once the
+        length reported by the server has been verified; with `resume`
+        enabled an interrupted download continues where it stopped
+        using an HTTP `Range` request.
+
+        Parameters
+        ----------
+        id : str
+            The unique ID number of the Attachment to download
+        destination : str or file object
+            A file path, or a binary file object opened for writing
+        chunkSize : int
+            The number of bytes to read and write at a time
+        progress : callable
+            Optional callback receiving `(bytes_written, total_bytes)`
+        resume : bool
+            True to continue a previously interrupted download
+        """
+        path = f"/api/v1/Attachments/{id}/download"
+        return download_to_file(self.client, path, {"id": id}, destination, chunkSize, progress, resume)
+
+    def upload_attachment(self, tableName: str, objectId: str, file: object = None, fileName: str = None, progress=None) -> LockstepResponse:
         """
         Uploads and creates one or more Attachments from the provided
         arguments.
@@ -151,8 +180,18 @@ class AttachmentsClient:
         objectId : str
             The unique ID of the object to which this Attachment will be
             linked
+        file : object
+            The file to upload: a path, a binary file object, or an
+            iterable of byte chunks. The file is streamed as
+            `multipart/form-data` and never loaded into memory.
+        fileName : str
+            The name of the uploaded file; defaults to the name of `file`
+        progress : callable
+            Optional callback receiving `(bytes_sent, total_bytes)`
         """
         path = f"/api/v1/Attachments"
+        if file is not None:
+            return upload_file(self.client, path, {"tableName": tableName, "objectId": objectId}, file, fileName, progress=progress)
         return self.client.send_request("POST", path, None, {"tableName": tableName, "objectId": objectId})
 
     def query_attachments(self, filter: str, include: str, order: str, pageSize: int, pageNumber: int) -> LockstepResponse:
@@ -195,3 +234,25 @@ class AttachmentsClient:
         """
         path = f"/api/v1/Attachments/query"
         return self.client.send_request("GET", path, None, {"filter": filter, "include": include, "order": order, "pageSize": pageSize, "pageNumber": pageNumber})
+
+    def bulk_update(self, changes, maxWorkers: int = 8, retries: int = 3) -> BulkUpdateReport:
+        """
+        Updates many Attachments with concurrent PATCH calls, for mass
+        changes to attachments.
+
+        Updates run through the client's rate limiter and are retried
+        when they fail with a transient error. The report lists the
+        outcome for each id along with throughput statistics.
+
+        Parameters
+        ----------
+        changes : iterable
+            `(id, changes)` pairs, where changes is a dictionary of the
+            fields to change and their new values
+        maxWorkers : int
+            The maximum number of updates to run at the same time
+        retries : int
+            The number of times to retry an update that failed with a
+            transient error
+        """
+        return bulk_update(self.update_attachment, changes, "/api/v1/Attachments/{id}", maxWorkers, retries)
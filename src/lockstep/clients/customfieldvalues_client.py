@@ -13,6 +13,7 @@
 #
 
 from lockstep.lockstep_response import LockstepResponse
+from lockstep.bulk_update import bulk_update, BulkUpdateReport
 from lockstep.models.customfieldvaluemodel import CustomFieldValueModel
 
 class CustomFieldValuesClient:
@@ -174,3 +175,24 @@ class CustomFieldValuesClient:
         """
         path = f"/api/v1/CustomFieldValues/query"
         return self.client.send_request("GET", path, None, {"filter": filter, "include": include, "order": order, "pageSize": pageSize, "pageNumber": pageNumber})
+
+    def bulk_update(self, changes, maxWorkers: int = 8, retries: int = 3) -> BulkUpdateReport:
+        """
+        Updates many Custom Field values with concurrent PATCH calls.
+
+        Updates run through the client's rate limiter and are retried
+        when they fail with a transient error. The report lists the
+        outcome for each field along with throughput statistics.
+
+        Parameters
+        ----------
+        changes : iterable
+            `((definitionId, recordKey), changes)` pairs, where changes
+            is a dictionary of the fields to change and their new values
+        maxWorkers : int
+            The maximum number of updates to run at the same time
+        retries : int
+            The number of times to retry an update that failed with a
+            transient error
+        """
+        return bulk_update(self.update_field, changes, "/api/v1/CustomFieldValues/{definitionId}/{recordKey}", maxWorkers, retries)
@@ -13,6 +13,11 @@
 #
 
 from lockstep.lockstep_response import LockstepResponse
+from lockstep.bulk_update import bulk_update, BulkUpdateReport
+from lockstep.batch_retrieve import retrieve_many, RetrieveManyResult
+from lockstep.columnar import to_dataframe
+from lockstep.serialization import DEFAULT_INTERN_FIELDS
+from lockstep.models.invoicesummarymodel import InvoiceSummaryModel
 from lockstep.models.invoicemodel import InvoiceModel
 
 class InvoicesClient:
@@ -240,3 +245,72 @@ class InvoicesClient:
         """
         path = f"/api/v1/Invoices/views/at-risk-summary"
         return self.client.send_request("GET", path, None, {"filter": filter, "include": include, "order": order, "pageSize": pageSize, "pageNumber": pageNumber})
+
+    def retrieve_many(self, ids: list[str], include: str, maxWorkers: int = 8) -> RetrieveManyResult:
+        """
+        Retrieves many Invoices by their unique identifiers using a
+        small number of concurrent queries rather than one request per
+        invoice.
+
+        The ids are grouped into `invoiceId IN (...)` filters that respect
+        URL length limits and each group is fetched with a single call
+        to `query_invoices`. Results are keyed by the requested id; ids that
+        were not found are listed in `missing`.
+
+        Parameters
+        ----------
+        ids : list[str]
+            The unique Lockstep Platform ID numbers to retrieve
+        include : str
+            To fetch additional data on these objects, specify the list of
+            elements to retrieve. Available collections: Addresses,
+            Lines, Payments, Notes, Attachments, Company, Customer,
+            CustomFields, CreditMemos
+        maxWorkers : int
+            The maximum number of queries to run at the same time
+        """
+        return retrieve_many(self.query_invoices, "invoiceId", ids, include, maxWorkers)
+
+    def bulk_update(self, changes, maxWorkers: int = 8, retries: int = 3) -> BulkUpdateReport:
+        """
+        Updates many Invoices with concurrent PATCH calls, for mass
+        changes to invoices, for example flagging `inDispute` or `excludeFromAging`.
+
+        Updates run through the client's rate limiter and are retried
+        when they fail with a transient error. The report lists the
+        outcome for each id along with throughput statistics.
+
+        Parameters
+        ----------
+        changes : iterable
+            `(id, changes)` pairs, where changes is a dictionary of the
+            fields to change and their new values
+        maxWorkers : int
+            The maximum number of updates to run at the same time
+        retries : int
+            The number of times to retry an update that failed with a
+            transient error
+        """
+        return bulk_update(self.update_invoice, changes, "/api/v1/Invoices/{id}", maxWorkers, retries)
+
+    def invoice_summary_dataframe(self, filter: str = None, order: str = None, pageSize: int = 500, maxWorkers: int = 4):
+        """
+        Fetches every page of the Invoice Summary View as a pandas
+        DataFrame with float, nullable integer, category and datetime
+        columns, without building a Python object per record. Requires
+        the `pandas` package.
+
+        Parameters
+        ----------
+        filter : str
+            The filter for this query. See [Searchlight Query
+            Language](https://developer.lockstep.io/docs/querying-with-searchlight)
+        order : str
+            The sort order for this query; defaults to `invoiceId` so that
+            pages fetched in parallel do not repeat or skip records
+        pageSize : int
+            The page size for results
+        maxWorkers : int
+            The maximum number of pages to fetch at the same time
+        """
+        return to_dataframe(self.query_invoice_summary_view, InvoiceSummaryModel, filter, None, order or "invoiceId", pageSize, maxWorkers, categorical=DEFAULT_INTERN_FIELDS | {"status", "customerName"})
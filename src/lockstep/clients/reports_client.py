@@ -13,6 +13,7 @@
 #
 
 from lockstep.lockstep_response import LockstepResponse
+from lockstep.report_dashboard import fetch_dashboard, ReportDashboard
 
 class ReportsClient:
 
@@ -161,3 +162,31 @@ class ReportsClient:
         """
         path = f"/api/v1/Reports/attachments-header"
         return self.client.send_request("GET", path, None, {"companyId": companyId})
+
+    def dashboard(self, companyId: str = None, timeframe: int = 30, reportDate: str = None, currencyCode: str = None, currencyProvider: str = None, buckets: list[int] = None) -> ReportDashboard:
+        """
+        Retrieves the cash flow, DSO, risk rate, AR header, AR aging
+        header, aging and attachment header reports at the same time,
+        decoded into their models.
+
+        When the client has a result cache (see
+        `LockstepApi.with_result_cache`), fresh reports are served from
+        it and expired ones are refreshed in the background.
+
+        Parameters
+        ----------
+        companyId : str
+            The company to report on, or None for the whole account; used
+            by the AR header, aging and attachment reports
+        timeframe : int
+            Number of days of data to include for the Cash Flow Report
+        reportDate : str
+            The date of the AR header report; defaults to today
+        currencyCode : str
+            Currency aging buckets are converted to
+        currencyProvider : str
+            Currency provider currency rates should be returned from
+        buckets : list[int]
+            Customized buckets used for aging calculations
+        """
+        return fetch_dashboard(self, companyId, timeframe, reportDate, currencyCode, currencyProvider, buckets)
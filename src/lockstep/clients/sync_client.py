@@ -13,6 +13,7 @@
 #
 
 from lockstep.lockstep_response import LockstepResponse
+from lockstep.file_transfer import upload_file
 from lockstep.models.syncsubmitmodel import SyncSubmitModel
 
 class SyncClient:
@@ -41,7 +42,7 @@ class SyncClient:
         path = f"/api/v1/Sync"
         return self.client.send_request("POST", path, body, {"body": body})
 
-    def upload_sync_file(self, ) -> LockstepResponse:
+    def upload_sync_file(self, file: object = None, fileName: str = None, progress=None) -> LockstepResponse:
         """
         Requests a new Sync task from a ZIP file you provide. This ZIP
         file can contain one or more files with data from the customer's
@@ -57,8 +58,20 @@ class SyncClient:
 
         Parameters
         ----------
+        file : object
+            The ZIP file to upload: a path, a binary file object, or an
+            iterable of byte chunks. The file is streamed as
+            `multipart/form-data` and never loaded into memory, so
+            multi-gigabyte files can be sent from small containers.
+        fileName : str
+            The name of the uploaded file; defaults to the name of `file`
+        progress : callable
+            Optional callback receiving `(bytes_sent, total_bytes)`
         """
         path = f"/api/v1/Sync/zip"
+        if file is not None:
+            with self.client.tracer.start_span("lockstep.sync_upload", {"lockstep.file": fileName or str(file)}):
+                return upload_file(self.client, path, None, file, fileName, contentType="application/zip", progress=progress)
         return self.client.send_request("POST", path, None, None)
 
     def update_sync(self, id: str, body: object) -> LockstepResponse:
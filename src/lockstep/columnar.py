@@ -0,0 +1,336 @@
+#
+# Lockstep Software Development Kit for Python
+#
+# (c) 2021-2022 Lockstep, Inc.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+#
+# @author     Ted Spence <tspence@lockstep.io>
+# @copyright  2021-2022 Lockstep, Inc.
+# @version    2022.4
+# @link       https://github.com/Lockstep-Network/lockstep-sdk-python
+#
+
+import math
+import typing
+from array import array
+from lockstep.pagination import scan_pages, scan_pages_parallel, stable_order
+from lockstep.serialization import DEFAULT_INTERN_FIELDS, scalar_fields
+
+"""
+Column-oriented storage for large numbers of records of one model
+"""
+
+# Column kinds
+_FLOAT = "float"
+_BOOL = "bool"
+_CATEGORY = "category"
+_OBJECT = "object"
+
+_NAN = math.nan
+
+# String fields holding dates or timestamps, besides those ending in "Date"
+DATETIME_FIELDS = frozenset(["created", "modified", "newestActivity"])
+
+
+def _pandas():
+    try:
+        import numpy
+        import pandas
+    except ImportError:
+        raise ImportError("DataFrame conversion requires the pandas package") from None
+    return pandas, numpy
+
+
+def _is_datetime_field(name: str) -> bool:
+    return name.endswith("Date") or name in DATETIME_FIELDS
+
+
+class ColumnarBatch:
+    """
+    Holds the scalar fields of many records of one model as one column
+    per field, decoded straight from the JSON dictionaries returned by
+    the API without building a model instance per record.
+
+    * `float` fields are stored in an `array('d')`, with NaN for missing
+      values
+    * `bool` fields are stored in an `array('b')` of 1, 0 and -1 for
+      missing values
+    * fields listed in `categorical` are dictionary encoded as an
+      `array('i')` of codes into a list of distinct values, with -1 for
+      missing values
+    * all other fields are stored in a list
+
+    Nested models and lists of models are not stored.
+    """
+
+    def __init__(self, model: type, columns: list[str] = None, categorical: frozenset = DEFAULT_INTERN_FIELDS):
+        """
+        Construct a new, empty batch
+
+        Parameters
+        ----------
+        model : type
+            A dataclass from `lockstep.models`
+        columns : list[str]
+            The fields to store, in order; defaults to every scalar field
+            of the model
+        categorical : frozenset
+            The names of string fields to dictionary encode
+        """
+        self.model = model
+        self.names = list(columns) if columns is not None else scalar_fields(model)
+        hints = typing.get_type_hints(model)
+        self.kinds = {}
+        self._columns = {}
+        self._categories = {}
+        self._category_index = {}
+        for name in self.names:
+            hint = hints.get(name)
+            if hint is float:
+                self.kinds[name] = _FLOAT
+                self._columns[name] = array("d")
+            elif hint is bool:
+                self.kinds[name] = _BOOL
+                self._columns[name] = array("b")
+            elif name in categorical:
+                self.kinds[name] = _CATEGORY
+                self._columns[name] = array("i")
+                self._categories[name] = []
+                self._category_index[name] = {}
+            else:
+                self.kinds[name] = _OBJECT
+                self._columns[name] = []
+        self._length = 0
+
+    @classmethod
+    def from_records(cls, model: type, records: list[dict], columns: list[str] = None, categorical: frozenset = DEFAULT_INTERN_FIELDS):
+        """
+        Builds a batch from a list of JSON dictionaries, such as the
+        `records` of a query result.
+
+        Parameters
+        ----------
+        model : type
+            A dataclass from `lockstep.models`
+        records : list[dict]
+            The JSON dictionaries returned by the API
+        columns : list[str]
+            The fields to store; defaults to every scalar field
+        categorical : frozenset
+            The names of string fields to dictionary encode
+        """
+        batch = cls(model, columns, categorical)
+        batch.extend(records)
+        return batch
+
+    def extend(self, records: list[dict]):
+        """
+        Appends records to the end of the batch.
+
+        Parameters
+        ----------
+        records : list[dict]
+            The JSON dictionaries returned by the API
+        """
+        if not isinstance(records, list):
+            records = list(records)
+        for name in self.names:
+            kind = self.kinds[name]
+            column = self._columns[name]
+            if kind == _FLOAT:
+                column.extend([_NAN if (value := record.get(name)) is None else value for record in records])
+            elif kind == _BOOL:
+                column.extend([-1 if (value := record.get(name)) is None else int(value) for record in records])
+            elif kind == _CATEGORY:
+                column.extend(self._encode(name, [record.get(name) for record in records]))
+            else:
+                column.extend([record.get(name) for record in records])
+        self._length += len(records)
+
+    def _encode(self, name: str, values: list) -> list[int]:
+        index = self._category_index[name]
+        categories = self._categories[name]
+        codes = []
+        for value in values:
+            if value is None:
+                codes.append(-1)
+                continue
+            code = index.get(value)
+            if code is None:
+                code = index[value] = len(categories)
+                categories.append(value)
+            codes.append(code)
+        return codes
+
+    def __len__(self) -> int:
+        return self._length
+
+    def column(self, name: str):
+        """
+        Returns the storage buffer of a column: an `array` for float,
+        bool and categorical fields, or a list for other fields.
+
+        Parameters
+        ----------
+        name : str
+            The name of the field
+        """
+        return self._columns[name]
+
+    def categories(self, name: str) -> list:
+        """
+        Returns the distinct values that the codes of a categorical
+        column refer to.
+
+        Parameters
+        ----------
+        name : str
+            The name of a categorical field
+        """
+        return self._categories[name]
+
+    def values(self, name: str) -> list:
+        """
+        Returns the values of a column as a list of Python objects, with
+        None for missing values.
+
+        Parameters
+        ----------
+        name : str
+            The name of the field
+        """
+        kind = self.kinds[name]
+        column = self._columns[name]
+        if kind == _FLOAT:
+            return [None if value != value else value for value in column]
+        if kind == _BOOL:
+            return [None if value < 0 else value == 1 for value in column]
+        if kind == _CATEGORY:
+            categories = self._categories[name]
+            return [None if code < 0 else categories[code] for code in column]
+        return list(column)
+
+    def row(self, index: int):
+        """
+        Returns one record of the batch as an instance of the model.
+
+        Parameters
+        ----------
+        index : int
+            The position of the record in the batch
+        """
+        return self.model(**self._row_values(index))
+
+    def to_records(self) -> list[dict]:
+        """
+        Returns the records of the batch as JSON-ready dictionaries,
+        omitting missing values.
+        """
+        columns = [(name, self.values(name)) for name in self.names]
+        return [{name: values[i] for name, values in columns if values[i] is not None} for i in range(self._length)]
+
+    def to_dataframe(self, datetimeColumns: list[str] = None):
+        """
+        Returns the batch as a pandas DataFrame with typed columns:
+        float64 for `float` fields, nullable Int64 and boolean for `int`
+        and `bool` fields, `category` for categorical fields and
+        datetime64 for date fields.
+
+        Float and categorical columns are views of the batch's buffers
+        rather than copies, so the batch cannot be extended while the
+        DataFrame is in use. Requires the `pandas` package.
+
+        Parameters
+        ----------
+        datetimeColumns : list[str]
+            The string fields to parse as dates; defaults to the fields
+            ending in `Date` and those in `DATETIME_FIELDS`
+        """
+        pd, np = _pandas()
+        hints = typing.get_type_hints(self.model)
+        # pandas 2 infers one format per column, while dates and timestamps may be mixed
+        dateFormat = "ISO8601" if int(pd.__version__.split(".")[0]) >= 2 else None
+        data = {}
+        for name in self.names:
+            kind = self.kinds[name]
+            column = self._columns[name]
+            if kind == _FLOAT:
+                data[name] = np.frombuffer(column, dtype=np.float64)
+            elif kind == _BOOL:
+                flags = np.frombuffer(column, dtype=np.int8)
+                data[name] = pd.arrays.BooleanArray(flags == 1, flags < 0)
+            elif kind == _CATEGORY:
+                data[name] = pd.Categorical.from_codes(np.frombuffer(column, dtype=np.intc), categories=self._categories[name])
+            elif hints.get(name) is int:
+                data[name] = pd.array(column, dtype="Int64")
+            elif name in datetimeColumns if datetimeColumns is not None else _is_datetime_field(name):
+                data[name] = pd.to_datetime(column, errors="coerce", format=dateFormat)
+            else:
+                data[name] = column
+        return pd.DataFrame(data, columns=self.names, copy=False)
+
+    def _row_values(self, index: int) -> dict:
+        result = {}
+        for name in self.names:
+            kind = self.kinds[name]
+            value = self._columns[name][index]
+            if kind == _FLOAT:
+                value = None if value != value else value
+            elif kind == _BOOL:
+                value = None if value < 0 else value == 1
+            elif kind == _CATEGORY:
+                value = None if value < 0 else self._categories[name][value]
+            if value is not None:
+                result[name] = value
+        return result
+
+
+def to_dataframe(query, model: type, filter: str = None, include: str = None, order: str = None, pageSize: int = 500, maxWorkers: int = 4,
+                 columns: list[str] = None, categorical: frozenset = DEFAULT_INTERN_FIELDS, datetimeColumns: list[str] = None):
+    """
+    Pages through a `query_*` method and returns every record as a
+    pandas DataFrame, decoding each page straight into a `ColumnarBatch`
+    so that no Python object is built per record; for example
+    `to_dataframe(client.invoices.query_invoice_summary_view,
+    InvoiceSummaryModel)`. Requires the `pandas` package.
+
+    Parameters
+    ----------
+    query : callable
+        A bound `query_*` method taking filter, include, order, pageSize
+        and pageNumber
+    model : type
+        The dataclass from `lockstep.models` returned by the query
+    filter : str
+        The filter for this query. See [Searchlight Query
+        Language](https://developer.lockstep.io/docs/querying-with-searchlight)
+    include : str
+        To fetch additional data on each object, specify the list of
+        elements to retrieve
+    order : str
+        The sort order for this query; a stable order is required when
+        fetching pages in parallel, and defaults to the primary key of
+        the model
+    pageSize : int
+        The page size for results
+    maxWorkers : int
+        The maximum number of pages to fetch at the same time
+    columns : list[str]
+        The fields to include, in order; defaults to every scalar field
+    categorical : frozenset
+        The names of string fields to store as `category` columns
+    datetimeColumns : list[str]
+        The string fields to parse as dates
+    """
+    _pandas()
+    order = stable_order(model, order, maxWorkers)
+    batch = ColumnarBatch(model, columns, categorical)
+    if maxWorkers > 1:
+        pages = scan_pages_parallel(query, filter, include, order, pageSize, maxWorkers)
+    else:
+        pages = scan_pages(query, filter, include, order, pageSize)
+    for page in pages:
+        batch.extend(page["records"] or [])
+    return batch.to_dataframe(datetimeColumns)
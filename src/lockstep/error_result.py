@@ -25,3 +25,32 @@ class ErrorResult:
     detail: str
     instance: str
 
+
+
+class LockstepError(Exception):
+    """
+    Raised by helpers that cannot return an error payload to the caller,
+    such as iterators over paginated results. The payload returned by the
+    Lockstep Platform API is available as `error`.
+    """
+
+    def __init__(self, message: str, error: object = None):
+        super().__init__(message)
+        self.error = error
+
+
+def error_status(payload: object) -> int:
+    """
+    Returns the status code of an error payload returned by the API, or
+    None if the payload is not an error.
+
+    Parameters
+    ----------
+    payload : object
+        A parsed API response
+    """
+    if isinstance(payload, dict) and "title" in payload and "type" in payload:
+        status = payload.get("status")
+        if isinstance(status, int) and status >= 400:
+            return status
+    return None
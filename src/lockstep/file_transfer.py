@@ -0,0 +1,247 @@
+#
+# Lockstep Software Development Kit for Python
+#
+# (c) 2021-2022 Lockstep, Inc.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+#
+# @author     Ted Spence <tspence@lockstep.io>
+# @copyright  2021-2022 Lockstep, Inc.
+# @version    2022.4
+# @link       https://github.com/Lockstep-Network/lockstep-sdk-python
+#
+
+import itertools
+import os
+import re
+import uuid
+from lockstep.error_result import LockstepError
+
+"""
+Helpers for moving files to and from the Lockstep Platform API in fixed
+size chunks, so that memory use does not depend on file size.
+"""
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+_CONTENT_RANGE = re.compile(r"bytes (\d+)-(\d+)/(\d+|\*)")
+
+
+def _error_payload(response) -> object:
+    try:
+        return response.json()
+    except ValueError:
+        return response.text
+
+
+def _expected_length(response, offset: int) -> int:
+    """
+    Returns the full size of the file being downloaded, or None if the
+    server did not say.
+    """
+    match = _CONTENT_RANGE.match(response.headers.get("Content-Range", ""))
+    if match and match.group(3) != "*":
+        return int(match.group(3))
+    length = response.headers.get("Content-Length")
+    if length is not None:
+        return offset + int(length)
+    return None
+
+
+def download_to_file(client, path: str, query_params: object, destination, chunkSize: int = DEFAULT_CHUNK_SIZE, progress=None, resume: bool = False) -> int:
+    """
+    Streams a file from the API to a local path or writable file object
+    and returns its size in bytes.
+
+    When `destination` is a path the file is written to
+    `destination + ".part"` and renamed once its length has been
+    verified. With `resume` enabled, an existing partial file is
+    continued using an HTTP `Range` request.
+
+    Parameters
+    ----------
+    client : LockstepApi
+        The API client to send the request with
+    path : str
+        The path of the API endpoint that returns the file
+    query_params : object
+        The list of query parameters for the request
+    destination : str or file object
+        A file path, or a binary file object opened for writing
+    chunkSize : int
+        The number of bytes to read and write at a time
+    progress : callable
+        Optional callback receiving `(bytes_written, total_bytes)`;
+        `total_bytes` is None when the server does not report a length
+    resume : bool
+        True to continue an existing `.part` file instead of starting
+        over; only applies when `destination` is a path
+    """
+    if not isinstance(destination, (str, os.PathLike)):
+        return _download_stream(client, path, query_params, destination, 0, chunkSize, progress)
+
+    partial = os.fspath(destination) + ".part"
+    offset = os.path.getsize(partial) if resume and os.path.exists(partial) else 0
+    with open(partial, "ab" if offset else "wb") as f:
+        size = _download_stream(client, path, query_params, f, offset, chunkSize, progress)
+    os.replace(partial, destination)
+    return size
+
+
+def _download_stream(client, path: str, query_params: object, f, offset: int, chunkSize: int, progress) -> int:
+    # Ask for the file as stored so that Content-Length matches what is written
+    headers = {"Accept": "*/*", "Accept-Encoding": "identity"}
+    if offset:
+        headers["Range"] = f"bytes={offset}-"
+    response = client.send_stream_request("GET", path, query_params, headers)
+    try:
+        if offset and response.status_code == 416:
+            # The partial file is already complete
+            if response.headers.get("Content-Range", "").rpartition("/")[2] == str(offset):
+                return offset
+        if response.status_code >= 400:
+            raise LockstepError(f"Download of {path} failed with status {response.status_code}", _error_payload(response))
+        if offset and response.status_code != 206:
+            # The server ignored the range; start again from the beginning
+            f.seek(0)
+            f.truncate()
+            offset = 0
+
+        total = _expected_length(response, offset)
+        written = offset
+        if progress:
+            progress(written, total)
+        for chunk in response.iter_content(chunkSize):
+            if not chunk:
+                continue
+            f.write(chunk)
+            written += len(chunk)
+            if progress:
+                progress(written, total)
+        if total is not None and written != total:
+            raise IOError(f"Download of {path} is incomplete: received {written} of {total} bytes")
+        return written
+    finally:
+        response.close()
+
+
+class MultipartUpload:
+    """
+    A `multipart/form-data` request body that is produced in fixed size
+    chunks while it is being sent, so that large files are never loaded
+    into memory.
+
+    Each file may be a path, a binary file object, or an iterable of
+    byte chunks. When the size of every file is known up front the body
+    reports its length and is sent with a `Content-Length` header;
+    otherwise it is sent with chunked transfer encoding.
+    """
+
+    def __init__(self, files: list[tuple], chunkSize: int = DEFAULT_CHUNK_SIZE, progress=None):
+        """
+        Construct a new multipart upload body
+
+        Parameters
+        ----------
+        files : list[tuple]
+            The files to send, as `(fieldName, fileName, source,
+            contentType)` tuples
+        chunkSize : int
+            The number of bytes to read at a time
+        progress : callable
+            Optional callback receiving `(bytes_sent, total_bytes)`;
+            `total_bytes` is None when the length is not known
+        """
+        self.boundary = uuid.uuid4().hex
+        self.contentType = f"multipart/form-data; boundary={self.boundary}"
+        self.chunkSize = chunkSize
+        self.progress = progress
+        self._parts = []
+        length = 0
+        for fieldName, fileName, source, contentType in files:
+            header = (f"--{self.boundary}\r\n"
+                      f"Content-Disposition: form-data; name=\"{fieldName}\"; filename=\"{fileName}\"\r\n"
+                      f"Content-Type: {contentType or 'application/octet-stream'}\r\n\r\n").encode("utf-8")
+            size = self._source_size(source)
+            length = None if length is None or size is None else length + len(header) + size + 2
+            self._parts.append((header, source))
+        self._trailer = f"--{self.boundary}--\r\n".encode("utf-8")
+        self.length = None if length is None else length + len(self._trailer)
+
+    @property
+    def len(self) -> int:
+        # Read by requests to choose between Content-Length and chunked encoding
+        return self.length
+
+    def __iter__(self):
+        sent = 0
+        for header, source in self._parts:
+            for chunk in itertools.chain([header], self._read(source), [b"\r\n"]):
+                sent += len(chunk)
+                if self.progress:
+                    self.progress(sent, self.length)
+                yield chunk
+        sent += len(self._trailer)
+        if self.progress:
+            self.progress(sent, self.length)
+        yield self._trailer
+
+    def _source_size(self, source) -> int:
+        if isinstance(source, (str, os.PathLike)):
+            return os.path.getsize(source)
+        if isinstance(source, (bytes, bytearray)):
+            return len(source)
+        if hasattr(source, "seek") and hasattr(source, "tell") and getattr(source, "seekable", lambda: True)():
+            position = source.tell()
+            end = source.seek(0, os.SEEK_END)
+            source.seek(position)
+            return end - position
+        return None
+
+    def _read(self, source):
+        if isinstance(source, (bytes, bytearray)):
+            yield bytes(source)
+        elif isinstance(source, (str, os.PathLike)):
+            with open(source, "rb") as f:
+                yield from iter(lambda: f.read(self.chunkSize), b"")
+        elif hasattr(source, "read"):
+            yield from iter(lambda: source.read(self.chunkSize), b"")
+        else:
+            for chunk in source:
+                if chunk:
+                    yield chunk
+
+
+def upload_file(client, path: str, query_params: object, source, fileName: str = None, fieldName: str = "files", contentType: str = None, chunkSize: int = DEFAULT_CHUNK_SIZE, progress=None) -> object:
+    """
+    Streams a single file to the API as a `multipart/form-data` POST and
+    returns the parsed JSON response.
+
+    Parameters
+    ----------
+    client : LockstepApi
+        The API client to send the request with
+    path : str
+        The path of the API endpoint that accepts the file
+    query_params : object
+        The list of query parameters for the request
+    source : str, file object or iterable
+        A file path, a binary file object, or an iterable of byte chunks
+    fileName : str
+        The file name to send; defaults to the name of `source` when it
+        is a path or a named file object
+    fieldName : str
+        The name of the form field that carries the file
+    contentType : str
+        The content type of the file
+    chunkSize : int
+        The number of bytes to read at a time
+    progress : callable
+        Optional callback receiving `(bytes_sent, total_bytes)`
+    """
+    if fileName is None:
+        name = source if isinstance(source, (str, os.PathLike)) else getattr(source, "name", None)
+        fileName = os.path.basename(os.fspath(name)) if isinstance(name, (str, os.PathLike)) else "upload"
+    body = MultipartUpload([(fieldName, fileName, source, contentType)], chunkSize, progress)
+    return client.send_upload_request("POST", path, query_params, body, body.contentType)
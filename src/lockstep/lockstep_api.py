@@ -12,9 +12,38 @@
 # @link       https://github.com/Lockstep-Network/lockstep-sdk-python
 #
 
+import cProfile
+import hashlib
+import json
+import logging
+import os
 import requests
+import time
 import urllib.parse
 import platform
+from lockstep.metrics import normalize_path
+from lockstep.error_result import error_status
+from lockstep.rate_limiter import retry_after
+from lockstep.serialization import encode_model, is_tracked, patch_body, start_tracking
+from lockstep.tracing import NOOP_TRACER
+from lockstep.transports import RequestsTransport
+
+
+def _restart_tracking(instance: object, result: object) -> object:
+    # After a successful PATCH the model's current values are the new baseline
+    if error_status(result) is None:
+        start_tracking(instance)
+    return result
+
+
+def server_url(env: str) -> str:
+    """Returns the base URL of a Lockstep Platform environment: "prd", "sbx" or a full URL"""
+    if env == "sbx":
+        return "https://api.sbx.lockstep.io/"
+    elif env == "prd":
+        return "https://api.lockstep.io/"
+    return env
+
 
 """Lockstep Platform API Client object
 
@@ -37,6 +66,23 @@ class LockstepApi:
             name will be recorded alongside API calls so that you can identify
             the source of errors. 
         """
+        self._create_clients()
+        self.serverUrl = server_url(env)
+        self.sdkName = "Python"
+        self.sdkVersion = "2022.4.32.0"
+        self.machineName = platform.uname().node
+        self.applicationName = appname
+        self.metrics = None
+        self.tracer = NOOP_TRACER
+        self.transport = self._default_transport()
+        self.rateLimiter = None
+        self.resultCache = None
+        self.slowRequestThreshold = None
+        self.slowRequestLogger = None
+        self.profileDirectory = None
+
+
+    def _create_clients(self):
         from lockstep.clients.activities_client import ActivitiesClient
         from lockstep.clients.apikeys_client import ApiKeysClient
         from lockstep.clients.appenrollments_client import AppEnrollmentsClient
@@ -89,17 +135,6 @@ class LockstepApi:
         self.sync = SyncClient(self)
         self.userAccounts = UserAccountsClient(self)
         self.userRoles = UserRolesClient(self)
-        if env == "sbx":
-            self.serverUrl = "https://api.sbx.lockstep.io/"
-        elif env == "prd":
-            self.serverUrl = "https://api.lockstep.io/"
-        else:
-            self.serverUrl = env
-        self.sdkName = "Python"
-        self.sdkVersion = "2022.4.32.0"
-        self.machineName = platform.uname().node
-        self.applicationName = appname
-
     
     def with_api_key(self, apiKey: str):
         """Configure this API client to use API Key authentication
@@ -127,6 +162,130 @@ class LockstepApi:
         self.apiKey = None
         self.bearerToken = bearerToken
     
+    def enable_metrics(self, recorder=None):
+        """Record per-endpoint request metrics for this API client
+
+        Returns the `MetricsRecorder` in use; read it with `snapshot()` or
+        `to_prometheus()`. Metrics are not collected until this is called.
+
+        Parameters
+        ----------
+        recorder : MetricsRecorder
+            An existing recorder to share between clients, or None to
+            create a new one
+        """
+        from lockstep.metrics import MetricsRecorder
+        self.metrics = recorder or MetricsRecorder()
+        return self.metrics
+
+    def disable_metrics(self):
+        """Stop recording request metrics for this API client"""
+        self.metrics = None
+
+    def with_tracer(self, tracer):
+        """Configure this API client to report tracing spans
+
+        Parameters
+        ----------
+        tracer : Tracer
+            The tracer to report spans to, such as an
+            `OpenTelemetryTracer`, or None to stop tracing
+        """
+        self.tracer = tracer or NOOP_TRACER
+
+    def with_transport(self, transport):
+        """Configure the transport this API client sends requests through
+
+        The default is a `RequestsTransport`, which pools connections.
+        Use a `FakeTransport` to answer requests in-process, or a
+        `CassetteTransport` to record and replay responses offline.
+
+        Parameters
+        ----------
+        transport : Transport
+            The transport to use, or None to restore the default
+        """
+        self.transport = transport or self._default_transport()
+
+    def _default_transport(self):
+        return RequestsTransport()
+
+    def with_rate_limiter(self, rateLimiter):
+        """Limit the rate of requests sent by this API client
+
+        Every request waits for the limiter before it is sent, and a 429
+        response with a `Retry-After` header pauses the limiter for every
+        caller. Share one `RateLimiter` between clients that use the same
+        credentials.
+
+        Parameters
+        ----------
+        rateLimiter : RateLimiter
+            The limiter to use, or None to stop limiting requests
+        """
+        self.rateLimiter = rateLimiter
+
+    def with_result_cache(self, resultCache):
+        """Cache slowly changing results, such as reports, for a short time
+
+        Helpers that support caching, such as `reports.dashboard()`, serve
+        results from the cache and refresh them in the background once
+        they expire. One cache may be shared by clients with different
+        credentials.
+
+        Parameters
+        ----------
+        resultCache : ResultCache
+            The cache to use, or None to stop caching
+        """
+        self.resultCache = resultCache
+
+    def with_http2(self, maxConnections: int = 4, maxStreamsPerConnection: int = 100, priorKnowledge: bool = False):
+        """Send requests over HTTP/2 so that concurrent calls share a few connections
+
+        Requires the `httpx` package, and `h2` for HTTP/2 itself; without
+        `h2`, or when the server does not support HTTP/2, requests are
+        sent over HTTP/1.1 with httpx.
+
+        Parameters
+        ----------
+        maxConnections : int
+            The maximum number of connections to the server
+        maxStreamsPerConnection : int
+            The maximum number of concurrent requests per connection
+        priorKnowledge : bool
+            True to speak HTTP/2 without negotiation, for servers on
+            cleartext `http://` URLs
+        """
+        from lockstep.transports import HttpxTransport
+        self.transport = HttpxTransport(True, maxConnections, maxStreamsPerConnection, priorKnowledge)
+
+    def with_slow_request_log(self, threshold: float, profileDirectory: str = None, logger: logging.Logger = None):
+        """Log API calls that take longer than a threshold
+
+        Each slow call is logged as a warning with its method, path
+        template, a hash of its query parameters, the time spent waiting
+        for the response, downloading the body and parsing its JSON, and
+        the response size. Parameter values are never logged. Calls
+        return JSON dictionaries, so decoding them into models with a
+        `ModelDecoder` happens after the call and is not included.
+
+        Parameters
+        ----------
+        threshold : float
+            The number of seconds above which a call is logged, or None
+            to stop logging slow calls
+        profileDirectory : str
+            If set, the JSON parse of each slow response is run again
+            under `cProfile` and the statistics are written to this
+            directory
+        logger : logging.Logger
+            The logger to write to; defaults to the `lockstep` logger
+        """
+        self.slowRequestThreshold = threshold
+        self.profileDirectory = profileDirectory
+        self.slowRequestLogger = logger or logging.getLogger("lockstep")
+
     def send_request(self, method: str, path: str, body: object, query_params: object) -> LockstepResponse:
         """Send a request and parse the result
         
@@ -138,15 +297,198 @@ class LockstepApi:
             The path of the API endpoint for this request
         body : object
             For POST, PUT, or PATCH, represents the body of the request. For other
-            requests, this value should be nil.
+            requests, this value should be nil. A PATCH body that is a model
+            decoded with change tracking is reduced to its modified fields.
         query_params : object
             The list of query parameters for the request
         """
+        if method == "PATCH" and is_tracked(body):
+            return self._send_tracked_patch(path, body, query_params)
+        headers = self._build_headers()
+        data, query_params = self._encode_body(body, query_params, headers)
+        if not self.tracer.enabled and self.slowRequestThreshold is None:
+            return self._execute(method, path, query_params, headers, data).json()
+        attributes = {"http.method": method, "lockstep.endpoint": normalize_path(path)}
+        if isinstance(body, list):
+            attributes["lockstep.records"] = len(body)
+        with self.tracer.start_span("lockstep.request", attributes):
+            start = time.perf_counter()
+            response = self._execute(method, path, query_params, headers, data)
+            received = time.perf_counter()
+            with self.tracer.start_span("lockstep.decode"):
+                result = response.json()
+        if self.slowRequestThreshold is not None:
+            self._check_slow_request(method, path, query_params, response, start, received, time.perf_counter())
+        return result
+
+    def send_stream_request(self, method: str, path: str, query_params: object, headers: dict = None) -> requests.Response:
+        """Send a request and return the raw response without reading the body
+
+        Use this for endpoints that return files rather than JSON. The
+        caller is responsible for closing the response.
+
+        Parameters
+        ----------
+        method : str
+            The HTTP method for this request
+        path : str
+            The path of the API endpoint for this request
+        query_params : object
+            The list of query parameters for the request
+        headers : dict
+            Additional headers to send, such as `Range`
+        """
+        request_headers = self._build_headers()
+        if headers:
+            request_headers.update(headers)
+        return self._execute(method, path, query_params, request_headers, stream=True)
+
+    def send_upload_request(self, method: str, path: str, query_params: object, body: object, contentType: str) -> LockstepResponse:
+        """Send a request with a streamed body and parse the result
+
+        Parameters
+        ----------
+        method : str
+            The HTTP method for this request
+        path : str
+            The path of the API endpoint for this request
+        query_params : object
+            The list of query parameters for the request
+        body : object
+            The request body; an iterable of byte chunks is streamed
+            without being loaded into memory
+        contentType : str
+            The content type of the request body
+        """
+        headers = self._build_headers()
+        headers["Content-Type"] = contentType
+        start = time.perf_counter()
+        response = self._execute(method, path, query_params, headers, data=body)
+        received = time.perf_counter()
+        result = response.json()
+        if self.slowRequestThreshold is not None:
+            self._check_slow_request(method, path, query_params, response, start, received, time.perf_counter())
+        return result
+
+    def _execute(self, method: str, path: str, query_params: object, headers: dict, data: object = None, stream: bool = False) -> requests.Response:
+        url = self._build_url(path, query_params)
+        if self.rateLimiter is not None:
+            self.rateLimiter.acquire()
+        return self._transmit(method, path, url, headers, data, stream)
+
+    def _transmit(self, method: str, path: str, url: str, headers: dict, data: object, stream: bool) -> requests.Response:
+        if self.metrics is None and not self.tracer.enabled:
+            response = self.transport.request(method, url, headers, data, stream)
+            if response.status_code == 429:
+                self._throttled(response)
+            return response
+
+        tracer = self.tracer
+        with tracer.start_span("lockstep.http", {"http.method": method, "http.url": url, "lockstep.endpoint": normalize_path(path)}) as span:
+            start = time.perf_counter()
+            with tracer.start_span("lockstep.http.ttfb"):
+                response = self.transport.request(method, url, headers, data, True)
+            try:
+                if stream:
+                    responseBytes = int(response.headers.get("Content-Length") or 0)
+                else:
+                    with tracer.start_span("lockstep.http.body"):
+                        responseBytes = len(response.content)
+                    # The body has been read, so its connection can be reused
+                    response.close()
+            except BaseException:
+                response.close()
+                raise
+            elapsed = time.perf_counter() - start
+            requestBytes = int(response.request.headers.get("Content-Length") or 0)
+            span.set_attribute("http.status_code", response.status_code)
+            span.set_attribute("http.response_content_length", responseBytes)
+        if self.metrics is not None:
+            self.metrics.record_request(method, path, response.status_code, elapsed, requestBytes, responseBytes)
+        if response.status_code == 429:
+            self._throttled(response)
+        return response
+
+    def _throttled(self, response: requests.Response):
+        # Hold back every caller sharing the rate limiter for as long as the server asked
+        seconds = retry_after(response.headers)
+        if self.rateLimiter is not None and seconds:
+            self.rateLimiter.pause(seconds)
+
+    def _send_tracked_patch(self, path: str, instance: object, query_params: object):
+        # A model decoded with change tracking sends only its modified fields;
+        # when nothing changed no request is made and the model is returned as is
+        changes = patch_body(instance)
+        if not changes:
+            return self._resolved(encode_model(instance))
+        return self._then(self.send_request("PATCH", path, changes, query_params), lambda result: _restart_tracking(instance, result))
+
+    def _resolved(self, value: object):
+        # Returns a value the way `send_request` returns results; overridden by AsyncLockstepApi
+        return value
+
+    def _then(self, result: object, callback):
+        # Applies `callback` to a result returned by `send_request`; overridden by AsyncLockstepApi
+        return callback(result)
+
+    def _check_slow_request(self, method: str, path: str, query_params: object, response: requests.Response, start: float, received: float, decoded: float):
+        total = decoded - start
+        if total < self.slowRequestThreshold:
+            return
+        # `elapsed` covers sending the request until the response headers were parsed
+        ttfb = min(response.elapsed.total_seconds(), received - start)
+        endpoint = normalize_path(path)
+        paramsHash = hashlib.sha1(urllib.parse.urlencode(sorted((query_params or {}).items())).encode("utf-8")).hexdigest()[:12]
+        details = {
+            "method": method,
+            "endpoint": endpoint,
+            "paramsHash": paramsHash,
+            "status": response.status_code,
+            "responseBytes": len(response.content),
+            "totalSeconds": round(total, 4),
+            "ttfbSeconds": round(ttfb, 4),
+            "bodySeconds": round(received - start - ttfb, 4),
+            "decodeSeconds": round(decoded - received, 4),
+        }
+        if self.profileDirectory:
+            details["profile"] = self._profile_decode(response, method, endpoint, paramsHash)
+        self.slowRequestLogger.warning(
+            "Slow Lockstep API call %s %s params=%s status=%s bytes=%s total=%.3fs ttfb=%.3fs body=%.3fs decode=%.3fs",
+            method, endpoint, paramsHash, details["status"], details["responseBytes"], total,
+            details["ttfbSeconds"], details["bodySeconds"], details["decodeSeconds"], extra={"lockstep": details})
+
+    def _profile_decode(self, response: requests.Response, method: str, endpoint: str, paramsHash: str) -> str:
+        os.makedirs(self.profileDirectory, exist_ok=True)
+        name = "-".join(part for part in endpoint.replace("{id}", "id").split("/") if part)
+        filename = os.path.join(self.profileDirectory, f"{time.strftime('%Y%m%d-%H%M%S')}-{method}-{name}-{paramsHash}.prof")
+        profile = cProfile.Profile()
+        profile.runcall(response.json)
+        profile.dump_stats(filename)
+        return filename
+
+    def _cache_scope(self) -> str:
+        # Cached results are only shared between clients with the same credentials
+        credential = getattr(self, "apiKey", None) or getattr(self, "bearerToken", None) or ""
+        return hashlib.sha1(credential.encode("utf-8")).hexdigest()
+
+    def _build_url(self, path: str, query_params: object) -> str:
+        # Optional parameters that were not supplied are left out rather than sent as "None"
+        if isinstance(query_params, dict):
+            query_params = {name: value for name, value in query_params.items() if value is not None}
         if query_params:
-            url = urllib.parse.urljoin(self.serverUrl, path) + "?" + urllib.parse.urlencode(query_params)
-        else:
-            url = urllib.parse.urljoin(self.serverUrl, path)
-        
+            return urllib.parse.urljoin(self.serverUrl, path) + "?" + urllib.parse.urlencode(query_params)
+        return urllib.parse.urljoin(self.serverUrl, path)
+
+    def _encode_body(self, body: object, query_params: object, headers: dict) -> tuple:
+        if body is None:
+            return None, query_params
+        # The body is sent as JSON rather than as a query parameter
+        headers["Content-Type"] = "application/json"
+        if query_params and "body" in query_params:
+            query_params = {k: v for k, v in query_params.items() if k != "body"}
+        return json.dumps(body, default=encode_model).encode("utf-8"), query_params
+
+    def _build_headers(self) -> dict:
         headers = {"Accept": "application/json",
                    "SdkName": self.sdkName,
                    "SdkVersion": self.sdkVersion,
@@ -156,7 +498,4 @@ class LockstepApi:
             headers["Api-Key"] = self.apiKey
         elif self.bearerToken:
             headers["Authorization"] = "Bearer " + self.bearerToken
-    
-        response = requests.request(method, url, headers=headers)
-        return response.json()
-        
+        return headers
@@ -0,0 +1,209 @@
+#
+# Lockstep Software Development Kit for Python
+#
+# (c) 2021-2022 Lockstep, Inc.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+#
+# @author     Ted Spence <tspence@lockstep.io>
+# @copyright  2021-2022 Lockstep, Inc.
+# @version    2022.4
+# @link       https://github.com/Lockstep-Network/lockstep-sdk-python
+#
+
+import bisect
+import functools
+import re
+import threading
+
+"""
+Per-endpoint request metrics for the Lockstep Platform API client
+"""
+
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_ID_SEGMENT = re.compile(r"^(\d+|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12})$")
+
+
+@functools.lru_cache(maxsize=4096)
+def normalize_path(path: str) -> str:
+    """
+    Replaces the identifiers in a request path with a placeholder, so
+    that `/api/v1/Invoices/7f0c...` is reported as
+    `/api/v1/Invoices/{id}`.
+
+    Parameters
+    ----------
+    path : str
+        The path of the API endpoint
+    """
+    return "/".join("{id}" if _ID_SEGMENT.match(segment) else segment for segment in path.split("/"))
+
+
+class EndpointMetrics:
+    """
+    Counters and a latency histogram for a single endpoint template
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.latencySum = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.requestBytes = 0
+        self.responseBytes = 0
+        self.statusCodes = {}
+        self.retries = 0
+        self.cacheHits = 0
+
+    def observe(self, status: int, seconds: float, requestBytes: int, responseBytes: int):
+        self.count += 1
+        self.latencySum += seconds
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.requestBytes += requestBytes
+        self.responseBytes += responseBytes
+        self.statusCodes[status] = self.statusCodes.get(status, 0) + 1
+
+    def percentile(self, p: float) -> float:
+        """
+        Estimates a latency percentile in seconds from the histogram by
+        interpolating within the bucket that contains it.
+
+        Parameters
+        ----------
+        p : float
+            The percentile to estimate, between 0 and 100
+        """
+        if not self.count:
+            return None
+        rank = self.count * p / 100.0
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            if n and seen + n >= rank:
+                lower = LATENCY_BUCKETS[i - 1] if i > 0 else 0.0
+                upper = LATENCY_BUCKETS[i] if i < len(LATENCY_BUCKETS) else LATENCY_BUCKETS[-1]
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return LATENCY_BUCKETS[-1]
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "latencySum": self.latencySum,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "buckets": dict(zip([*LATENCY_BUCKETS, "+Inf"], self.buckets)),
+            "requestBytes": self.requestBytes,
+            "responseBytes": self.responseBytes,
+            "statusCodes": dict(self.statusCodes),
+            "retries": self.retries,
+            "cacheHits": self.cacheHits,
+        }
+
+
+class MetricsRecorder:
+    """
+    Collects request counts, latency histograms, byte counts, status
+    codes, retries and cache hits per (method, endpoint template).
+
+    Enable it with `LockstepApi.enable_metrics()`; while no recorder is
+    attached the client does not measure anything.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def _endpoint(self, method: str, path: str) -> EndpointMetrics:
+        key = (method, normalize_path(path))
+        endpoint = self._endpoints.get(key)
+        if endpoint is None:
+            endpoint = self._endpoints.setdefault(key, EndpointMetrics())
+        return endpoint
+
+    def record_request(self, method: str, path: str, status: int, seconds: float, requestBytes: int = 0, responseBytes: int = 0):
+        """
+        Records a completed HTTP request.
+
+        Parameters
+        ----------
+        method : str
+            The HTTP method of the request
+        path : str
+            The path of the API endpoint; identifiers are normalized
+        status : int
+            The HTTP status code of the response
+        seconds : float
+            The time taken by the request
+        requestBytes : int
+            The size of the request body
+        responseBytes : int
+            The size of the response body
+        """
+        with self._lock:
+            self._endpoint(method, path).observe(status, seconds, requestBytes, responseBytes)
+
+    def record_retry(self, method: str, path: str):
+        """Records that a request to an endpoint is being retried"""
+        with self._lock:
+            self._endpoint(method, path).retries += 1
+
+    def record_cache_hit(self, method: str, path: str):
+        """Records that a request to an endpoint was served from a cache"""
+        with self._lock:
+            self._endpoint(method, path).cacheHits += 1
+
+    def snapshot(self) -> dict:
+        """
+        Returns the current metrics as a dictionary keyed by
+        `"METHOD /endpoint/template"`.
+        """
+        with self._lock:
+            return {f"{method} {template}": endpoint.to_dict() for (method, template), endpoint in sorted(self._endpoints.items())}
+
+    def reset(self):
+        """Discards all recorded metrics"""
+        with self._lock:
+            self._endpoints.clear()
+
+    def to_prometheus(self, prefix: str = "lockstep_client") -> str:
+        """
+        Formats the current metrics in the Prometheus text exposition
+        format.
+
+        Parameters
+        ----------
+        prefix : str
+            The prefix for every metric name
+        """
+        with self._lock:
+            items = sorted(self._endpoints.items())
+            lines = [
+                f"# HELP {prefix}_request_duration_seconds Lockstep API request latency",
+                f"# TYPE {prefix}_request_duration_seconds histogram",
+            ]
+            for (method, template), e in items:
+                labels = f'method="{method}",endpoint="{template}"'
+                cumulative = 0
+                for bound, n in zip([*LATENCY_BUCKETS, "+Inf"], e.buckets):
+                    cumulative += n
+                    lines.append(f'{prefix}_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f"{prefix}_request_duration_seconds_sum{{{labels}}} {e.latencySum}")
+                lines.append(f"{prefix}_request_duration_seconds_count{{{labels}}} {e.count}")
+            for name, help, attribute in (
+                    ("request_bytes_total", "Bytes sent in request bodies", "requestBytes"),
+                    ("response_bytes_total", "Bytes received in response bodies", "responseBytes"),
+                    ("retries_total", "Requests retried", "retries"),
+                    ("cache_hits_total", "Requests served from a cache", "cacheHits")):
+                lines.append(f"# HELP {prefix}_{name} {help}")
+                lines.append(f"# TYPE {prefix}_{name} counter")
+                for (method, template), e in items:
+                    lines.append(f'{prefix}_{name}{{method="{method}",endpoint="{template}"}} {getattr(e, attribute)}')
+            lines.append(f"# HELP {prefix}_responses_total Responses by status code")
+            lines.append(f"# TYPE {prefix}_responses_total counter")
+            for (method, template), e in items:
+                for status, n in sorted(e.statusCodes.items()):
+                    lines.append(f'{prefix}_responses_total{{method="{method}",endpoint="{template}",status="{status}"}} {n}')
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,209 @@
+#
+# Lockstep Software Development Kit for Python
+#
+# (c) 2021-2022 Lockstep, Inc.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+#
+# @author     Ted Spence <tspence@lockstep.io>
+# @copyright  2021-2022 Lockstep, Inc.
+# @version    2022.4
+# @link       https://github.com/Lockstep-Network/lockstep-sdk-python
+#
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from lockstep.error_result import LockstepError
+from lockstep.serialization import ModelDecoder, primary_key
+from lockstep.tracing import propagate, tracer_for
+
+"""
+Helpers for walking every page of a `query_*` method
+"""
+
+
+def scan_pages(query, filter: str, include: str, order: str, pageSize: int = 200):
+    """
+    Yields each page returned by a `query_*` method, starting at page 0
+    and stopping after the last page.
+
+    Parameters
+    ----------
+    query : callable
+        A bound `query_*` method taking filter, include, order, pageSize
+        and pageNumber
+    filter : str
+        The filter for this query. See [Searchlight Query
+        Language](https://developer.lockstep.io/docs/querying-with-searchlight)
+    include : str
+        To fetch additional data on each object, specify the list of
+        elements to retrieve
+    order : str
+        The sort order for this query; a stable order is recommended so
+        that records do not move between pages during the scan
+    pageSize : int
+        The page size for results
+    """
+    pageNumber = 0
+    fetched = 0
+    # The span is current only while a page is fetched, not while the caller handles it
+    with tracer_for(query).start_span("lockstep.scan", {"lockstep.query": getattr(query, "__name__", str(query))}, current=False) as span:
+        while True:
+            with span.activate():
+                page = query(filter, include, order, pageSize, pageNumber)
+            if not isinstance(page, dict) or "records" not in page:
+                raise LockstepError(f"Query failed on page {pageNumber}", page)
+            records = page["records"] or []
+            fetched += len(records)
+            span.set_attribute("lockstep.pages", pageNumber + 1)
+            span.set_attribute("lockstep.records", fetched)
+            yield page
+            if _is_last_page(page, pageNumber, pageSize):
+                return
+            pageNumber += 1
+
+
+def _is_last_page(page: dict, pageNumber: int, pageSize: int) -> bool:
+    records = page["records"] or []
+    total = page.get("totalCount")
+    return len(records) < pageSize or (total is not None and pageNumber * pageSize + len(records) >= total)
+
+
+def stable_order(model: type, order: str, maxWorkers: int) -> str:
+    """
+    Returns the sort order for a scan: `order` when given, otherwise the
+    primary key of `model` when pages are fetched in parallel. Raises a
+    ValueError for a parallel scan of a model without a primary key and
+    no order, since offset pages fetched at the same time without a
+    stable order can repeat or skip records.
+
+    Parameters
+    ----------
+    model : type
+        The dataclass from `lockstep.models` returned by the query
+    order : str
+        The sort order requested by the caller, or None
+    maxWorkers : int
+        The maximum number of pages to fetch at the same time
+    """
+    if order or maxWorkers <= 1:
+        return order
+    key = primary_key(model)
+    if key is None:
+        raise ValueError(f"Fetching {model.__name__} pages in parallel requires an order; pass `order` or set `maxWorkers=1`")
+    return key
+
+
+def scan_pages_parallel(query, filter: str, include: str, order: str, pageSize: int = 200, maxWorkers: int = 4):
+    """
+    Yields each page returned by a `query_*` method like `scan_pages`,
+    but fetches up to `maxWorkers` pages at the same time. Pages are
+    still yielded in page order, and at most `maxWorkers` pages are held
+    in memory.
+
+    The first page is fetched on its own; when it reports a
+    `totalCount`, only the pages that exist are requested, otherwise
+    pages are requested ahead until a short page arrives.
+
+    Parameters
+    ----------
+    query : callable
+        A bound `query_*` method taking filter, include, order, pageSize
+        and pageNumber
+    filter : str
+        The filter for this query. See [Searchlight Query
+        Language](https://developer.lockstep.io/docs/querying-with-searchlight)
+    include : str
+        To fetch additional data on each object, specify the list of
+        elements to retrieve
+    order : str
+        The sort order for this query; a stable order is required so
+        that records do not move between pages during the scan
+    pageSize : int
+        The page size for results
+    maxWorkers : int
+        The maximum number of pages to fetch at the same time
+    """
+    def fetch(pageNumber: int) -> dict:
+        page = query(filter, include, order, pageSize, pageNumber)
+        if not isinstance(page, dict) or "records" not in page:
+            raise LockstepError(f"Query failed on page {pageNumber}", page)
+        return page
+
+    fetched = 0
+    attributes = {"lockstep.query": getattr(query, "__name__", str(query)), "lockstep.workers": maxWorkers}
+    with tracer_for(query).start_span("lockstep.scan", attributes, current=False) as span:
+        with span.activate():
+            page = fetch(0)
+            # Worker threads fetch pages in the context of the scan span
+            fetchInScan = propagate(fetch)
+        fetched += len(page["records"] or [])
+        span.set_attribute("lockstep.pages", 1)
+        span.set_attribute("lockstep.records", fetched)
+        yield page
+        if _is_last_page(page, 0, pageSize):
+            return
+        total = page.get("totalCount")
+        lastPage = (total - 1) // pageSize if total is not None else None
+        with ThreadPoolExecutor(max_workers=maxWorkers) as executor:
+            pending = deque()
+            nextPage = 1
+            try:
+                while True:
+                    while len(pending) < maxWorkers and (lastPage is None or nextPage <= lastPage):
+                        pending.append((nextPage, executor.submit(fetchInScan, nextPage)))
+                        nextPage += 1
+                    if not pending:
+                        return
+                    pageNumber, future = pending.popleft()
+                    page = future.result()
+                    fetched += len(page["records"] or [])
+                    span.set_attribute("lockstep.pages", pageNumber + 1)
+                    span.set_attribute("lockstep.records", fetched)
+                    yield page
+                    if _is_last_page(page, pageNumber, pageSize):
+                        return
+            finally:
+                # Pages requested beyond the end are discarded
+                for _, future in pending:
+                    future.cancel()
+
+
+def scan(query, filter: str, include: str, order: str, pageSize: int = 200, model: type = None, decoder: ModelDecoder = None):
+    """
+    Yields every record matched by a `query_*` method across all pages.
+
+    When `model` is provided each record is decoded into that dataclass
+    using `decoder`, which lives for the whole scan; pass a
+    `ModelDecoder(identityMap=True)` to share nested company and contact
+    objects between records.
+
+    Parameters
+    ----------
+    query : callable
+        A bound `query_*` method taking filter, include, order, pageSize
+        and pageNumber
+    filter : str
+        The filter for this query. See [Searchlight Query
+        Language](https://developer.lockstep.io/docs/querying-with-searchlight)
+    include : str
+        To fetch additional data on each object, specify the list of
+        elements to retrieve
+    order : str
+        The sort order for this query
+    pageSize : int
+        The page size for results
+    model : type
+        Optional dataclass from `lockstep.models` to decode records into
+    decoder : ModelDecoder
+        Optional decoder to use when `model` is provided
+    """
+    if model is not None and decoder is None:
+        decoder = ModelDecoder()
+    for page in scan_pages(query, filter, include, order, pageSize):
+        records = page["records"] or []
+        if model is None:
+            yield from records
+        else:
+            yield from decoder.decode_records(model, records)
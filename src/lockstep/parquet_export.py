@@ -0,0 +1,345 @@
+#
+# Lockstep Software Development Kit for Python
+#
+# (c) 2021-2022 Lockstep, Inc.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+#
+# @author     Ted Spence <tspence@lockstep.io>
+# @copyright  2021-2022 Lockstep, Inc.
+# @version    2022.4
+# @link       https://github.com/Lockstep-Network/lockstep-sdk-python
+#
+
+import json
+import os
+import time
+import typing
+from dataclasses import dataclass, field
+from lockstep.columnar import ColumnarBatch
+from lockstep.pagination import scan_pages
+from lockstep.serialization import nested_list_fields, primary_key, scalar_fields
+from lockstep.tracing import tracer_for
+
+"""
+Streams query results into Apache Arrow record batches and Parquet
+files. Requires the `pyarrow` package.
+"""
+
+DEFAULT_ROW_GROUP_SIZE = 50000
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Parquet and Arrow export requires the pyarrow package") from None
+    return pyarrow
+
+
+def _arrow_type(pa, hint: object):
+    if hint is float:
+        return pa.float64()
+    if hint is int:
+        return pa.int64()
+    if hint is bool:
+        return pa.bool_()
+    if hint == list[str]:
+        return pa.list_(pa.string())
+    return pa.string()
+
+
+def _is_json_field(hint: object) -> bool:
+    """Returns whether a field of this type is written as a JSON string"""
+    return hint is not None and hint not in (str, float, int, bool) and hint != list[str]
+
+
+def arrow_schema(model: type, columns: list[str] = None):
+    """
+    Returns the Arrow schema for the plain-value fields of a model:
+    `float` fields become float64, `int` fields int64, `bool` fields
+    bool, `list[str]` fields lists of strings and everything else
+    string. Fields of other types, such as `object`, hold their values
+    encoded as JSON. Every column is nullable.
+
+    Parameters
+    ----------
+    model : type
+        A dataclass from `lockstep.models`
+    columns : list[str]
+        The fields to include, in order; defaults to every plain-value
+        field. Names that are not fields of the model are strings.
+    """
+    pa = _pyarrow()
+    hints = typing.get_type_hints(model)
+    names = columns if columns is not None else scalar_fields(model)
+    return pa.schema([pa.field(name, _arrow_type(pa, hints.get(name))) for name in names])
+
+
+def to_record_batch(batch: ColumnarBatch, schema):
+    """
+    Converts a `ColumnarBatch` into an Arrow record batch with the given
+    schema, reading float and categorical columns straight from their
+    buffers.
+
+    Parameters
+    ----------
+    batch : ColumnarBatch
+        The records to convert
+    schema : pyarrow.Schema
+        The schema from `arrow_schema`
+    """
+    pa = _pyarrow()
+    hints = typing.get_type_hints(batch.model)
+    arrays = []
+    for target in schema:
+        name = target.name
+        kind = batch.kinds[name]
+        if kind == "float":
+            array = pa.array(batch.column(name), type=pa.float64(), from_pandas=True)
+        elif kind == "category":
+            codes = pa.array(batch.column(name), type=pa.int32())
+            indices = pa.compute.if_else(pa.compute.equal(codes, -1), pa.scalar(None, pa.int32()), codes)
+            dictionary = pa.array(batch.categories(name), type=pa.string())
+            array = pa.DictionaryArray.from_arrays(indices, dictionary).cast(target.type)
+        elif _is_json_field(hints.get(name)):
+            array = pa.array([None if value is None else json.dumps(value) for value in batch.values(name)], type=target.type)
+        else:
+            array = pa.array(batch.values(name), type=target.type)
+        arrays.append(array)
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+@dataclass
+class ParquetExportReport:
+    """
+    Summarizes a Parquet export. `rows` and `rowGroups` are keyed by
+    table, where the parent table is `""` and child tables are named
+    after the nested field, and `files` lists the files written.
+    """
+
+    rows: dict = field(default_factory=dict)
+    rowGroups: dict = field(default_factory=dict)
+    files: list[str] = field(default_factory=list)
+    seconds: float = 0.0
+
+
+class _Table:
+    """
+    A Parquet file that is written one row group at a time.
+    """
+
+    def __init__(self, path: str, model: type, columns: list[str], compression: str):
+        self.path = path
+        self.model = model
+        self.columns = columns
+        self.compression = compression
+        self.schema = arrow_schema(model, columns)
+        self.batch = ColumnarBatch(model, columns)
+        self.writer = None
+        self.rows = 0
+        self.rowGroups = 0
+
+    def flush(self):
+        if not len(self.batch):
+            return
+        pa = _pyarrow()
+        if self.writer is None:
+            self.writer = pa.parquet.ParquetWriter(self.path, self.schema, compression=self.compression)
+        self.writer.write_batch(to_record_batch(self.batch, self.schema))
+        self.rows += len(self.batch)
+        self.rowGroups += 1
+        self.batch = ColumnarBatch(self.model, self.columns)
+
+    def close(self):
+        self.flush()
+        if self.writer is not None:
+            self.writer.close()
+
+
+class ParquetExporter:
+    """
+    Writes records of one model to a Parquet file as they arrive, one
+    row group at a time, so memory stays bounded by a single row group.
+
+    Nested lists such as the `lines` and `payments` of an invoice are
+    flattened into child tables written next to the main file, for
+    example `invoices.lines.parquet`. Each child row carries the primary
+    key of its parent, such as `invoiceId`. A child file is only created
+    once it has rows.
+
+        with ParquetExporter("invoices.parquet", InvoiceModel) as exporter:
+            for page in scan_pages(client.invoices.query_invoices, None, "Lines,Payments", "invoiceId", 500):
+                exporter.write(page["records"])
+    """
+
+    def __init__(self, path: str, model: type, children: list[str] = None, rowGroupSize: int = DEFAULT_ROW_GROUP_SIZE, compression: str = "snappy"):
+        """
+        Construct a new Parquet exporter
+
+        Parameters
+        ----------
+        path : str
+            The Parquet file to write
+        model : type
+            The dataclass from `lockstep.models` describing the records
+        children : list[str]
+            The nested list fields to flatten into child tables;
+            defaults to every nested list field of the model
+        rowGroupSize : int
+            The number of rows to buffer before writing a row group
+        compression : str
+            The Parquet compression codec
+        """
+        _pyarrow()
+        self.path = path
+        self.model = model
+        self.rowGroupSize = rowGroupSize
+        self.compression = compression
+        self.parentKey = primary_key(model)
+        self.report = ParquetExportReport()
+        self._start = time.perf_counter()
+        self._main = _Table(path, model, scalar_fields(model), compression)
+        self._children = {}
+        nested = nested_list_fields(model)
+        for name in (children if children is not None else nested):
+            if name not in nested:
+                raise ValueError(f"{model.__name__} has no nested list field named {name}")
+            childColumns = scalar_fields(nested[name])
+            if self.parentKey and self.parentKey not in childColumns:
+                childColumns.insert(0, self.parentKey)
+            stem, extension = os.path.splitext(path)
+            self._children[name] = _Table(f"{stem}.{name}{extension or '.parquet'}", nested[name], childColumns, compression)
+
+    def write(self, records: list[dict]):
+        """
+        Adds records, such as one page of query results. A row group is
+        written whenever `rowGroupSize` rows have been buffered.
+
+        Parameters
+        ----------
+        records : list[dict]
+            The JSON dictionaries returned by the API
+        """
+        self._append(self._main, records)
+        for name, table in self._children.items():
+            rows = []
+            for record in records:
+                items = record.get(name)
+                if not items:
+                    continue
+                parent = record.get(self.parentKey)
+                for item in items:
+                    if parent is not None and item.get(self.parentKey) is None:
+                        item = dict(item)
+                        item[self.parentKey] = parent
+                    rows.append(item)
+            if rows:
+                self._append(table, rows)
+
+    def _append(self, table: _Table, records: list[dict]):
+        table.batch.extend(records)
+        if len(table.batch) >= self.rowGroupSize:
+            table.flush()
+
+    def close(self) -> ParquetExportReport:
+        """
+        Writes the remaining rows, closes every file and returns the
+        report.
+        """
+        for name, table in [("", self._main)] + list(self._children.items()):
+            table.close()
+            self.report.rows[name] = table.rows
+            self.report.rowGroups[name] = table.rowGroups
+            if table.writer is not None:
+                self.report.files.append(table.path)
+        self.report.seconds = time.perf_counter() - self._start
+        return self.report
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def export_parquet(query, path: str, model: type, filter: str = None, include: str = None, order: str = None, pageSize: int = 500,
+                   children: list[str] = None, rowGroupSize: int = DEFAULT_ROW_GROUP_SIZE, compression: str = "snappy") -> ParquetExportReport:
+    """
+    Pages through a `query_*` method and writes every record to Parquet,
+    for example `export_parquet(client.invoices.query_invoices,
+    "invoices.parquet", InvoiceModel, include="Lines,Payments")` or
+    `export_parquet(client.invoices.query_invoice_summary_view,
+    "summary.parquet", InvoiceSummaryModel)`.
+
+    Parameters
+    ----------
+    query : callable
+        A bound `query_*` method taking filter, include, order, pageSize
+        and pageNumber
+    path : str
+        The Parquet file to write
+    model : type
+        The dataclass from `lockstep.models` returned by the query
+    filter : str
+        The filter for this query. See [Searchlight Query
+        Language](https://developer.lockstep.io/docs/querying-with-searchlight)
+    include : str
+        To fetch additional data on each object, specify the list of
+        elements to retrieve, such as `Lines,Payments`
+    order : str
+        The sort order for this query; a stable order is recommended
+    pageSize : int
+        The page size for results
+    children : list[str]
+        The nested list fields to flatten into child tables
+    rowGroupSize : int
+        The number of rows per row group
+    compression : str
+        The Parquet compression codec
+    """
+    with tracer_for(query).start_span("lockstep.parquet_export", {"lockstep.path": path}) as span:
+        with ParquetExporter(path, model, children, rowGroupSize, compression) as exporter:
+            for page in scan_pages(query, filter, include, order, pageSize):
+                exporter.write(page["records"] or [])
+        span.set_attribute("lockstep.records", exporter.report.rows.get("", 0))
+    return exporter.report
+
+
+def arrow_batches(query, model: type, filter: str = None, include: str = None, order: str = None, pageSize: int = 500, batchSize: int = DEFAULT_ROW_GROUP_SIZE):
+    """
+    Pages through a `query_*` method and yields the plain-value fields of
+    the records as Arrow record batches of about `batchSize` rows.
+
+    Parameters
+    ----------
+    query : callable
+        A bound `query_*` method taking filter, include, order, pageSize
+        and pageNumber
+    model : type
+        The dataclass from `lockstep.models` returned by the query
+    filter : str
+        The filter for this query. See [Searchlight Query
+        Language](https://developer.lockstep.io/docs/querying-with-searchlight)
+    include : str
+        To fetch additional data on each object, specify the list of
+        elements to retrieve
+    order : str
+        The sort order for this query
+    pageSize : int
+        The page size for results
+    batchSize : int
+        The number of rows to collect before yielding a batch
+    """
+    schema = arrow_schema(model)
+    batch = ColumnarBatch(model)
+    for page in scan_pages(query, filter, include, order, pageSize):
+        batch.extend(page["records"] or [])
+        if len(batch) >= batchSize:
+            yield to_record_batch(batch, schema)
+            batch = ColumnarBatch(model)
+    if len(batch):
+        yield to_record_batch(batch, schema)
@@ -0,0 +1,143 @@
+#
+# Lockstep Software Development Kit for Python
+#
+# (c) 2021-2022 Lockstep, Inc.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+#
+# @author     Ted Spence <tspence@lockstep.io>
+# @copyright  2021-2022 Lockstep, Inc.
+# @version    2022.4
+# @link       https://github.com/Lockstep-Network/lockstep-sdk-python
+#
+
+import asyncio
+import email.utils
+import threading
+import time
+
+"""
+Client-side rate limiting for Lockstep Platform API calls
+"""
+
+
+class RateLimiter:
+    """
+    A token bucket that limits the rate of requests sent by every thread
+    sharing it. Up to `burst` requests may be sent at once, after which
+    requests are spaced out to `rate` per second.
+
+    Install a limiter with `LockstepApi.with_rate_limiter()`; the same
+    limiter may be shared by several clients that use one API key.
+    """
+
+    def __init__(self, rate: float, burst: int = None):
+        """
+        Construct a new rate limiter
+
+        Parameters
+        ----------
+        rate : float
+            The sustained number of requests per second
+        burst : int
+            The number of requests that may be sent at once; defaults to
+            one second's worth
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._pausedUntil = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: int) -> float:
+        """
+        Takes `tokens` from the bucket and returns 0, or returns how long
+        to wait before trying again.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if now < self._pausedUntil:
+                return self._pausedUntil - now
+            # Allow for rounding so that waiting exactly the returned delay is enough
+            if self._tokens >= tokens - 1e-9:
+                self._tokens = max(0.0, self._tokens - tokens)
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens: int = 1) -> float:
+        """
+        Blocks until `tokens` requests may be sent and returns the number
+        of seconds spent waiting.
+
+        Parameters
+        ----------
+        tokens : int
+            The number of requests about to be sent
+        """
+        waited = 0.0
+        while True:
+            delay = self._reserve(tokens)
+            if not delay:
+                return waited
+            time.sleep(delay)
+            waited += delay
+
+    async def acquire_async(self, tokens: int = 1) -> float:
+        """
+        The asyncio version of `acquire`.
+
+        Parameters
+        ----------
+        tokens : int
+            The number of requests about to be sent
+        """
+        waited = 0.0
+        while True:
+            delay = self._reserve(tokens)
+            if not delay:
+                return waited
+            await asyncio.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds: float):
+        """
+        Stops every caller from sending requests for a while, for example
+        after the server answered 429 Too Many Requests.
+
+        Parameters
+        ----------
+        seconds : float
+            How long to pause for
+        """
+        with self._lock:
+            self._pausedUntil = max(self._pausedUntil, time.monotonic() + seconds)
+
+
+def retry_after(headers: dict) -> float:
+    """
+    Returns the number of seconds a `Retry-After` response header asks
+    the client to wait, or None if the header is missing or invalid.
+
+    Parameters
+    ----------
+    headers : dict
+        The headers of a response
+    """
+    value = (headers or {}).get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
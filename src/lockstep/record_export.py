@@ -0,0 +1,215 @@
+#
+# Lockstep Software Development Kit for Python
+#
+# (c) 2021-2022 Lockstep, Inc.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+#
+# @author     Ted Spence <tspence@lockstep.io>
+# @copyright  2021-2022 Lockstep, Inc.
+# @version    2022.4
+# @link       https://github.com/Lockstep-Network/lockstep-sdk-python
+#
+
+import csv
+import gzip
+import io
+import json
+import time
+from dataclasses import dataclass, fields
+from lockstep.pagination import scan_pages, scan_pages_parallel, stable_order
+from lockstep.serialization import encode_model, scalar_fields
+from lockstep.tracing import tracer_for
+
+"""
+Streams query results into CSV or JSON Lines files
+"""
+
+FORMATS = ("csv", "jsonl")
+DEFAULT_BUFFER_SIZE = 1 << 20
+
+
+@dataclass
+class RecordExportReport:
+    """
+    Summarizes an export to CSV or JSON Lines. `bytes` counts the
+    uncompressed text written.
+    """
+
+    path: str
+    format: str
+    rows: int = 0
+    pages: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+    rowsPerSecond: float = 0.0
+
+
+class RecordExporter:
+    """
+    Writes records of one model to a CSV or JSON Lines file as they
+    arrive, optionally gzip compressed.
+
+    Columns follow the field order of the model. CSV files hold the
+    plain-value fields, with an empty cell for missing values; JSON Lines
+    files hold every field the API returned, nested lists included, with
+    the model's fields first. Output goes through a large write buffer so
+    that each page costs a handful of system calls.
+
+        with RecordExporter("invoices.csv.gz", InvoiceModel) as exporter:
+            for page in scan_pages(client.invoices.query_invoices, None, None, "invoiceId", 500):
+                exporter.write(page["records"])
+    """
+
+    def __init__(self, path: str, model: type, format: str = None, columns: list[str] = None, compress: bool = None, bufferSize: int = DEFAULT_BUFFER_SIZE):
+        """
+        Construct a new record exporter
+
+        Parameters
+        ----------
+        path : str
+            The file to write
+        model : type
+            The dataclass from `lockstep.models` describing the records
+        format : str
+            Either "csv" or "jsonl"; defaults to the extension of `path`,
+            such as `invoices.jsonl.gz`
+        columns : list[str]
+            The fields to write, in order; defaults to the fields of the
+            model
+        compress : bool
+            True to gzip the output; defaults to whether `path` ends with
+            `.gz`
+        bufferSize : int
+            The size of the write buffer in bytes
+        """
+        name = path[:-3] if path.endswith(".gz") else path
+        if format is None:
+            format = name.rsplit(".", 1)[-1].lower() if "." in name else "jsonl"
+            format = "jsonl" if format in ("json", "ndjson") else format
+        if format not in FORMATS:
+            raise ValueError(f"Unsupported export format {format}; expected one of {', '.join(FORMATS)}")
+        if compress is None:
+            compress = path.endswith(".gz")
+        self.path = path
+        self.model = model
+        self.format = format
+        self.report = RecordExportReport(path, format)
+        self._start = time.perf_counter()
+        self._raw = open(path, "wb", buffering=0 if compress else bufferSize)
+        self._gzip = None
+        stream = self._raw
+        if compress:
+            self._gzip = gzip.GzipFile(fileobj=self._raw, mode="wb", compresslevel=6)
+            stream = io.BufferedWriter(self._gzip, bufferSize)
+        self._text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+        if format == "csv":
+            self.columns = columns if columns is not None else scalar_fields(model)
+            self._csv = csv.writer(self._text, lineterminator="\n")
+            self._csv.writerow(self.columns)
+        else:
+            self.columns = columns if columns is not None else [f.name for f in fields(model)]
+            self._known = set(self.columns)
+
+    def write(self, records: list[dict]):
+        """
+        Adds records, such as one page of query results
+
+        Parameters
+        ----------
+        records : list[dict]
+            The JSON dictionaries returned by the API
+        """
+        if self.format == "csv":
+            buffer = io.StringIO()
+            csv.writer(buffer, lineterminator="\n").writerows([[record.get(name) for name in self.columns] for record in records])
+            text = buffer.getvalue()
+        else:
+            lines = []
+            for record in records:
+                ordered = {name: record[name] for name in self.columns if name in record}
+                if len(ordered) < len(record):
+                    ordered.update((key, value) for key, value in record.items() if key not in self._known)
+                lines.append(json.dumps(ordered, separators=(",", ":"), default=encode_model))
+            text = "\n".join(lines) + "\n" if lines else ""
+        self._text.write(text)
+        self.report.rows += len(records)
+        self.report.pages += 1
+        self.report.bytes += len(text)
+
+    def close(self) -> RecordExportReport:
+        """
+        Flushes the buffer, closes the file and returns the report
+        """
+        if not self._text.closed:
+            self._text.close()
+            if self._gzip is not None:
+                self._raw.close()
+        self.report.seconds = time.perf_counter() - self._start
+        self.report.rowsPerSecond = self.report.rows / self.report.seconds if self.report.seconds else 0.0
+        return self.report
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def export_records(query, path: str, model: type, filter: str = None, include: str = None, order: str = None, pageSize: int = 500,
+                   maxWorkers: int = 4, format: str = None, columns: list[str] = None, compress: bool = None) -> RecordExportReport:
+    """
+    Pages through a `query_*` method and writes every record to a CSV or
+    JSON Lines file, for example `export_records(client.payments.query_payments,
+    "payments.csv.gz", PaymentModel, order="paymentId")`.
+
+    Up to `maxWorkers` pages are fetched at the same time and written in
+    page order as soon as they arrive, so the file is the same as with a
+    sequential scan. Parallel scans are sorted by the primary key of the
+    model unless `order` is given.
+
+    Parameters
+    ----------
+    query : callable
+        A bound `query_*` method taking filter, include, order, pageSize
+        and pageNumber
+    path : str
+        The file to write
+    model : type
+        The dataclass from `lockstep.models` returned by the query
+    filter : str
+        The filter for this query. See [Searchlight Query
+        Language](https://developer.lockstep.io/docs/querying-with-searchlight)
+    include : str
+        To fetch additional data on each object, specify the list of
+        elements to retrieve
+    order : str
+        The sort order for this query; a stable order is required when
+        fetching pages in parallel, and defaults to the primary key of
+        the model
+    pageSize : int
+        The page size for results
+    maxWorkers : int
+        The maximum number of pages to fetch at the same time; 1 fetches
+        pages one after another
+    format : str
+        Either "csv" or "jsonl"; defaults to the extension of `path`
+    columns : list[str]
+        The fields to write, in order; defaults to the fields of the
+        model
+    compress : bool
+        True to gzip the output; defaults to whether `path` ends with
+        `.gz`
+    """
+    order = stable_order(model, order, maxWorkers)
+    with tracer_for(query).start_span("lockstep.record_export", {"lockstep.path": path}) as span:
+        with RecordExporter(path, model, format, columns, compress) as exporter:
+            if maxWorkers > 1:
+                pages = scan_pages_parallel(query, filter, include, order, pageSize, maxWorkers)
+            else:
+                pages = scan_pages(query, filter, include, order, pageSize)
+            for page in pages:
+                exporter.write(page["records"] or [])
+        span.set_attribute("lockstep.records", exporter.report.rows)
+    return exporter.report
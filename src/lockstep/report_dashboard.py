@@ -0,0 +1,140 @@
+#
+# Lockstep Software Development Kit for Python
+#
+# (c) 2021-2022 Lockstep, Inc.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+#
+# @author     Ted Spence <tspence@lockstep.io>
+# @copyright  2021-2022 Lockstep, Inc.
+# @version    2022.4
+# @link       https://github.com/Lockstep-Network/lockstep-sdk-python
+#
+
+import datetime
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from lockstep.error_result import LockstepError, error_status
+from lockstep.models.agingmodel import AgingModel
+from lockstep.models.aragingheaderinfomodel import ArAgingHeaderInfoModel
+from lockstep.models.arheaderinfomodel import ArHeaderInfoModel
+from lockstep.models.attachmentheaderinfomodel import AttachmentHeaderInfoModel
+from lockstep.models.cashflowreportmodel import CashflowReportModel
+from lockstep.models.dailysalesoutstandingreportmodel import DailySalesOutstandingReportModel
+from lockstep.models.riskratemodel import RiskRateModel
+from lockstep.result_cache import MISS
+from lockstep.serialization import ModelDecoder
+from lockstep.tracing import propagate, tracer_for
+
+"""
+Fetches the reports of an accounts receivable dashboard in parallel
+"""
+
+
+@dataclass
+class ReportDashboard:
+    """
+    The reports shown on an accounts receivable dashboard. A report that
+    failed is None, and its error payload or message is in `errors`,
+    keyed by the name of the field.
+    """
+
+    cashFlow: CashflowReportModel = None
+    dailySalesOutstanding: list[DailySalesOutstandingReportModel] = None
+    riskRates: list[RiskRateModel] = None
+    arHeader: ArHeaderInfoModel = None
+    arAgingHeader: list[ArAgingHeaderInfoModel] = None
+    aging: list[AgingModel] = None
+    attachmentsHeader: AttachmentHeaderInfoModel = None
+    errors: dict = field(default_factory=dict)
+    cacheHits: int = 0
+    seconds: float = 0.0
+
+
+def _cache_key(arguments: tuple) -> tuple:
+    return tuple(tuple(value) if isinstance(value, list) else value for value in arguments)
+
+
+def fetch_dashboard(reports, companyId: str = None, timeframe: int = 30, reportDate: str = None, currencyCode: str = None,
+                    currencyProvider: str = None, buckets: list[int] = None) -> ReportDashboard:
+    """
+    Fetches the dashboard reports at the same time, so the dashboard
+    takes as long as its slowest report rather than the sum of them.
+
+    When the client has a `ResultCache`, each report is cached for its
+    (credentials, parameters) and served from the cache while fresh;
+    cache hits are recorded in the client's metrics.
+
+    Parameters
+    ----------
+    reports : ReportsClient
+        The reports client of a `LockstepApi`
+    companyId : str
+        The company to report on, or None for the whole account; used
+        by the AR header, aging and attachment reports
+    timeframe : int
+        The number of days of data for the cash flow report
+    reportDate : str
+        The date of the AR header report; defaults to today
+    currencyCode : str
+        The currency to convert aging amounts to
+    currencyProvider : str
+        The provider of currency rates for the aging report
+    buckets : list[int]
+        The aging buckets, such as `[0, 30, 60, 90]`
+    """
+    reportDate = reportDate or datetime.date.today().isoformat()
+    client = reports.client
+    cache = client.resultCache
+    metrics = client.metrics
+    scope = client._cache_scope() if cache is not None else None
+    calls = [
+        ("cashFlow", "/api/v1/Reports/cashflow", CashflowReportModel, reports.cash_flow, (timeframe,)),
+        ("dailySalesOutstanding", "/api/v1/Reports/dailysalesoutstanding", DailySalesOutstandingReportModel, reports.daily_sales_outstanding, ()),
+        ("riskRates", "/api/v1/Reports/riskrates", RiskRateModel, reports.risk_rates, ()),
+        ("arHeader", "/api/v1/Reports/ar-header", ArHeaderInfoModel, reports.accounts_receivable_header, (reportDate, companyId)),
+        ("arAgingHeader", "/api/v1/Reports/ar-aging-header", ArAgingHeaderInfoModel, reports.accounts_receivable_aging_header, ()),
+        ("aging", "/api/v1/Reports/aging", AgingModel, reports.invoice_aging_report, (companyId, False, currencyCode, currencyProvider, buckets)),
+        ("attachmentsHeader", "/api/v1/Reports/attachments-header", AttachmentHeaderInfoModel, reports.attachments_header_information, (companyId,)),
+    ]
+
+    def fetch(name: str, path: str, method, arguments: tuple) -> tuple:
+        def load():
+            result = method(*arguments)
+            if error_status(result) is not None:
+                raise LockstepError(f"The {name} report failed", result)
+            return result
+        if cache is None:
+            return load(), MISS
+        return cache.get_or_load((scope, path, _cache_key(arguments)), load)
+
+    dashboard = ReportDashboard()
+    decoder = ModelDecoder()
+    start = time.perf_counter()
+    with tracer_for(reports.cash_flow).start_span("lockstep.dashboard", {"lockstep.company": companyId or ""}) as span:
+        with ThreadPoolExecutor(max_workers=len(calls)) as executor:
+            fetchInSpan = propagate(fetch)
+            futures = [(name, path, model, executor.submit(fetchInSpan, name, path, method, arguments)) for name, path, model, method, arguments in calls]
+            for name, path, model, future in futures:
+                try:
+                    result, how = future.result()
+                except LockstepError as e:
+                    dashboard.errors[name] = e.error
+                    continue
+                except Exception as e:
+                    dashboard.errors[name] = str(e)
+                    continue
+                if how != MISS:
+                    dashboard.cacheHits += 1
+                    if metrics is not None:
+                        metrics.record_cache_hit("GET", path)
+                if isinstance(result, list):
+                    setattr(dashboard, name, decoder.decode_records(model, result))
+                else:
+                    setattr(dashboard, name, decoder.decode(model, result))
+        span.set_attribute("lockstep.cache_hits", dashboard.cacheHits)
+        span.set_attribute("lockstep.failed", len(dashboard.errors))
+    dashboard.seconds = time.perf_counter() - start
+    return dashboard
@@ -0,0 +1,152 @@
+#
+# Lockstep Software Development Kit for Python
+#
+# (c) 2021-2022 Lockstep, Inc.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+#
+# @author     Ted Spence <tspence@lockstep.io>
+# @copyright  2021-2022 Lockstep, Inc.
+# @version    2022.4
+# @link       https://github.com/Lockstep-Network/lockstep-sdk-python
+#
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+"""
+A short-lived cache for API results that change slowly, such as reports
+"""
+
+# How a result was served by `ResultCache.get_or_load`
+FRESH = "fresh"
+STALE = "stale"
+MISS = "miss"
+
+
+class _Entry:
+    __slots__ = ("value", "stored")
+
+    def __init__(self, value: object, stored: float):
+        self.value = value
+        self.stored = stored
+
+
+class ResultCache:
+    """
+    Caches results for `ttl` seconds. For a further `staleTtl` seconds
+    an expired result is still returned immediately while one background
+    thread loads a fresh copy (stale-while-revalidate), so callers only
+    wait for the API when a result is missing or too old.
+
+    Concurrent requests for the same missing key share one load. Errors
+    are never cached: a failed load raises to its callers, and a failed
+    background refresh leaves the stale result in place. The least
+    recently used entries are dropped beyond `maxEntries`.
+
+    Install a cache with `LockstepApi.with_result_cache()`; one cache
+    may be shared by many clients, as keys include the credentials of
+    the client.
+    """
+
+    def __init__(self, ttl: float = 60.0, staleTtl: float = 300.0, maxEntries: int = 1024):
+        """
+        Construct a new result cache
+
+        Parameters
+        ----------
+        ttl : float
+            The number of seconds a result is fresh
+        staleTtl : float
+            The number of seconds after `ttl` during which a result is
+            still served while it is refreshed
+        maxEntries : int
+            The maximum number of results to keep
+        """
+        self.ttl = ttl
+        self.staleTtl = staleTtl
+        self.maxEntries = maxEntries
+        self.hits = 0
+        self.staleHits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._loading = {}
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key: tuple, loader) -> tuple:
+        """
+        Returns `(result, how)`, where `how` is `FRESH`, `STALE` or
+        `MISS`, calling `loader()` when the result is not cached.
+
+        Parameters
+        ----------
+        key : tuple
+            A hashable key for the result
+        loader : callable
+            Returns the result; it should raise rather than return an
+            error so that the error is not cached
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            age = now - entry.stored if entry is not None else None
+            if age is not None and age < self.ttl + self.staleTtl:
+                self._entries.move_to_end(key)
+                if age < self.ttl:
+                    self.hits += 1
+                    return entry.value, FRESH
+                self.staleHits += 1
+                if key in self._loading:
+                    return entry.value, STALE
+                future = self._loading[key] = Future()
+                action = "refresh"
+            else:
+                future = self._loading.get(key)
+                action = "wait"
+                if future is None:
+                    future = self._loading[key] = Future()
+                    self.misses += 1
+                    action = "load"
+        if action == "refresh":
+            threading.Thread(target=self._load, args=(key, loader, future), daemon=True).start()
+            return entry.value, STALE
+        if action == "load":
+            self._load(key, loader, future)
+        return future.result(), MISS
+
+    def _load(self, key: tuple, loader, future: Future):
+        try:
+            value = loader()
+        except BaseException as e:
+            future.set_exception(e)
+        else:
+            with self._lock:
+                self._entries[key] = _Entry(value, time.monotonic())
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxEntries:
+                    self._entries.popitem(last=False)
+            future.set_result(value)
+        finally:
+            with self._lock:
+                self._loading.pop(key, None)
+
+    def invalidate(self, key: tuple = None):
+        """
+        Drops one result, or every result when `key` is None
+
+        Parameters
+        ----------
+        key : tuple
+            The key of the result to drop
+        """
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
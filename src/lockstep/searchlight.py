@@ -0,0 +1,95 @@
+#
+# Lockstep Software Development Kit for Python
+#
+# (c) 2021-2022 Lockstep, Inc.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+#
+# @author     Ted Spence <tspence@lockstep.io>
+# @copyright  2021-2022 Lockstep, Inc.
+# @version    2022.4
+# @link       https://github.com/Lockstep-Network/lockstep-sdk-python
+#
+
+import urllib.parse
+
+"""
+Helpers for building [Searchlight Query
+Language](https://developer.lockstep.io/docs/querying-with-searchlight)
+filters
+"""
+
+# Leaves headroom under the common 8KB request line limit for the server
+# URL, the path, and the other query parameters
+DEFAULT_MAX_FILTER_LENGTH = 2000
+
+
+def quote_literal(value: str) -> str:
+    """
+    Formats a value as a Searchlight string literal, doubling any
+    embedded single quotes.
+
+    Parameters
+    ----------
+    value : str
+        The value to quote
+    """
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def in_filter(field: str, values: list) -> str:
+    """
+    Builds a Searchlight filter that matches any of the supplied values,
+    for example `invoiceId IN ('a', 'b')`.
+
+    Parameters
+    ----------
+    field : str
+        The name of the field to match
+    values : list
+        The values to match against
+    """
+    return f"{field} IN (" + ", ".join(quote_literal(v) for v in values) + ")"
+
+
+def chunk_in_filters(field: str, values: list, maxItems: int = 200, maxFilterLength: int = DEFAULT_MAX_FILTER_LENGTH) -> list[tuple[list, str]]:
+    """
+    Splits a list of values into several `IN (...)` filters, each of
+    which stays below both an item count and a URL-encoded length limit.
+
+    Returns a list of `(values, filter)` tuples in input order.
+
+    Parameters
+    ----------
+    field : str
+        The name of the field to match
+    values : list
+        The values to match against; duplicates are removed
+    maxItems : int
+        The maximum number of values in a single filter; this should not
+        exceed the page size used to run the query
+    maxFilterLength : int
+        The maximum URL-encoded length of a single filter
+    """
+    chunks = []
+    current = []
+    # "field IN (" and ")" plus the separators are all encoded once each
+    overhead = len(urllib.parse.quote_plus(f"{field} IN ()"))
+    separator = len(urllib.parse.quote_plus(", "))
+    length = overhead
+    for value in dict.fromkeys(values):
+        item = len(urllib.parse.quote_plus(quote_literal(value)))
+        if overhead + item > maxFilterLength:
+            raise ValueError(f"Value {value!r} is too long to fit in a filter of {maxFilterLength} characters")
+        extra = item + (separator if current else 0)
+        if current and (len(current) >= maxItems or length + extra > maxFilterLength):
+            chunks.append((current, in_filter(field, current)))
+            current = []
+            length = overhead
+            extra = item
+        current.append(value)
+        length += extra
+    if current:
+        chunks.append((current, in_filter(field, current)))
+    return chunks
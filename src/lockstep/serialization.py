@@ -0,0 +1,380 @@
+#
+# Lockstep Software Development Kit for Python
+#
+# (c) 2021-2022 Lockstep, Inc.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+#
+# @author     Ted Spence <tspence@lockstep.io>
+# @copyright  2021-2022 Lockstep, Inc.
+# @version    2022.4
+# @link       https://github.com/Lockstep-Network/lockstep-sdk-python
+#
+
+import copy
+import dataclasses
+import typing
+from lockstep.models.companymodel import CompanyModel
+from lockstep.models.contactmodel import ContactModel
+
+"""
+Converts JSON payloads returned by the Lockstep Platform API into the
+dataclasses in `lockstep.models`.
+"""
+
+# Field kinds used by decode plans
+_SCALAR = 0
+_MODEL = 1
+_MODEL_LIST = 2
+
+_plans = {}
+_primary_keys = {}
+_scalar_fields = {}
+
+# The instance attribute holding the field values of a tracked model as decoded
+_SNAPSHOT = "_lockstepSnapshot"
+
+# Low-cardinality fields that repeat across most records of a scan
+DEFAULT_INTERN_FIELDS = frozenset([
+    "groupKey", "companyId", "customerId", "appEnrollmentId",
+    "currencyCode", "invoiceStatusCode", "invoiceTypeCode", "termsCode",
+    "paymentType", "tenderType", "salespersonCode", "salespersonName",
+    "createdUserId", "modifiedUserId",
+])
+
+
+def _decode_plan(model: type) -> list[tuple[str, int, type]]:
+    """
+    Returns the cached list of `(name, kind, nested model)` entries
+    describing how to decode each field of a model.
+    """
+    plan = _plans.get(model)
+    if plan is None:
+        hints = typing.get_type_hints(model)
+        plan = []
+        for f in dataclasses.fields(model):
+            hint = hints.get(f.name)
+            if dataclasses.is_dataclass(hint):
+                plan.append((f.name, _MODEL, hint))
+            elif typing.get_origin(hint) is list and dataclasses.is_dataclass((typing.get_args(hint) or (None,))[0]):
+                plan.append((f.name, _MODEL_LIST, typing.get_args(hint)[0]))
+            else:
+                plan.append((f.name, _SCALAR, None))
+        _plans[model] = plan
+    return plan
+
+
+def primary_key(model: type) -> str:
+    """
+    Returns the name of the primary key field of a model, for example
+    `companyId` for `CompanyModel`, or None if the model has no primary
+    key.
+
+    Parameters
+    ----------
+    model : type
+        A dataclass from `lockstep.models`
+    """
+    if model not in _primary_keys:
+        name = model.__name__
+        if name.endswith("Model"):
+            name = name[:-len("Model")]
+        key = name[:1].lower() + name[1:] + "Id"
+        _primary_keys[model] = key if key in {f.name for f in dataclasses.fields(model)} else None
+    return _primary_keys[model]
+
+
+class IdentityMap:
+    """
+    Keeps a single shared instance per (model type, primary key) so that
+    nested entities repeated across many records, such as the `company`
+    and `customer` of each invoice, are only decoded and stored once.
+    """
+
+    def __init__(self):
+        self._instances = {}
+
+    def get(self, model: type, key: str):
+        return self._instances.get((model, key))
+
+    def add(self, model: type, key: str, instance: object):
+        self._instances[(model, key)] = instance
+
+    def clear(self):
+        self._instances.clear()
+
+    def __len__(self) -> int:
+        return len(self._instances)
+
+
+class InternTable:
+    """
+    A bounded table of canonical strings. Equal values looked up through
+    the table share a single string object, which saves memory when the
+    same codes and ids repeat across millions of records. Once the table
+    is full, new values are returned unchanged while values already in
+    the table continue to be shared.
+    """
+
+    def __init__(self, maxSize: int = 65536):
+        """
+        Construct a new intern table
+
+        Parameters
+        ----------
+        maxSize : int
+            The maximum number of distinct strings to keep
+        """
+        self.maxSize = maxSize
+        self._table = {}
+
+    def intern(self, value: str) -> str:
+        """
+        Returns the canonical instance of `value`.
+
+        Parameters
+        ----------
+        value : str
+            The string to intern
+        """
+        canonical = self._table.get(value)
+        if canonical is not None:
+            return canonical
+        if len(self._table) < self.maxSize:
+            self._table[value] = value
+        return value
+
+    def clear(self):
+        self._table.clear()
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+
+class ModelDecoder:
+    """
+    Decodes JSON dictionaries into model dataclasses, including nested
+    models and lists of models.
+
+    A decoder may be reused for every record of an iteration; options
+    such as the identity map keep their state for as long as the decoder
+    is in use.
+    """
+
+    def __init__(self, identityMap: bool = False, identityTypes: tuple = (CompanyModel, ContactModel), internStrings: bool = False, internFields: frozenset = DEFAULT_INTERN_FIELDS, internTableSize: int = 65536, trackChanges: bool = False):
+        """
+        Construct a new model decoder
+
+        Parameters
+        ----------
+        identityMap : bool
+            True to share one instance per (model type, primary key)
+            for nested entities of the types in `identityTypes`
+        identityTypes : tuple
+            The nested model types to deduplicate when `identityMap` is
+            enabled
+        internStrings : bool
+            True to intern the string values of `internFields` through a
+            bounded `InternTable`
+        internFields : frozenset
+            The names of the fields to intern when `internStrings` is
+            enabled
+        internTableSize : int
+            The maximum number of distinct strings in the intern table
+        trackChanges : bool
+            True to record the decoded values of each model so that
+            `changed_fields` and `patch_body` can report what was
+            modified afterwards
+        """
+        self.trackChanges = trackChanges
+        self.identityMap = IdentityMap() if identityMap else None
+        self.identityTypes = frozenset(identityTypes)
+        self.internTable = InternTable(internTableSize) if internStrings else None
+        self.internFields = frozenset(internFields) if internStrings else frozenset()
+        self._plans = {}
+
+    def decode(self, model: type, data: dict):
+        """
+        Decodes a single JSON dictionary into an instance of `model`.
+
+        Parameters
+        ----------
+        model : type
+            A dataclass from `lockstep.models`
+        data : dict
+            The JSON dictionary returned by the API
+        """
+        if data is None:
+            return None
+        plan = self._plans.get(model)
+        if plan is None:
+            plan = [(name, kind, nested, name in self.internFields) for name, kind, nested in _decode_plan(model)]
+            self._plans[model] = plan
+        values = {}
+        for name, kind, nested, intern in plan:
+            value = data.get(name)
+            if value is None:
+                continue
+            if intern:
+                if value.__class__ is str:
+                    value = self.internTable.intern(value)
+            elif kind == _MODEL:
+                value = self._decode_nested(nested, value)
+            elif kind == _MODEL_LIST:
+                value = [self.decode(nested, item) for item in value]
+            values[name] = value
+        instance = model(**values)
+        if self.trackChanges:
+            _take_snapshot(instance, values)
+        return instance
+
+    def decode_records(self, model: type, records: list[dict]) -> list:
+        """
+        Decodes a list of JSON dictionaries, such as the `records` of a
+        query result.
+
+        Parameters
+        ----------
+        model : type
+            A dataclass from `lockstep.models`
+        records : list[dict]
+            The JSON dictionaries returned by the API
+        """
+        return [self.decode(model, record) for record in records]
+
+    def _decode_nested(self, model: type, data: dict):
+        if self.identityMap is None or model not in self.identityTypes:
+            return self.decode(model, data)
+        keyField = primary_key(model)
+        key = data.get(keyField) if keyField else None
+        if key is None:
+            return self.decode(model, data)
+        instance = self.identityMap.get(model, key)
+        if instance is None:
+            instance = self.decode(model, data)
+            self.identityMap.add(model, key, instance)
+        return instance
+
+
+def encode_model(model: object) -> dict:
+    """
+    Converts a model dataclass into a JSON-ready dictionary, omitting
+    fields that are None. Dictionaries are returned unchanged.
+
+    Parameters
+    ----------
+    model : object
+        A dataclass from `lockstep.models`, or a dictionary
+    """
+    if not dataclasses.is_dataclass(model):
+        return model
+    result = {}
+    for name, kind, nested in _decode_plan(type(model)):
+        value = getattr(model, name)
+        if value is None:
+            continue
+        if kind == _MODEL:
+            value = encode_model(value)
+        elif kind == _MODEL_LIST:
+            value = [encode_model(item) for item in value]
+        result[name] = value
+    return result
+
+
+def scalar_fields(model: type) -> list[str]:
+    """
+    Returns the names of the fields of a model that hold plain values
+    rather than nested models, in declaration order.
+
+    Parameters
+    ----------
+    model : type
+        A dataclass from `lockstep.models`
+    """
+    names = _scalar_fields.get(model)
+    if names is None:
+        names = _scalar_fields[model] = [name for name, kind, nested in _decode_plan(model) if kind == _SCALAR]
+    return list(names)
+
+
+def nested_list_fields(model: type) -> dict:
+    """
+    Returns the fields of a model that hold lists of nested models, such
+    as the `lines` and `payments` of an invoice, as a dictionary of field
+    name to nested model, in declaration order.
+
+    Parameters
+    ----------
+    model : type
+        A dataclass from `lockstep.models`
+    """
+    return {name: nested for name, kind, nested in _decode_plan(model) if kind == _MODEL_LIST}
+
+
+def _take_snapshot(instance: object, values: dict):
+    snapshot = {}
+    for name in _scalar_fields.get(type(instance)) or scalar_fields(type(instance)):
+        value = values.get(name)
+        if value is not None:
+            snapshot[name] = copy.copy(value) if isinstance(value, (list, dict)) else value
+    object.__setattr__(instance, _SNAPSHOT, snapshot)
+
+
+def start_tracking(instance: object):
+    """
+    Starts tracking changes to a model from its current values, or
+    resets tracking after the changes have been saved.
+
+    Parameters
+    ----------
+    instance : object
+        An instance of a dataclass from `lockstep.models`
+    """
+    _take_snapshot(instance, instance.__dict__)
+
+
+def is_tracked(instance: object) -> bool:
+    """
+    Returns True if changes to a model instance are being tracked.
+
+    Parameters
+    ----------
+    instance : object
+        Any object
+    """
+    return getattr(instance, _SNAPSHOT, None) is not None
+
+
+def changed_fields(instance: object) -> list[str]:
+    """
+    Returns the names of the plain-value fields of a tracked model that
+    were modified since it was decoded or last saved. Nested models and
+    lists of models are not tracked.
+
+    Parameters
+    ----------
+    instance : object
+        A model decoded with `ModelDecoder(trackChanges=True)`, or
+        passed to `start_tracking`
+    """
+    snapshot = getattr(instance, _SNAPSHOT, None)
+    if snapshot is None:
+        raise ValueError(f"Changes to this {type(instance).__name__} are not being tracked")
+    values = instance.__dict__
+    return [name for name in scalar_fields(type(instance)) if values.get(name) != snapshot.get(name)]
+
+
+def patch_body(instance: object) -> dict:
+    """
+    Returns the minimal PATCH body for a tracked model: the modified
+    fields and their new values, with None for fields that were cleared.
+    The body is empty when nothing changed.
+
+    Parameters
+    ----------
+    instance : object
+        A model decoded with `ModelDecoder(trackChanges=True)`, or
+        passed to `start_tracking`
+    """
+    return {name: getattr(instance, name) for name in changed_fields(instance)}
@@ -0,0 +1,225 @@
+#
+# Lockstep Software Development Kit for Python
+#
+# (c) 2021-2022 Lockstep, Inc.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+#
+# @author     Ted Spence <tspence@lockstep.io>
+# @copyright  2021-2022 Lockstep, Inc.
+# @version    2022.4
+# @link       https://github.com/Lockstep-Network/lockstep-sdk-python
+#
+
+import bisect
+import dataclasses
+import tempfile
+import time
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from lockstep.models.syncentityresultmodel import SyncEntityResultModel
+from lockstep.models.syncrequestmodel import SyncRequestModel
+from lockstep.sync_tracker import SyncTracker
+from lockstep.sync_zip import SyncEntryWriter
+from lockstep.tracing import propagate
+
+@dataclass
+class ShardedSyncReport:
+    """
+    The combined outcome of a sharded Sync upload. Counts are summed
+    across every shard, per entity in `entities` and overall in the
+    top-level fields. Shards whose upload or task failed are listed by
+    index in `failedShards`; `timedOut` is set when some Sync tasks were
+    still running when the timeout of `run` expired.
+    """
+
+    shards: list[SyncRequestModel] = field(default_factory=list)
+    entities: dict = field(default_factory=dict)
+    insertCount: int = 0
+    updateCount: int = 0
+    skipCount: int = 0
+    errorCount: int = 0
+    errors: list[object] = field(default_factory=list)
+    failedShards: list[int] = field(default_factory=list)
+    timedOut: bool = False
+    seconds: float = 0.0
+
+
+def _entity_results(details: object) -> list[tuple[str, dict]]:
+    """
+    Finds the per-entity results within the `details` of a Sync task,
+    which may be a dictionary keyed by entity or a list.
+    """
+    if isinstance(details, dict):
+        if "insertCount" in details:
+            return [("", details)]
+        return [(name, value) for name, value in details.items() if isinstance(value, dict)]
+    if isinstance(details, list):
+        return [(item.get("entityName", ""), item) for item in details if isinstance(item, dict)]
+    return []
+
+
+class ShardedSyncUploader:
+    """
+    Splits entity streams into several Sync ZIP files by key, uploads
+    them concurrently through `upload_sync_file`, tracks each resulting
+    Sync task and combines their results into one report.
+
+    Smaller shards finish sooner on the server and a bad record only
+    fails the shard that contains it. Records are routed as they are
+    read and written to temporary files, so memory use does not depend
+    on the number of records.
+    """
+
+    def __init__(self, client, shards: int = 4, format: str = "jsonl", boundaries: list = None, maxWorkers: int = None, tracker: SyncTracker = None):
+        """
+        Construct a new sharded Sync uploader
+
+        Parameters
+        ----------
+        client : LockstepApi
+            The API client to upload with
+        shards : int
+            The number of ZIP files to split records into; ignored when
+            `boundaries` is provided
+        format : str
+            The format of each entry, either "jsonl" or "csv"
+        boundaries : list
+            Optional sorted keys that split records into key ranges; a
+            record goes to the first shard whose boundary is greater
+            than its key. When omitted records are spread by a hash of
+            their key.
+        maxWorkers : int
+            The maximum number of uploads to run at the same time;
+            defaults to one per shard
+        tracker : SyncTracker
+            Optional tracker used to watch the resulting Sync tasks
+        """
+        self.client = client
+        self.boundaries = sorted(boundaries) if boundaries is not None else None
+        self.shardCount = len(self.boundaries) + 1 if boundaries is not None else shards
+        self.format = format
+        self.maxWorkers = maxWorkers or self.shardCount
+        self.tracker = tracker or SyncTracker(client)
+        self._files = [tempfile.TemporaryFile() for _ in range(self.shardCount)]
+        self._zips = [zipfile.ZipFile(f, "w", compression=zipfile.ZIP_DEFLATED) for f in self._files]
+        self._counts = [0] * self.shardCount
+        self._entities = set()
+
+    def add(self, name: str, records, key, model: type = None):
+        """
+        Routes every record of an entity stream to its shard.
+
+        Parameters
+        ----------
+        name : str
+            The name of the entity, such as `Invoices`; each entity can
+            only be added once
+        records : iterable
+            The models or dictionaries to upload
+        key : str or callable
+            The field holding each record's key, such as `erpKey`, or a
+            function returning the key for a record
+        model : type
+            The model dataclass that defines the CSV columns; required
+            for CSV entries whose records are dictionaries
+        """
+        if name in self._entities:
+            raise ValueError(f"Records for {name!r} have already been added; add each entity once")
+        self._entities.add(name)
+        if not callable(key):
+            field_name = key
+            key = lambda r: getattr(r, field_name) if dataclasses.is_dataclass(r) else r.get(field_name)
+        writers = [SyncEntryWriter(zf, f"{name}.{self.format}", self.format, model) for zf in self._zips]
+        try:
+            for record in records:
+                shard = self._shard(key(record))
+                writers[shard].write(record)
+                self._counts[shard] += 1
+        finally:
+            for writer in writers:
+                writer.close()
+        return self
+
+    def run(self, timeout: float = None) -> ShardedSyncReport:
+        """
+        Uploads every non-empty shard concurrently, waits for the Sync
+        tasks to finish and returns the combined report.
+
+        Parameters
+        ----------
+        timeout : float
+            The maximum number of seconds to wait for the Sync tasks
+        """
+        with self.client.tracer.start_span("lockstep.sharded_sync", {"lockstep.shards": self.shardCount}):
+            return self._run(timeout)
+
+    def _run(self, timeout: float) -> ShardedSyncReport:
+        start = time.perf_counter()
+        report = ShardedSyncReport()
+        for zf in self._zips:
+            zf.close()
+        shards = [i for i in range(self.shardCount) if self._counts[i]]
+
+        def upload(index):
+            f = self._files[index]
+            f.seek(0)
+            try:
+                return index, self.client.sync.upload_sync_file(f, f"shard-{index}.zip")
+            except Exception as e:
+                # A failed upload fails its own shard rather than the whole run
+                return index, e
+
+        tasks = {}
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, min(self.maxWorkers, len(shards)))) as executor:
+                for index, response in executor.map(propagate(upload), shards):
+                    id = response.get("syncRequestId") if isinstance(response, dict) else None
+                    if id:
+                        tasks[index] = (id, self.tracker.track(id))
+                    else:
+                        report.failedShards.append(index)
+                        report.errors.append(response)
+        finally:
+            for f in self._files:
+                f.close()
+
+        # Only this run's tasks are waited for, so a shared tracker may be watching others
+        try:
+            self.tracker.wait(timeout, {id: future for id, future in tasks.values()})
+        except TimeoutError:
+            report.timedOut = True
+        for index, (id, future) in sorted(tasks.items()):
+            if not future.done():
+                report.failedShards.append(index)
+                report.errors.append(f"Sync task {id} for shard {index} did not finish within {timeout} seconds")
+                continue
+            sync = future.result()
+            report.shards.append(sync)
+            if sync.statusCode != "Success":
+                report.failedShards.append(index)
+                if sync.processResultMessage:
+                    report.errors.append(sync.processResultMessage)
+            self._aggregate(report, sync)
+        report.failedShards.sort()
+        report.seconds = time.perf_counter() - start
+        return report
+
+    def _shard(self, key) -> int:
+        if self.boundaries is not None:
+            return bisect.bisect_right(self.boundaries, key)
+        return zlib.crc32(str(key).encode("utf-8")) % self.shardCount
+
+    def _aggregate(self, report: ShardedSyncReport, sync: SyncRequestModel):
+        for name, result in _entity_results(sync.details):
+            total = report.entities.setdefault(name, SyncEntityResultModel(0, 0, 0, 0, []))
+            for counter in ("insertCount", "updateCount", "skipCount", "errorCount"):
+                value = result.get(counter) or 0
+                setattr(total, counter, getattr(total, counter) + value)
+                setattr(report, counter, getattr(report, counter) + value)
+            if result.get("errors"):
+                total.errors.append(result["errors"])
+                report.errors.append(result["errors"])
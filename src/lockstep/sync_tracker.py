@@ -0,0 +1,230 @@
+#
+# Lockstep Software Development Kit for Python
+#
+# (c) 2021-2022 Lockstep, Inc.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+#
+# @author     Ted Spence <tspence@lockstep.io>
+# @copyright  2021-2022 Lockstep, Inc.
+# @version    2022.4
+# @link       https://github.com/Lockstep-Network/lockstep-sdk-python
+#
+
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from lockstep.models.syncrequestmodel import SyncRequestModel
+from lockstep.searchlight import chunk_in_filters
+from lockstep.serialization import ModelDecoder
+
+TERMINAL_STATUSES = frozenset(["Success", "Failed", "Cancelled"])
+
+_logger = logging.getLogger("lockstep")
+
+
+class _TrackedSync:
+    def __init__(self, id: str, interval: float, callback):
+        self.id = id
+        self.future = Future()
+        self.callback = callback
+        self.interval = interval
+        self.due = time.monotonic()
+        self.status = None
+
+
+class SyncTracker:
+    """
+    Watches many Sync tasks at once and resolves a future (and an
+    optional callback) with the final `SyncRequestModel` when each task
+    reaches a terminal status.
+
+    Tasks that are due are refreshed together with one `query_syncs`
+    call per batch using a `syncRequestId IN (...)` filter. Each task
+    backs off on its own: the polling interval grows while its status is
+    unchanged and resets when the status moves.
+    """
+
+    def __init__(self, client, minInterval: float = 1.0, maxInterval: float = 60.0, backoffFactor: float = 1.5, include: str = "Details", batchSize: int = 100):
+        """
+        Construct a new Sync task tracker
+
+        Parameters
+        ----------
+        client : LockstepApi
+            The API client to poll with
+        minInterval : float
+            The initial delay in seconds between checks of a task
+        maxInterval : float
+            The longest delay in seconds between checks of a task
+        backoffFactor : float
+            The factor applied to a task's delay each time its status is
+            found unchanged
+        include : str
+            The collections to fetch with each Sync task, such as
+            `Details`
+        batchSize : int
+            The maximum number of tasks refreshed by a single query
+        """
+        self.client = client
+        self.minInterval = minInterval
+        self.maxInterval = maxInterval
+        self.backoffFactor = backoffFactor
+        self.include = include
+        self.batchSize = batchSize
+        self._decoder = ModelDecoder()
+        self._tasks = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._stopping = False
+
+    def track(self, sync: object, callback=None) -> Future:
+        """
+        Starts watching a Sync task and returns a future that resolves to
+        its `SyncRequestModel` once the task has finished.
+
+        Parameters
+        ----------
+        sync : object
+            The id of the Sync task, or the result of `create_sync` or
+            `upload_sync_file`
+        callback : callable
+            Optional function called with the final `SyncRequestModel`;
+            an exception raised by the callback is logged and does not
+            affect the future
+        """
+        if isinstance(sync, SyncRequestModel):
+            id = sync.syncRequestId
+        elif isinstance(sync, dict):
+            id = sync.get("syncRequestId")
+        else:
+            id = sync
+        if not id:
+            raise ValueError(f"Unable to determine the Sync task id from {sync!r}")
+        with self._lock:
+            task = self._tasks.get(id)
+            if task is None:
+                task = _TrackedSync(id, self.minInterval, callback)
+                self._tasks[id] = task
+        self._wakeup.set()
+        return task.future
+
+    @property
+    def pending(self) -> int:
+        """The number of tasks that have not yet finished"""
+        with self._lock:
+            return len(self._tasks)
+
+    def poll(self) -> float:
+        """
+        Refreshes every task that is due and returns the number of
+        seconds until the next task is due, or None when no tasks remain.
+        """
+        now = time.monotonic()
+        with self._lock:
+            due = [task for task in self._tasks.values() if task.due <= now]
+        for ids, filter in chunk_in_filters("syncRequestId", [task.id for task in due], self.batchSize):
+            response = self.client.sync.query_syncs(filter, self.include, None, len(ids), 0)
+            records = response.get("records") if isinstance(response, dict) else None
+            found = {}
+            if records is not None:
+                for record in records:
+                    found[str(record.get("syncRequestId")).lower()] = record
+            for id in ids:
+                self._update(id, found.get(str(id).lower()))
+        with self._lock:
+            if not self._tasks:
+                return None
+            return max(0.0, min(task.due for task in self._tasks.values()) - time.monotonic())
+
+    def wait(self, timeout: float = None, futures: dict = None) -> dict:
+        """
+        Polls in the calling thread until every tracked task has
+        finished, and returns the final models keyed by Sync task id.
+
+        Parameters
+        ----------
+        timeout : float
+            The maximum number of seconds to wait; a TimeoutError is
+            raised if tasks are still running after this time
+        futures : dict
+            The futures returned by `track` to wait for, keyed by Sync
+            task id; defaults to every task being tracked. Other tasks
+            are still polled while waiting.
+        """
+        if futures is None:
+            with self._lock:
+                futures = {id: task.future for id, task in self._tasks.items()}
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if self._thread is None:
+                delay = self.poll()
+            else:
+                delay = 0.1 if self.pending else None
+            if delay is None or all(f.done() for f in futures.values()):
+                break
+            if deadline is not None:
+                if time.monotonic() >= deadline:
+                    running = sum(1 for f in futures.values() if not f.done())
+                    raise TimeoutError(f"{running} Sync tasks did not finish within {timeout} seconds")
+                delay = min(delay, deadline - time.monotonic())
+            time.sleep(delay)
+        return {id: future.result() for id, future in futures.items() if future.done()}
+
+    def start(self):
+        """
+        Starts polling on a background thread. Futures and callbacks are
+        resolved from that thread.
+        """
+        if self._thread is None:
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="lockstep-sync-tracker", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """
+        Stops the background thread started by `start`. Tasks that have
+        not finished keep their state and can be resumed later.
+        """
+        if self._thread is not None:
+            self._stopping = True
+            self._wakeup.set()
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stopping:
+            try:
+                delay = self.poll()
+            except Exception:
+                delay = self.minInterval
+            self._wakeup.wait(delay)
+            self._wakeup.clear()
+
+    def _update(self, id: str, record: dict):
+        with self._lock:
+            task = self._tasks.get(id)
+            if task is None:
+                return
+            status = record.get("statusCode") if record else None
+            if status in TERMINAL_STATUSES:
+                del self._tasks[id]
+            else:
+                if status is not None and status != task.status:
+                    task.interval = self.minInterval
+                else:
+                    task.interval = min(task.interval * self.backoffFactor, self.maxInterval)
+                task.status = status
+                task.due = time.monotonic() + task.interval
+                return
+        model = self._decoder.decode(SyncRequestModel, record)
+        if task.callback:
+            try:
+                task.callback(model)
+            except Exception:
+                # A failing callback must not keep the remaining tasks from being updated
+                _logger.exception("Callback for Sync task %s raised an exception", id)
+        task.future.set_result(model)
@@ -0,0 +1,199 @@
+#
+# Lockstep Software Development Kit for Python
+#
+# (c) 2021-2022 Lockstep, Inc.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+#
+# @author     Ted Spence <tspence@lockstep.io>
+# @copyright  2021-2022 Lockstep, Inc.
+# @version    2022.4
+# @link       https://github.com/Lockstep-Network/lockstep-sdk-python
+#
+
+import csv
+import dataclasses
+import io
+import json
+import zipfile
+from lockstep.serialization import encode_model, scalar_fields
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+
+class _ChunkSink:
+    """
+    A write-only, unseekable file object that collects bytes written by
+    `zipfile` until they are drained by the generator producing the ZIP.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self.size = 0
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        self.size = 0
+        return data
+
+
+class SyncZipBuilder:
+    """
+    Builds the ZIP file accepted by `SyncClient.upload_sync_file` from
+    iterators of models, serializing each record as the ZIP is read.
+
+    Records are never collected in memory: iterating over the builder
+    yields the ZIP in chunks, so it can be passed directly as the `file`
+    argument of `upload_sync_file`. Each entry consumes its iterator, so
+    a builder can only be read once.
+    """
+
+    def __init__(self, format: str = "jsonl", chunkSize: int = DEFAULT_CHUNK_SIZE, compression: int = zipfile.ZIP_DEFLATED):
+        """
+        Construct a new Sync ZIP builder
+
+        Parameters
+        ----------
+        format : str
+            The format of each entry, either "jsonl" or "csv"
+        chunkSize : int
+            The approximate size of the chunks produced while iterating
+        compression : int
+            The `zipfile` compression method to use for each entry
+        """
+        if format not in ("jsonl", "csv"):
+            raise ValueError(f"Unsupported Sync file format {format!r}")
+        self.format = format
+        self.chunkSize = chunkSize
+        self.compression = compression
+        self._entries = []
+
+    def add(self, name: str, records, model: type = None):
+        """
+        Adds an entry to the ZIP, such as `Invoices` or `Payments`.
+
+        Parameters
+        ----------
+        name : str
+            The name of the entry, without a file extension
+        records : iterable
+            The models or dictionaries to write into the entry
+        model : type
+            The model dataclass that defines the CSV columns; required
+            for CSV entries whose records are dictionaries
+        """
+        entryName = f"{name}.{self.format}"
+        if any(existing == entryName for existing, _, _ in self._entries):
+            raise ValueError(f"The Sync ZIP already has an entry named {entryName!r}")
+        self._entries.append((entryName, records, model))
+        return self
+
+    def __iter__(self):
+        sink = _ChunkSink()
+        with zipfile.ZipFile(sink, "w", compression=self.compression) as zf:
+            for entryName, records, model in self._entries:
+                with SyncEntryWriter(zf, entryName, self.format, model) as writer:
+                    for count, record in enumerate(records, 1):
+                        writer.write(record)
+                        if count % 256 == 0 and sink.size >= self.chunkSize:
+                            yield sink.drain()
+                if sink.size:
+                    yield sink.drain()
+        if sink.size:
+            yield sink.drain()
+
+    def write_to(self, f) -> int:
+        """
+        Writes the complete ZIP to a binary file object and returns the
+        number of bytes written.
+
+        Parameters
+        ----------
+        f : file object
+            A binary file object opened for writing
+        """
+        written = 0
+        for chunk in self:
+            f.write(chunk)
+            written += len(chunk)
+        return written
+
+
+class SyncEntryWriter:
+    """
+    Writes records one at a time into a single JSONL or CSV entry of an
+    open `zipfile.ZipFile`. Use as a context manager so that the entry
+    is closed when writing is complete.
+    """
+
+    def __init__(self, zf: zipfile.ZipFile, entryName: str, format: str, model: type = None):
+        """
+        Opens a new entry for writing
+
+        Parameters
+        ----------
+        zf : zipfile.ZipFile
+            The ZIP file to add the entry to
+        entryName : str
+            The file name of the entry, including its extension
+        format : str
+            The format of the entry, either "jsonl" or "csv"
+        model : type
+            The model dataclass that defines the CSV columns; required
+            for CSV entries whose records are dictionaries
+        """
+        self.format = format
+        self._raw = zf.open(entryName, "w", force_zip64=True)
+        self._text = io.TextIOWrapper(self._raw, encoding="utf-8", newline="")
+        self._columns = None
+        self._csv = None
+        if format == "csv":
+            self._csv = csv.writer(self._text)
+            if model is not None:
+                self._set_columns(model)
+
+    def write(self, record: object):
+        """
+        Writes a model or dictionary to the entry.
+
+        Parameters
+        ----------
+        record : object
+            A dataclass from `lockstep.models`, or a dictionary
+        """
+        if self._csv is None:
+            self._text.write(json.dumps(encode_model(record), separators=(",", ":")))
+            self._text.write("\n")
+        elif dataclasses.is_dataclass(record):
+            if self._columns is None:
+                self._set_columns(type(record))
+            self._csv.writerow(["" if getattr(record, c) is None else getattr(record, c) for c in self._columns])
+        else:
+            if self._columns is None:
+                raise ValueError("CSV entries built from dictionaries require a model")
+            self._csv.writerow(["" if record.get(c) is None else record.get(c) for c in self._columns])
+
+    def close(self):
+        self._text.flush()
+        self._text.detach()
+        self._raw.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _set_columns(self, model: type):
+        self._columns = scalar_fields(model)
+        self._csv.writerow(self._columns)
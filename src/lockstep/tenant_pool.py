@@ -0,0 +1,425 @@
+#
+# Lockstep Software Development Kit for Python
+#
+# (c) 2021-2022 Lockstep, Inc.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+#
+# @author     Ted Spence <tspence@lockstep.io>
+# @copyright  2021-2022 Lockstep, Inc.
+# @version    2022.4
+# @link       https://github.com/Lockstep-Network/lockstep-sdk-python
+#
+
+import logging
+import platform
+import threading
+from collections import OrderedDict, deque
+from lockstep.lockstep_api import LockstepApi, server_url
+from lockstep.rate_limiter import RateLimiter
+from lockstep.tracing import NOOP_TRACER
+from lockstep.transports import RequestsTransport
+
+"""
+Serve many Lockstep Platform tenants from one process
+"""
+
+
+class FairGate:
+    """
+    Limits the number of requests in flight across all tenants and
+    hands free slots to waiting tenants in round-robin order, so a
+    tenant with a long queue of requests cannot starve the others.
+    """
+
+    def __init__(self, limit: int):
+        """
+        Construct a new gate
+
+        Parameters
+        ----------
+        limit : int
+            The maximum number of requests in flight
+        """
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+        self.limit = limit
+        self.active = 0
+        self._waiters = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, tenantId: str):
+        """
+        Blocks until a slot is free and it is this tenant's turn
+
+        Parameters
+        ----------
+        tenantId : str
+            The tenant sending the request
+        """
+        with self._lock:
+            if self.active < self.limit and not self._waiters:
+                self.active += 1
+                return
+            event = threading.Event()
+            self._waiters.setdefault(tenantId, deque()).append(event)
+        event.wait()
+
+    def release(self):
+        """
+        Frees a slot, handing it to the next tenant in turn if any are
+        waiting
+        """
+        with self._lock:
+            if not self._waiters:
+                self.active -= 1
+                return
+            tenantId, events = next(iter(self._waiters.items()))
+            event = events.popleft()
+            # The tenant goes to the back of the line for its next request
+            if events:
+                self._waiters.move_to_end(tenantId)
+            else:
+                del self._waiters[tenantId]
+        event.set()
+
+    def waiting(self) -> dict:
+        """
+        Returns the number of waiting requests of each tenant
+        """
+        with self._lock:
+            return {tenantId: len(events) for tenantId, events in self._waiters.items()}
+
+
+def _shared(name: str) -> property:
+    def read(self):
+        return getattr(self.pool, name)
+
+    def write(self, value):
+        raise AttributeError(f"{name} is shared by every tenant; configure it on the TenantPool")
+
+    return property(read, write, doc=f"The `{name}` of the pool")
+
+
+class TenantClient(LockstepApi):
+    """
+    A `LockstepApi` for one tenant of a `TenantPool`. It has the same
+    `invoices`, `payments` and other clients, but sends its requests
+    through the pool's transport with its own credentials, waiting for
+    its own rate limiter and for its turn at the pool's `FairGate`.
+
+    Create tenant clients with `TenantPool.add_tenant()`. The transport,
+    metrics, tracer, result cache and slow request log belong to the pool.
+    """
+
+    transport = _shared("transport")
+    metrics = _shared("metrics")
+    tracer = _shared("tracer")
+    resultCache = _shared("resultCache")
+    slowRequestThreshold = _shared("slowRequestThreshold")
+    slowRequestLogger = _shared("slowRequestLogger")
+    profileDirectory = _shared("profileDirectory")
+    serverUrl = _shared("serverUrl")
+    sdkName = _shared("sdkName")
+    sdkVersion = _shared("sdkVersion")
+    machineName = _shared("machineName")
+    applicationName = _shared("applicationName")
+
+    def __init__(self, pool, tenantId: str, rateLimiter: RateLimiter = None):
+        """
+        Construct a new tenant client
+
+        Parameters
+        ----------
+        pool : TenantPool
+            The pool this tenant belongs to
+        tenantId : str
+            The name the pool knows this tenant by
+        rateLimiter : RateLimiter
+            The limiter for this tenant's requests, or None
+        """
+        self._create_clients()
+        self.pool = pool
+        self.tenantId = tenantId
+        self.rateLimiter = rateLimiter
+        self._credential = None
+
+    def with_api_key(self, apiKey: str):
+        """Configure this tenant to use API Key authentication
+
+        Parameters
+        ----------
+        apiKey : str
+            The [Lockstep Platform API
+            key](https://developer.lockstep.io/docs/api-keys) to use for
+            authentication.
+        """
+        self._credential = ("Api-Key", apiKey)
+
+    def with_bearer_token(self, bearerToken: str):
+        """Configure this tenant to use Bearer Token authentication
+
+        Parameters
+        ----------
+        bearerToken : str
+            The [Lockstep Platform JWT Bearer
+            Token](https://developer.lockstep.io/docs/jwt-bearer-tokens) to use
+            for authentication.
+        """
+        self._credential = ("Authorization", "Bearer " + bearerToken)
+
+    def _cache_scope(self) -> str:
+        return "tenant:" + self.tenantId
+
+    def _build_headers(self) -> dict:
+        headers = dict(self.pool.headers)
+        # Credentials are swapped as one tuple, so a request never mixes two of them
+        credential = self._credential
+        if credential is not None:
+            headers[credential[0]] = credential[1]
+        return headers
+
+    def _transmit(self, method: str, path: str, url: str, headers: dict, data: object, stream: bool):
+        # The rate limit is waited for before taking a slot, so a throttled
+        # request never holds a shared connection slot that another tenant could use
+        if self.pool.rateLimiter is not None:
+            self.pool.rateLimiter.acquire()
+        # Streamed downloads give up their slot once the response headers arrive
+        gate = self.pool.gate
+        gate.acquire(self.tenantId)
+        try:
+            return super()._transmit(method, path, url, headers, data, stream)
+        finally:
+            gate.release()
+
+
+class TenantPool:
+    """
+    Serves many Lockstep Platform tenants from one process. Every tenant
+    shares one transport, and therefore one pool of connections, along
+    with the pool's metrics, tracer, result cache and slow request log,
+    while its credentials are attached to each request it sends.
+
+    Each tenant may have its own `RateLimiter`, and at most
+    `maxConcurrent` requests are in flight across the pool; waiting
+    tenants take turns, so one busy tenant cannot starve the others.
+
+        pool = TenantPool("prd", "MyApp", maxConcurrent=64, tenantRate=5)
+        acme = pool.add_tenant("acme", apiKey=acmeKey)
+        page = acme.invoices.query_invoices(None, None, None, 100, 0)
+    """
+
+    def __init__(self, env: str, appname: str, maxConcurrent: int = 32, tenantRate: float = None, tenantBurst: int = None):
+        """
+        Construct a new tenant pool
+
+        Parameters
+        ----------
+        env : str
+            Select the Lockstep Platform environment to use for this pool. You
+            may select from either "prd", "sbx", or provide a full URL of a custom
+            environment.
+        appname : str
+            Provide a name for your application for logging and debugging.
+        maxConcurrent : int
+            The maximum number of requests in flight across all tenants
+        tenantRate : float
+            The default number of requests per second for each tenant, or
+            None for no per-tenant limit
+        tenantBurst : int
+            The default number of requests each tenant may send at once
+        """
+        self.serverUrl = server_url(env)
+        self.sdkName = "Python"
+        self.sdkVersion = "2022.4.32.0"
+        self.machineName = platform.uname().node
+        self.applicationName = appname
+        self.headers = {"Accept": "application/json",
+                        "SdkName": self.sdkName,
+                        "SdkVersion": self.sdkVersion,
+                        "MachineName": self.machineName,
+                        "ApplicationName": self.applicationName}
+        self.tenantRate = tenantRate
+        self.tenantBurst = tenantBurst
+        self.gate = FairGate(maxConcurrent)
+        self.transport = RequestsTransport(poolMaxSize=maxConcurrent)
+        self.metrics = None
+        self.tracer = NOOP_TRACER
+        self.rateLimiter = None
+        self.resultCache = None
+        self.slowRequestThreshold = None
+        self.slowRequestLogger = None
+        self.profileDirectory = None
+        self._tenants = {}
+        self._lock = threading.Lock()
+
+    def add_tenant(self, tenantId: str, apiKey: str = None, bearerToken: str = None, rate: float = None, burst: int = None) -> TenantClient:
+        """
+        Returns the client of a tenant, creating it if needed. Calling
+        this again for an existing tenant replaces its credentials, for
+        example with a refreshed bearer token, without affecting requests
+        already in flight.
+
+        Parameters
+        ----------
+        tenantId : str
+            A name for the tenant, unique within the pool
+        apiKey : str
+            The tenant's [Lockstep Platform API
+            key](https://developer.lockstep.io/docs/api-keys)
+        bearerToken : str
+            The tenant's [Lockstep Platform JWT Bearer
+            Token](https://developer.lockstep.io/docs/jwt-bearer-tokens)
+        rate : float
+            The number of requests per second for this tenant; defaults
+            to the pool's `tenantRate`
+        burst : int
+            The number of requests this tenant may send at once; defaults
+            to the pool's `tenantBurst`
+        """
+        with self._lock:
+            tenant = self._tenants.get(tenantId)
+            if tenant is None:
+                rate = rate or self.tenantRate
+                limiter = RateLimiter(rate, burst or self.tenantBurst) if rate else None
+                tenant = self._tenants[tenantId] = TenantClient(self, tenantId, limiter)
+        if apiKey is not None:
+            tenant.with_api_key(apiKey)
+        elif bearerToken is not None:
+            tenant.with_bearer_token(bearerToken)
+        return tenant
+
+    def tenant(self, tenantId: str) -> TenantClient:
+        """
+        Returns the client of a tenant added with `add_tenant`
+
+        Parameters
+        ----------
+        tenantId : str
+            The name of the tenant
+        """
+        return self._tenants[tenantId]
+
+    def remove_tenant(self, tenantId: str):
+        """
+        Forgets a tenant; requests it has in flight still complete
+
+        Parameters
+        ----------
+        tenantId : str
+            The name of the tenant
+        """
+        with self._lock:
+            self._tenants.pop(tenantId, None)
+
+    def __contains__(self, tenantId: str) -> bool:
+        return tenantId in self._tenants
+
+    def __len__(self) -> int:
+        return len(self._tenants)
+
+    def enable_metrics(self, recorder=None):
+        """Record per-endpoint request metrics for every tenant
+
+        Parameters
+        ----------
+        recorder : MetricsRecorder
+            An existing recorder to use, or None to create a new one
+        """
+        from lockstep.metrics import MetricsRecorder
+        self.metrics = recorder or MetricsRecorder()
+        return self.metrics
+
+    def disable_metrics(self):
+        """Stop recording request metrics"""
+        self.metrics = None
+
+    def with_tracer(self, tracer):
+        """Report tracing spans for every tenant
+
+        Parameters
+        ----------
+        tracer : Tracer
+            The tracer to report spans to, or None to stop tracing
+        """
+        self.tracer = tracer or NOOP_TRACER
+
+    def with_transport(self, transport):
+        """Configure the transport every tenant sends requests through
+
+        Parameters
+        ----------
+        transport : Transport
+            The transport to use, or None to restore the default
+        """
+        self.transport = transport or RequestsTransport(poolMaxSize=self.gate.limit)
+
+    def with_http2(self, maxConnections: int = 4, maxStreamsPerConnection: int = 100, priorKnowledge: bool = False):
+        """Send every tenant's requests over shared HTTP/2 connections
+
+        See `LockstepApi.with_http2`.
+
+        Parameters
+        ----------
+        maxConnections : int
+            The maximum number of connections to the server
+        maxStreamsPerConnection : int
+            The maximum number of concurrent requests per connection
+        priorKnowledge : bool
+            True to speak HTTP/2 without negotiation, for servers on
+            cleartext `http://` URLs
+        """
+        from lockstep.transports import HttpxTransport
+        self.transport = HttpxTransport(True, maxConnections, maxStreamsPerConnection, priorKnowledge)
+
+    def with_rate_limiter(self, rateLimiter: RateLimiter):
+        """Limit the total rate of requests across all tenants
+
+        Parameters
+        ----------
+        rateLimiter : RateLimiter
+            The limiter to use, or None to stop limiting requests
+        """
+        self.rateLimiter = rateLimiter
+
+    def with_result_cache(self, resultCache):
+        """Cache slowly changing results, such as reports, for every tenant
+
+        Each tenant only sees its own cached results.
+
+        Parameters
+        ----------
+        resultCache : ResultCache
+            The cache to use, or None to stop caching
+        """
+        self.resultCache = resultCache
+
+    def with_slow_request_log(self, threshold: float, profileDirectory: str = None, logger: logging.Logger = None):
+        """Log API calls of any tenant that take longer than a threshold
+
+        See `LockstepApi.with_slow_request_log`.
+
+        Parameters
+        ----------
+        threshold : float
+            The number of seconds above which a call is logged, or None
+            to stop logging slow calls
+        profileDirectory : str
+            If set, slow decodes are profiled into this directory
+        logger : logging.Logger
+            The logger to write to; defaults to the `lockstep` logger
+        """
+        self.slowRequestThreshold = threshold
+        self.profileDirectory = profileDirectory
+        self.slowRequestLogger = logger or logging.getLogger("lockstep")
+
+    def close(self):
+        """Close the connections shared by every tenant"""
+        self.transport.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
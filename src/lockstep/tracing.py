@@ -0,0 +1,211 @@
+#
+# Lockstep Software Development Kit for Python
+#
+# (c) 2021-2022 Lockstep, Inc.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+#
+# @author     Ted Spence <tspence@lockstep.io>
+# @copyright  2021-2022 Lockstep, Inc.
+# @version    2022.4
+# @link       https://github.com/Lockstep-Network/lockstep-sdk-python
+#
+
+import contextvars
+
+"""
+Tracing hooks for Lockstep Platform API calls and the higher-level
+operations built on them.
+
+The client opens these spans:
+
+* `lockstep.request` around each `send_request` call, with the
+  `lockstep.http` span for the HTTP exchange and `lockstep.decode` for
+  JSON decoding as children
+* `lockstep.http.ttfb` (connect, send and wait for the response headers)
+  and `lockstep.http.body` (download the response body) inside each
+  `lockstep.http` span
+* `lockstep.scan`, `lockstep.retrieve_many`, `lockstep.bulk_update`,
+  `lockstep.sync_upload`, `lockstep.sharded_sync`,
+  `lockstep.attachment_export`, `lockstep.parquet_export`,
+  `lockstep.record_export` and `lockstep.dashboard` around the helpers
+  of the same name
+
+Helpers that yield, such as `scan_pages`, open their span without making
+it current, so spans the caller opens between pages are not children of
+the scan; the span is made current only around the requests the helper
+sends. Work submitted to thread pools runs in a copy of the caller's
+context via `propagate`, so spans started on worker threads keep their
+parent.
+"""
+
+
+class Span:
+    """
+    A span that records nothing. Spans are used as context managers and
+    accept attributes while they are open.
+    """
+
+    def set_attribute(self, key: str, value: object):
+        pass
+
+    def activate(self):
+        """
+        Returns a context manager that makes this span the current span
+        while it is open, for spans started with `current=False`.
+        """
+        return _NOOP_SPAN
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class Tracer:
+    """
+    The tracing hook interface. Implementations return a context
+    manager from `start_span`; spans started while another span is open
+    are its children.
+
+    `enabled` tells the client whether it needs to measure anything;
+    when it is False, requests take the same path as with no tracer.
+    """
+
+    enabled = False
+
+    def start_span(self, name: str, attributes: dict = None, current: bool = True) -> Span:
+        """
+        Starts a span, as a child of the current span, that ends when its
+        context manager exits.
+
+        Parameters
+        ----------
+        name : str
+            The name of the span
+        attributes : dict
+            Attributes to attach to the span when it starts
+        current : bool
+            True to make the span current while its context manager is
+            open; generators pass False and call `span.activate()` around
+            their own work instead, so the span is not current while the
+            caller runs between yields
+        """
+        return _NOOP_SPAN
+
+
+class NoopTracer(Tracer):
+    """
+    The default tracer, which records nothing and costs only a method
+    call per span.
+    """
+
+
+_NOOP_SPAN = Span()
+NOOP_TRACER = NoopTracer()
+
+
+class OpenTelemetryTracer(Tracer):
+    """
+    Sends spans to [OpenTelemetry](https://opentelemetry.io/). Requires
+    the `opentelemetry-api` package.
+    """
+
+    enabled = True
+
+    def __init__(self, tracer=None):
+        """
+        Construct a new OpenTelemetry tracer adapter
+
+        Parameters
+        ----------
+        tracer : opentelemetry.trace.Tracer
+            The tracer to create spans with; defaults to the tracer named
+            `lockstep-sdk` from the global tracer provider
+        """
+        if tracer is None:
+            try:
+                from opentelemetry import trace
+            except ImportError:
+                raise ImportError("OpenTelemetryTracer requires the opentelemetry-api package") from None
+            tracer = trace.get_tracer("lockstep-sdk")
+        self._tracer = tracer
+
+    def start_span(self, name: str, attributes: dict = None, current: bool = True) -> Span:
+        from opentelemetry import context
+        # The parent is taken explicitly from the context the span starts in
+        return _OpenTelemetrySpan(self._tracer.start_span(name, context=context.get_current(), attributes=attributes), current)
+
+
+class _OpenTelemetrySpan(Span):
+    """
+    An OpenTelemetry span that ends when its context manager exits and is
+    current only while it is activated.
+    """
+
+    def __init__(self, span, current: bool):
+        self._span = span
+        self._current = current
+        self._token = None
+
+    def set_attribute(self, key: str, value: object):
+        self._span.set_attribute(key, value)
+
+    def activate(self):
+        from opentelemetry import trace
+        return trace.use_span(self._span, end_on_exit=False)
+
+    def __enter__(self):
+        if self._current:
+            from opentelemetry import context, trace
+            self._token = context.attach(trace.set_span_in_context(self._span))
+        return self
+
+    def __exit__(self, excType, exc, traceback):
+        from opentelemetry import context, trace
+        if self._token is not None:
+            context.detach(self._token)
+            self._token = None
+        # A generator closed early by its caller exits with GeneratorExit, which is not a failure
+        if exc is not None and not isinstance(exc, GeneratorExit):
+            self._span.record_exception(exc)
+            self._span.set_status(trace.Status(trace.StatusCode.ERROR, f"{excType.__name__}: {exc}"))
+        self._span.end()
+        return False
+
+
+def propagate(function):
+    """
+    Wraps a function so that every call, such as one made on a worker
+    thread of a `ThreadPoolExecutor`, runs in a copy of the context that
+    was current when `propagate` was called. Spans started by the
+    function are then children of the caller's current span.
+
+    Parameters
+    ----------
+    function : callable
+        The function to wrap
+    """
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        # Each call gets its own copy, since one context cannot be entered by two threads
+        return context.copy().run(function, *args, **kwargs)
+
+    return run
+
+
+def tracer_for(query) -> Tracer:
+    """
+    Returns the tracer of the API client behind a bound client method,
+    such as `client.invoices.query_invoices`.
+
+    Parameters
+    ----------
+    query : callable
+        A bound method of one of the `lockstep.clients` classes
+    """
+    client = getattr(getattr(query, "__self__", None), "client", None)
+    return getattr(client, "tracer", NOOP_TRACER)
@@ -0,0 +1,654 @@
+#
+# Lockstep Software Development Kit for Python
+#
+# (c) 2021-2022 Lockstep, Inc.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+#
+# @author     Ted Spence <tspence@lockstep.io>
+# @copyright  2021-2022 Lockstep, Inc.
+# @version    2022.4
+# @link       https://github.com/Lockstep-Network/lockstep-sdk-python
+#
+
+import asyncio
+import base64
+import collections
+import datetime
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import types
+import urllib.parse
+import requests
+from requests.structures import CaseInsensitiveDict
+
+"""
+HTTP transports for `LockstepApi` and `AsyncLockstepApi`
+
+A transport sends one request and returns an object with the parts of
+the `requests.Response` interface used by the SDK: `status_code`,
+`headers`, `content`, `text`, `json()`, `iter_content()`, `elapsed`,
+`request.headers` and `close()`.
+"""
+
+
+class Transport:
+    """
+    The interface between `LockstepApi` and the network. Install a
+    transport with `LockstepApi.with_transport()`.
+    """
+
+    def request(self, method: str, url: str, headers: dict = None, data: object = None, stream: bool = False):
+        """
+        Sends a request and returns the response. Unless `stream` is
+        True the body is read before returning.
+
+        Parameters
+        ----------
+        method : str
+            The HTTP method for this request
+        url : str
+            The full URL of the request
+        headers : dict
+            The request headers
+        data : object
+            The request body, as bytes or an iterable of byte chunks
+        stream : bool
+            True to return before the response body has been read; the
+            caller must close the response
+        """
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class RequestsTransport(Transport):
+    """
+    The default transport, which sends requests through a `requests`
+    session so that connections are pooled and kept alive between
+    calls.
+    """
+
+    def __init__(self, poolConnections: int = 10, poolMaxSize: int = 32, timeout: float = None):
+        """
+        Construct a new requests transport
+
+        Parameters
+        ----------
+        poolConnections : int
+            The number of hosts to keep connection pools for
+        poolMaxSize : int
+            The maximum number of idle connections kept per host; set it
+            to the number of threads sharing the client
+        timeout : float
+            The network timeout in seconds, or None to wait forever
+        """
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=poolConnections, pool_maxsize=poolMaxSize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.timeout = timeout
+
+    def request(self, method: str, url: str, headers: dict = None, data: object = None, stream: bool = False) -> requests.Response:
+        return self.session.request(method, url, headers=headers, data=data, stream=stream, timeout=self.timeout)
+
+    def close(self):
+        self.session.close()
+
+
+class StaticResponse:
+    """
+    A response held in memory, as returned by `FakeTransport` and
+    `CassetteTransport`.
+    """
+
+    def __init__(self, status_code: int, content: bytes = b"", headers: dict = None, elapsed: float = 0.0, url: str = None, requestHeaders: dict = None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = CaseInsensitiveDict(headers or {})
+        self.elapsed = datetime.timedelta(seconds=elapsed)
+        self.url = url
+        self.request = types.SimpleNamespace(headers=CaseInsensitiveDict(requestHeaders or {}))
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+    def iter_content(self, chunk_size: int = 1):
+        for offset in range(0, len(self.content), chunk_size):
+            yield self.content[offset:offset + chunk_size]
+
+    def close(self):
+        pass
+
+
+def _read_body(data: object) -> bytes:
+    if data is None:
+        return b""
+    if isinstance(data, str):
+        return data.encode("utf-8")
+    if isinstance(data, (bytes, bytearray)):
+        return bytes(data)
+    return b"".join(data)
+
+
+def _request_headers(headers: dict, body: bytes) -> dict:
+    result = dict(headers or {})
+    if body:
+        result["Content-Length"] = str(len(body))
+    return result
+
+
+class FakeRequest:
+    """
+    A request received by a `FakeTransport`.
+    """
+
+    def __init__(self, method: str, url: str, headers: dict, body: bytes):
+        parsed = urllib.parse.urlsplit(url)
+        self.method = method
+        self.url = url
+        self.path = parsed.path
+        self.query = dict(urllib.parse.parse_qsl(parsed.query, keep_blank_values=True))
+        self.headers = CaseInsensitiveDict(headers or {})
+        self.body = body
+        self.match = None
+
+    def json(self):
+        return json.loads(self.body) if self.body else None
+
+
+class FakeTransport(Transport):
+    """
+    Answers requests in-process from registered routes, without any
+    network traffic. Unmatched requests receive a 404 response. Every
+    request is kept in `requests` for inspection.
+
+        fake = FakeTransport()
+        fake.add("GET", r"/api/v1/Invoices/query", {"records": [], "totalCount": 0})
+        client.with_transport(fake)
+    """
+
+    def __init__(self, latency: float = 0.0, keepRequests: bool = True):
+        """
+        Construct a new fake transport
+
+        Parameters
+        ----------
+        latency : float
+            Seconds to wait before answering each request
+        keepRequests : bool
+            True to keep every request in `requests`; turn this off for
+            long load tests
+        """
+        self.latency = latency
+        self.keepRequests = keepRequests
+        self.routes = []
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def add(self, method: str, path: str, response: object, status: int = 200, headers: dict = None):
+        """
+        Registers a route. Routes are matched in the order they were
+        added.
+
+        Parameters
+        ----------
+        method : str
+            The HTTP method to match
+        path : str
+            A regular expression that must match the whole URL path
+        response : object
+            The response: a callable taking the `FakeRequest` and
+            returning a response or payload, a `StaticResponse`, bytes,
+            or a payload to send as JSON
+        status : int
+            The status code for bytes and payload responses
+        headers : dict
+            Headers for bytes and payload responses
+        """
+        self.routes.append((method.upper(), re.compile(path), response, status, headers))
+        return self
+
+    def request(self, method: str, url: str, headers: dict = None, data: object = None, stream: bool = False) -> StaticResponse:
+        body = _read_body(data)
+        request = FakeRequest(method.upper(), url, headers, body)
+        if self.keepRequests:
+            with self._lock:
+                self.requests.append(request)
+        if self.latency:
+            time.sleep(self.latency)
+        for routeMethod, pattern, response, status, routeHeaders in self.routes:
+            match = pattern.fullmatch(request.path)
+            if routeMethod == request.method and match:
+                request.match = match
+                if callable(response):
+                    response = response(request)
+                return self._response(response, status, routeHeaders, url, _request_headers(headers, body))
+        return self._response({"type": "about:blank", "title": "Not Found", "status": 404}, 404, None, url, _request_headers(headers, body))
+
+    def _response(self, response: object, status: int, headers: dict, url: str, requestHeaders: dict) -> StaticResponse:
+        if isinstance(response, StaticResponse):
+            return response
+        if isinstance(response, bytes):
+            return StaticResponse(status, response, headers, url=url, requestHeaders=requestHeaders)
+        responseHeaders = {"Content-Type": "application/json"}
+        responseHeaders.update(headers or {})
+        return StaticResponse(status, json.dumps(response).encode("utf-8"), responseHeaders, url=url, requestHeaders=requestHeaders)
+
+
+class CassetteMissError(LookupError):
+    """
+    Raised when a replaying `CassetteTransport` has no recorded
+    response for a request.
+    """
+
+
+class CassetteTransport(Transport):
+    """
+    Records API responses to a gzip-compressed cassette file and replays
+    them later without the network, for repeatable offline performance
+    runs.
+
+    Requests are matched on method, path, query parameters and, when
+    `matchBody` is True, a hash of the request body; the server address
+    and credentials are ignored. When the same request was recorded
+    several times its responses are replayed in recorded order, starting
+    over after the last one.
+
+    Each line of the cassette is one JSON interaction, so cassettes can
+    be inspected with `zcat`.
+    """
+
+    def __init__(self, path: str, mode: str = "auto", inner: Transport = None, timing: str = "fast", matchBody: bool = True):
+        """
+        Construct a new cassette transport
+
+        Parameters
+        ----------
+        path : str
+            The cassette file, conventionally ending in `.jsonl.gz`
+        mode : str
+            `record` to send requests through `inner` and save the
+            responses, `replay` to answer from the cassette, or `auto` to
+            replay when the cassette exists and record otherwise
+        inner : Transport
+            The transport to record from; defaults to a
+            `RequestsTransport`
+        timing : str
+            When replaying, `fast` to answer immediately or `recorded` to
+            wait as long as the original request took
+        matchBody : bool
+            True to tell apart requests that differ only in their body
+        """
+        if mode == "auto":
+            mode = "replay" if os.path.exists(path) else "record"
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode {mode!r}")
+        if timing not in ("fast", "recorded"):
+            raise ValueError(f"Unknown cassette timing {timing!r}")
+        self.path = path
+        self.mode = mode
+        self.timing = timing
+        self.matchBody = matchBody
+        self._lock = threading.Lock()
+        self._interactions = collections.defaultdict(list)
+        self._positions = collections.Counter()
+        self._file = None
+        if mode == "record":
+            self.inner = inner or RequestsTransport()
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = gzip.open(path, "wt", encoding="utf-8")
+        else:
+            self.inner = None
+            self._load()
+
+    def _key(self, method: str, url: str, body: bytes) -> str:
+        parsed = urllib.parse.urlsplit(url)
+        query = urllib.parse.urlencode(sorted(urllib.parse.parse_qsl(parsed.query, keep_blank_values=True)))
+        key = f"{method.upper()} {parsed.path}?{query}"
+        if self.matchBody and body:
+            key += " " + hashlib.sha256(body).hexdigest()
+        return key
+
+    def _load(self):
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    interaction = json.loads(line)
+                    self._interactions[interaction["key"]].append(interaction)
+
+    def request(self, method: str, url: str, headers: dict = None, data: object = None, stream: bool = False) -> StaticResponse:
+        body = _read_body(data)
+        key = self._key(method, url, body)
+        if self.mode == "record":
+            return self._record(key, method, url, headers, body)
+        with self._lock:
+            recorded = self._interactions.get(key)
+            if not recorded:
+                raise CassetteMissError(f"No recorded response for {key}")
+            interaction = recorded[self._positions[key] % len(recorded)]
+            self._positions[key] += 1
+        if self.timing == "recorded":
+            time.sleep(interaction["elapsed"])
+        content = base64.b64decode(interaction["base64"]) if "base64" in interaction else interaction["text"].encode("utf-8")
+        return StaticResponse(interaction["status"], content, interaction["headers"], interaction["ttfb"], url, _request_headers(headers, body))
+
+    def _record(self, key: str, method: str, url: str, headers: dict, body: bytes) -> StaticResponse:
+        start = time.perf_counter()
+        response = self.inner.request(method, url, headers=headers, data=body or None)
+        try:
+            content = response.content
+        finally:
+            response.close()
+        elapsed = time.perf_counter() - start
+        responseHeaders = {name: value for name, value in response.headers.items() if name.lower() not in ("content-encoding", "transfer-encoding", "set-cookie")}
+        interaction = {"key": key, "status": response.status_code, "headers": responseHeaders,
+                       "ttfb": round(response.elapsed.total_seconds(), 6), "elapsed": round(elapsed, 6)}
+        try:
+            interaction["text"] = content.decode("utf-8")
+        except UnicodeDecodeError:
+            interaction["base64"] = base64.b64encode(content).decode("ascii")
+        with self._lock:
+            self._file.write(json.dumps(interaction) + "\n")
+        return StaticResponse(response.status_code, content, responseHeaders, interaction["ttfb"], url, _request_headers(headers, body))
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        if self.inner is not None:
+            self.inner.close()
+
+
+def _import_httpx(http2: bool, fallback: bool):
+    """
+    Returns the `httpx` module and whether HTTP/2 can be used.
+    """
+    try:
+        import httpx
+    except ImportError:
+        raise ImportError("The httpx transports require the httpx package; install it with `pip install httpx[http2]`") from None
+    if not http2:
+        return httpx, False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        if not fallback:
+            raise ImportError("HTTP/2 requires the h2 package; install it with `pip install httpx[http2]`") from None
+        return httpx, False
+    return httpx, True
+
+
+def _content(headers: dict, data: object):
+    """
+    Converts a request body into `httpx` content, setting Content-Length
+    for streamed bodies of known length such as `MultipartUpload`.
+    """
+    if data is None or isinstance(data, (bytes, str)):
+        return data
+    length = getattr(data, "len", None)
+    if length is not None:
+        headers["Content-Length"] = str(length)
+    return data
+
+
+class HttpxResponse:
+    """
+    An `httpx` response presented through the parts of the
+    `requests.Response` interface used by the SDK: `status_code`,
+    `headers`, `content`, `json()`, `iter_content()`, `elapsed` and
+    `close()`.
+    """
+
+    def __init__(self, response, elapsed: float, release=None):
+        self._response = response
+        self._release = release
+        self.elapsed = datetime.timedelta(seconds=elapsed)
+
+    @property
+    def httpVersion(self) -> str:
+        """The HTTP version of the exchange, such as `HTTP/2`"""
+        return self._response.http_version
+
+    @property
+    def content(self) -> bytes:
+        """The response body, read and released on first use"""
+        return self.read()
+
+    def read(self) -> bytes:
+        """Reads the whole response body and releases its connection slot"""
+        try:
+            return self._response.read()
+        finally:
+            self.close()
+
+    def iter_content(self, chunk_size: int = 1):
+        try:
+            yield from self._response.iter_bytes(chunk_size)
+        finally:
+            self.close()
+
+    def close(self):
+        # Async responses are read and closed by their transport before they are returned
+        if not self._response.is_closed:
+            self._response.close()
+        if self._release is not None:
+            self._release()
+            self._release = None
+
+    def __getattr__(self, name: str):
+        return getattr(self._response, name)
+
+
+class HttpxTransport(Transport):
+    """
+    Sends requests with [httpx](https://www.python-httpx.org/), optionally
+    over HTTP/2 so that many concurrent requests are multiplexed over a
+    few connections instead of one socket each.
+
+    The number of requests in flight is limited to `maxConnections *
+    maxStreamsPerConnection`; further requests wait for a free slot.
+    When the `h2` package is missing, or the server does not negotiate
+    HTTP/2, requests fall back to HTTP/1.1.
+    """
+
+    def __init__(self, http2: bool = True, maxConnections: int = 4, maxStreamsPerConnection: int = 100, priorKnowledge: bool = False, fallback: bool = True, timeout: float = 60.0):
+        """
+        Construct a new httpx transport
+
+        Parameters
+        ----------
+        http2 : bool
+            True to use HTTP/2 when the server supports it
+        maxConnections : int
+            The maximum number of connections to the server. With HTTP/1.1
+            each connection carries one request at a time, so the limit
+            is raised to the maximum number of requests in flight.
+        maxStreamsPerConnection : int
+            The maximum number of concurrent requests per HTTP/2
+            connection
+        priorKnowledge : bool
+            True to speak HTTP/2 without negotiation, which is needed for
+            servers on cleartext `http://` URLs
+        fallback : bool
+            True to use HTTP/1.1 when the `h2` package is not installed
+            rather than raising an ImportError
+        timeout : float
+            The network timeout in seconds
+        """
+        httpx, self.http2 = _import_httpx(http2, fallback)
+        self.maxConcurrentRequests = maxConnections * maxStreamsPerConnection
+        self._client = httpx.Client(**self._client_options(httpx, maxConnections, priorKnowledge, timeout))
+        self._slots = threading.BoundedSemaphore(self.maxConcurrentRequests)
+
+    def _client_options(self, httpx, maxConnections: int, priorKnowledge: bool, timeout: float) -> dict:
+        connections = maxConnections if self.http2 else self.maxConcurrentRequests
+        return {
+            "http1": not (self.http2 and priorKnowledge),
+            "http2": self.http2,
+            "limits": httpx.Limits(max_connections=connections, max_keepalive_connections=connections),
+            "timeout": timeout,
+        }
+
+    def request(self, method: str, url: str, headers: dict = None, data: object = None, stream: bool = False) -> HttpxResponse:
+        """
+        Sends a request and returns the response. Unless `stream` is
+        True the body is read before returning.
+
+        Parameters
+        ----------
+        method : str
+            The HTTP method for this request
+        url : str
+            The full URL of the request
+        headers : dict
+            The request headers
+        data : object
+            The request body, as bytes or an iterable of byte chunks
+        stream : bool
+            True to return before the response body has been read; the
+            caller must close the response
+        """
+        headers = dict(headers or {})
+        content = _content(headers, data)
+        self._slots.acquire()
+        try:
+            start = time.perf_counter()
+            response = self._client.send(self._client.build_request(method, url, headers=headers, content=content), stream=True)
+            result = HttpxResponse(response, time.perf_counter() - start, self._slots.release)
+            if not stream:
+                result.read()
+            return result
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def close(self):
+        self._client.close()
+
+
+class AsyncHttpxTransport(HttpxTransport):
+    """
+    The asyncio version of `HttpxTransport`, used by `AsyncLockstepApi`.
+    """
+
+    def __init__(self, http2: bool = True, maxConnections: int = 4, maxStreamsPerConnection: int = 100, priorKnowledge: bool = False, fallback: bool = True, timeout: float = 60.0):
+        httpx, self.http2 = _import_httpx(http2, fallback)
+        self.maxConcurrentRequests = maxConnections * maxStreamsPerConnection
+        self._client = httpx.AsyncClient(**self._client_options(httpx, maxConnections, priorKnowledge, timeout))
+        self._slots = asyncio.Semaphore(self.maxConcurrentRequests)
+
+    async def request(self, method: str, url: str, headers: dict = None, data: object = None) -> HttpxResponse:
+        """
+        Sends a request and returns the response with its body read.
+
+        Parameters
+        ----------
+        method : str
+            The HTTP method for this request
+        url : str
+            The full URL of the request
+        headers : dict
+            The request headers
+        data : object
+            The request body, as bytes or an iterable of byte chunks
+        """
+        headers = dict(headers or {})
+        content = _content(headers, data)
+        if content is not None and not isinstance(content, (bytes, str)) and not hasattr(content, "__aiter__"):
+            content = _aiter(content)
+        async with self._slots:
+            start = time.perf_counter()
+            response = await self._client.send(self._client.build_request(method, url, headers=headers, content=content), stream=True)
+            elapsed = time.perf_counter() - start
+            try:
+                await response.aread()
+            finally:
+                await response.aclose()
+        return HttpxResponse(response, elapsed)
+
+    def close(self):
+        raise TypeError("Use `await transport.aclose()` to close an AsyncHttpxTransport")
+
+    async def aclose(self):
+        await self._client.aclose()
+
+
+class AsyncTransportAdapter:
+    """
+    Lets `AsyncLockstepApi` use a blocking transport, such as a
+    `FakeTransport` or `CassetteTransport`, by sending each request on a
+    worker thread so that the event loop is never blocked.
+    """
+
+    def __init__(self, transport: Transport):
+        """
+        Construct a new adapter
+
+        Parameters
+        ----------
+        transport : Transport
+            The blocking transport to send requests through
+        """
+        self.transport = transport
+
+    async def request(self, method: str, url: str, headers: dict = None, data: object = None):
+        """
+        Sends a request on a worker thread and returns the response with
+        its body read.
+
+        Parameters
+        ----------
+        method : str
+            The HTTP method for this request
+        url : str
+            The full URL of the request
+        headers : dict
+            The request headers
+        data : object
+            The request body, as bytes or an iterable of byte chunks
+        """
+        return await asyncio.to_thread(self._request, method, url, headers, data)
+
+    def _request(self, method: str, url: str, headers: dict, data: object):
+        response = self.transport.request(method, url, headers, data)
+        try:
+            response.content
+        finally:
+            response.close()
+        return response
+
+    def close(self):
+        raise TypeError("Use `await transport.aclose()` to close an AsyncTransportAdapter")
+
+    async def aclose(self):
+        self.transport.close()
+
+
+async def _aiter(chunks):
+    for chunk in chunks:
+        yield chunk
@@ -0,0 +1,62 @@
+#
+# Lockstep Software Development Kit for Python
+#
+# (c) 2021-2022 Lockstep, Inc.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+#
+# @author     Ted Spence <tspence@lockstep.io>
+# @copyright  2021-2022 Lockstep, Inc.
+# @version    2022.4
+# @link       https://github.com/Lockstep-Network/lockstep-sdk-python
+#
+
+import pytest
+from lockstep import FakeTransport, LockstepApi, sync_tracker
+
+
+class Clock:
+    """Replaces the `time` module of the code under test so that tests do not sleep"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def perf_counter(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.now += seconds
+
+
+def paged(records: list[dict]):
+    """Returns a FakeTransport responder that pages through `records`"""
+    def respond(request):
+        pageSize = int(request.query.get("pageSize") or 200)
+        pageNumber = int(request.query.get("pageNumber") or 0)
+        page = records[pageNumber * pageSize:(pageNumber + 1) * pageSize]
+        return {"records": page, "totalCount": len(records), "pageSize": pageSize, "pageNumber": pageNumber}
+    return respond
+
+
+@pytest.fixture
+def fake() -> FakeTransport:
+    return FakeTransport()
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(sync_tracker, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def client(fake) -> LockstepApi:
+    client = LockstepApi("https://api.example.com", "lockstep-tests")
+    client.with_api_key("test")
+    client.with_transport(fake)
+    return client
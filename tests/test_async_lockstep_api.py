@@ -0,0 +1,126 @@
+#
+# Lockstep Software Development Kit for Python
+#
+# (c) 2021-2022 Lockstep, Inc.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+#
+# @author     Ted Spence <tspence@lockstep.io>
+# @copyright  2021-2022 Lockstep, Inc.
+# @version    2022.4
+# @link       https://github.com/Lockstep-Network/lockstep-sdk-python
+#
+
+import asyncio
+import json
+import pytest
+import lockstep.lockstep_api
+from lockstep import FakeTransport, InvoiceModel, ModelDecoder
+from lockstep.transports import AsyncTransportAdapter
+
+httpx = pytest.importorskip("httpx")
+from lockstep import AsyncLockstepApi  # noqa: E402
+from lockstep.transports import AsyncHttpxTransport  # noqa: E402
+
+
+def async_client(handler) -> AsyncLockstepApi:
+    client = AsyncLockstepApi("https://api.example.com", "lockstep-tests", maxConnections=1, maxStreamsPerConnection=3)
+    client.with_api_key("test")
+    # Answer requests in-process while keeping the transport's concurrency limit
+    client.transport._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client
+
+
+def test_requests_are_awaitable_and_limited_to_the_stream_count():
+    inFlight = []
+    peak = []
+
+    async def handler(request):
+        inFlight.append(request)
+        peak.append(len(inFlight))
+        await asyncio.sleep(0.01)
+        inFlight.remove(request)
+        return httpx.Response(200, json={"invoiceId": request.url.path.rsplit("/", 1)[1]})
+
+    async def run():
+        async with async_client(handler) as client:
+            return await asyncio.gather(*[client.invoices.retrieve_invoice(f"invoice-{i}", None) for i in range(10)])
+
+    assert asyncio.run(run()) == [{"invoiceId": f"invoice-{i}"} for i in range(10)]
+    assert max(peak) == 3
+
+
+def test_bodies_are_sent_as_json_and_metrics_are_recorded():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json=json.loads(request.content))
+
+    async def run():
+        async with async_client(handler) as client:
+            recorder = client.enable_metrics()
+            result = await client.invoices.create_invoices([InvoiceModel(invoiceId="invoice-1", erpKey="INV-1")])
+            return result, recorder.snapshot()
+
+    result, snapshot = asyncio.run(run())
+    assert result == [{"invoiceId": "invoice-1", "erpKey": "INV-1"}]
+    assert requests[0].headers["Content-Type"] == "application/json" and "body" not in requests[0].url.params
+    assert snapshot["POST /api/v1/Invoices"]["count"] == 1
+
+
+def test_streamed_downloads_require_the_blocking_client():
+    client = AsyncLockstepApi("https://api.example.com", "lockstep-tests")
+    with pytest.raises(NotImplementedError):
+        client.send_stream_request("GET", "/api/v1/Attachments/1/download-file", None)
+    asyncio.run(client.aclose())
+
+
+def test_default_transport_is_async_without_building_a_requests_session(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("RequestsTransport should not be created")
+    monkeypatch.setattr(lockstep.lockstep_api, "RequestsTransport", fail)
+    client = AsyncLockstepApi("https://api.example.com", "lockstep-tests")
+    assert isinstance(client.transport, AsyncHttpxTransport)
+    client.with_transport(None)
+    assert isinstance(client.transport, AsyncHttpxTransport)
+
+
+def test_blocking_transports_are_adapted():
+    fake = FakeTransport().add("GET", r"/api/v1/Status", {"status": "ok"})
+
+    async def run():
+        client = AsyncLockstepApi("https://api.example.com", "lockstep-tests")
+        client.with_api_key("test")
+        client.with_transport(fake)
+        assert isinstance(client.transport, AsyncTransportAdapter)
+        results = await asyncio.gather(*[client.status.ping() for _ in range(5)])
+        await client.aclose()
+        return results
+
+    assert asyncio.run(run()) == [{"status": "ok"}] * 5
+    assert len(fake.requests) == 5
+
+
+def test_tracked_patch_sends_only_changes():
+    fake = FakeTransport().add("PATCH", r"/api/v1/Invoices/([^/]+)", lambda request: dict(request.json(), invoiceId=request.match.group(1)))
+
+    async def run():
+        client = AsyncLockstepApi("https://api.example.com", "lockstep-tests")
+        client.with_api_key("test")
+        client.with_transport(fake)
+        invoice = ModelDecoder(trackChanges=True).decode(InvoiceModel, {"invoiceId": "1", "referenceCode": "A", "totalAmount": 10.0})
+        unchanged = await client.invoices.update_invoice("1", invoice)
+        invoice.totalAmount = 12.5
+        changed = await client.invoices.update_invoice("1", invoice)
+        again = await client.invoices.update_invoice("1", invoice)
+        await client.aclose()
+        return unchanged, changed, again
+
+    unchanged, changed, again = asyncio.run(run())
+    assert unchanged["referenceCode"] == "A"
+    assert changed == {"totalAmount": 12.5, "invoiceId": "1"}
+    # A successful PATCH restarts tracking, so nothing is left to send
+    assert again["totalAmount"] == 12.5
+    assert [request.json() for request in fake.requests] == [{"totalAmount": 12.5}]
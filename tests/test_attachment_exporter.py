@@ -0,0 +1,92 @@
+#
+# Lockstep Software Development Kit for Python
+#
+# (c) 2021-2022 Lockstep, Inc.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+#
+# @author     Ted Spence <tspence@lockstep.io>
+# @copyright  2021-2022 Lockstep, Inc.
+# @version    2022.4
+# @link       https://github.com/Lockstep-Network/lockstep-sdk-python
+#
+
+import hashlib
+import json
+from lockstep import AttachmentExporter
+from lockstep.transports import StaticResponse
+from conftest import paged
+
+ATTACHMENTS = [
+    {"attachmentId": f"a-{i}", "tableKey": "Invoice", "objectKey": f"invoice-{i % 2}", "fileName": f"scan {i}.pdf", "isArchived": i == 4}
+    for i in range(6)
+]
+
+
+def contents(id: str) -> bytes:
+    return f"contents of {id}".encode("utf-8") * 50
+
+
+def serve(fake, failing: str = None):
+    fake.add("GET", r"/api/v1/Attachments/query", paged(ATTACHMENTS))
+    fake.add("GET", r"/api/v1/Attachments/(?P<id>[^/]+)/download", lambda request: (
+        StaticResponse(500, b'{"title": "Server Error", "status": 500}') if request.match["id"] == failing else contents(request.match["id"])))
+
+
+def downloads(fake) -> list[str]:
+    return sorted(request.path.split("/")[4] for request in fake.requests if request.path.endswith("/download"))
+
+
+def test_export_writes_files_and_manifest(client, fake, tmp_path):
+    serve(fake)
+    report = AttachmentExporter(client, str(tmp_path), maxWorkers=3).export("tableKey EQ 'Invoice'", pageSize=2)
+    assert (report.downloaded, report.skipped, report.failed) == (5, 0, {})
+    assert report.bytes == sum(len(contents(f"a-{i}")) for i in (0, 1, 2, 3, 5))
+    # Archived attachments are not exported
+    assert downloads(fake) == ["a-0", "a-1", "a-2", "a-3", "a-5"]
+    manifest = {entry["attachmentId"]: entry for entry in json.loads((tmp_path / "manifest.json").read_text())["attachments"]}
+    assert sorted(manifest) == ["a-0", "a-1", "a-2", "a-3", "a-5"]
+    entry = manifest["a-2"]
+    assert entry["file"] == "a-2-scan 2.pdf" and entry["objectKey"] == "invoice-0"
+    assert (tmp_path / entry["file"]).read_bytes() == contents("a-2")
+    assert entry["size"] == len(contents("a-2")) and entry["sha256"] == hashlib.sha256(contents("a-2")).hexdigest()
+
+
+def test_second_export_skips_files_that_match_the_manifest(client, fake, tmp_path):
+    serve(fake)
+    AttachmentExporter(client, str(tmp_path)).export(None)
+    (tmp_path / "a-1-scan 1.pdf").write_bytes(b"truncated")
+    (tmp_path / "a-3-scan 3.pdf").unlink()
+    fake.requests.clear()
+    report = AttachmentExporter(client, str(tmp_path)).export(None)
+    assert (report.downloaded, report.skipped) == (2, 3)
+    assert downloads(fake) == ["a-1", "a-3"]
+    assert (tmp_path / "a-1-scan 1.pdf").read_bytes() == contents("a-1")
+
+
+def test_checksum_verification_catches_files_of_the_same_size(client, fake, tmp_path):
+    serve(fake)
+    AttachmentExporter(client, str(tmp_path)).export(None)
+    (tmp_path / "a-0-scan 0.pdf").write_bytes(b"x" * len(contents("a-0")))
+    fake.requests.clear()
+    assert AttachmentExporter(client, str(tmp_path)).export(None).skipped == 5
+    report = AttachmentExporter(client, str(tmp_path), verifyChecksum=True).export(None)
+    assert (report.downloaded, report.skipped) == (1, 4)
+    assert (tmp_path / "a-0-scan 0.pdf").read_bytes() == contents("a-0")
+
+
+def test_failed_downloads_are_retried_and_reported(client, fake, tmp_path):
+    serve(fake, failing="a-3")
+    report = AttachmentExporter(client, str(tmp_path), retries=2, backoff=0).export(None)
+    assert report.downloaded == 4 and list(report.failed) == ["a-3"]
+    assert downloads(fake).count("a-3") == 3
+    manifest = json.loads((tmp_path / "manifest.json").read_text())["attachments"]
+    assert "a-3" not in {entry["attachmentId"] for entry in manifest}
+
+
+def test_export_for_objects_filters_by_table_and_object(client, fake, tmp_path):
+    serve(fake)
+    AttachmentExporter(client, str(tmp_path)).export_for_objects("Invoice", ["invoice-0", "invoice-1"])
+    query = next(request for request in fake.requests if request.path.endswith("/query"))
+    assert query.query["filter"] == "tableKey EQ 'Invoice' AND objectKey IN ('invoice-0', 'invoice-1')"
@@ -0,0 +1,85 @@
+#
+# Lockstep Software Development Kit for Python
+#
+# (c) 2021-2022 Lockstep, Inc.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+#
+# @author     Ted Spence <tspence@lockstep.io>
+# @copyright  2021-2022 Lockstep, Inc.
+# @version    2022.4
+# @link       https://github.com/Lockstep-Network/lockstep-sdk-python
+#
+
+import re
+import urllib.parse
+import pytest
+from lockstep.batch_retrieve import retrieve_many
+from lockstep.searchlight import chunk_in_filters, in_filter
+
+FILTER = re.compile(r"invoiceId IN \((.*)\)")
+
+
+def in_values(filter: str) -> list[str]:
+    return [value.strip()[1:-1].replace("''", "'") for value in FILTER.fullmatch(filter).group(1).split(",")]
+
+
+def query_invoices(known: set, failing: str = None):
+    def respond(request):
+        values = in_values(request.query["filter"])
+        if failing in values:
+            return {"type": "about:blank", "title": "Bad Request", "status": 400}
+        # Ids are matched without regard to case, as the API does
+        return {"records": [{"invoiceId": value.upper()} for value in values if value in known], "totalCount": None}
+    return respond
+
+
+def test_chunks_respect_item_and_length_limits():
+    values = [f"id-{i:04d}" for i in range(250)] + ["id-0000"]
+    chunks = chunk_in_filters("invoiceId", values, maxItems=40, maxFilterLength=600)
+    assert [value for chunk, _ in chunks for value in chunk] == values[:250]
+    for chunk, filter in chunks:
+        assert len(chunk) <= 40
+        assert len(urllib.parse.quote_plus(filter)) <= 600
+        assert filter == in_filter("invoiceId", chunk)
+
+
+def test_chunks_reject_values_longer_than_a_filter():
+    with pytest.raises(ValueError):
+        chunk_in_filters("invoiceId", ["x" * 100], maxFilterLength=50)
+
+
+def test_retrieve_many_chunks_and_reports_missing_ids(client, fake):
+    ids = [f"id-{i:03d}" for i in range(120)]
+    known = set(ids) - {"id-007", "id-100"}
+    fake.add("GET", r"/api/v1/Invoices/query", query_invoices(known))
+    result = retrieve_many(client.invoices.query_invoices, "invoiceId", ids + ["id-001"], None, maxWorkers=4, pageSize=25)
+    assert list(result.records) == [id for id in ids if id in known]
+    assert result.records["id-001"] == {"invoiceId": "ID-001"}
+    assert result.missing == ["id-007", "id-100"]
+    assert result.failed == [] and result.errors == []
+    assert len(fake.requests) == 5
+    for request in fake.requests:
+        assert request.query["pageSize"] == str(len(in_values(request.query["filter"])))
+        # Parameters that were not supplied are not sent
+        assert "order" not in request.query and "include" not in request.query
+        assert "None" not in request.url
+
+
+def test_retrieve_many_reports_failed_chunks(client, fake):
+    ids = [f"id-{i:03d}" for i in range(30)]
+    fake.add("GET", r"/api/v1/Invoices/query", query_invoices(set(ids), failing="id-015"))
+    result = retrieve_many(client.invoices.query_invoices, "invoiceId", ids, None, pageSize=10)
+    assert result.failed == ids[10:20]
+    assert len(result.errors) == 1 and result.errors[0]["status"] == 400
+    assert list(result.records) == ids[:10] + ids[20:]
+    assert result.missing == []
+
+
+def test_client_retrieve_many(client, fake):
+    ids = [f"id-{i:03d}" for i in range(30)]
+    fake.add("GET", r"/api/v1/Invoices/query", query_invoices(set(ids)))
+    result = client.invoices.retrieve_many(ids, None, maxWorkers=2)
+    assert list(result.records) == ids
+    assert len(fake.requests) == 1
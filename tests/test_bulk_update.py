@@ -0,0 +1,114 @@
+#
+# Lockstep Software Development Kit for Python
+#
+# (c) 2021-2022 Lockstep, Inc.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+#
+# @author     Ted Spence <tspence@lockstep.io>
+# @copyright  2021-2022 Lockstep, Inc.
+# @version    2022.4
+# @link       https://github.com/Lockstep-Network/lockstep-sdk-python
+#
+
+import json
+import pytest
+import lockstep.bulk_update
+import lockstep.rate_limiter
+from lockstep import InvoiceModel, ModelDecoder, RateLimiter
+from lockstep.rate_limiter import retry_after
+from lockstep.transports import StaticResponse
+from conftest import Clock
+
+INVOICES = r"/api/v1/Invoices/(?P<id>[^/]+)"
+
+
+def problem(status: int, title: str) -> dict:
+    return {"type": "about:blank", "title": title, "status": status}
+
+
+@pytest.fixture
+def slowClock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(lockstep.rate_limiter, "time", clock)
+    monkeypatch.setattr(lockstep.bulk_update, "time", clock)
+    return clock
+
+
+def test_429_retry_after_pauses_every_caller(client, fake, slowClock):
+    client.with_rate_limiter(RateLimiter(100))
+    sent = []
+
+    def respond(request):
+        sent.append((request.match["id"], slowClock.now))
+        if len(sent) == 1 or request.match["id"] == "c":
+            delay = "5" if len(sent) == 1 else "30"
+            return StaticResponse(429, json.dumps(problem(429, "Too Many Requests")).encode("utf-8"), {"Retry-After": delay})
+        return {"invoiceId": request.match["id"]}
+
+    fake.add("PATCH", INVOICES, respond)
+    fake.add("GET", INVOICES, lambda request: sent.append(("get", slowClock.now)) or {"invoiceId": "x"})
+    report = client.invoices.bulk_update([("a", {"memoText": "1"}), ("b", {"memoText": "2"})], maxWorkers=1)
+    assert report.succeeded == 2 and report.failed == 0 and report.retries == 1
+    assert report.outcomes["a"].attempts == 2
+    # The retry and the next update both waited for Retry-After, not only the shorter backoff
+    throttledAt = sent[0][1]
+    assert [id for id, at in sent] == ["a", "a", "b"]
+    assert all(at >= throttledAt + 5 for id, at in sent[1:])
+
+    # Any other caller sharing the limiter is held back as well
+    client.invoices.update_invoice("c", {"memoText": "3"})
+    pausedAt = slowClock.now
+    client.invoices.retrieve_invoice("c", None)
+    assert sent[-1] == ("get", pytest.approx(pausedAt + 30))
+
+
+def test_transient_errors_are_retried_then_reported(client, fake, slowClock):
+    recorder = client.enable_metrics()
+    fake.add("PATCH", r"/api/v1/Invoices/b", problem(503, "Service Unavailable"), 503)
+    fake.add("PATCH", r"/api/v1/Invoices/c", problem(400, "Bad Request"), 400)
+    fake.add("PATCH", INVOICES, lambda request: {"invoiceId": request.match["id"]})
+    report = client.invoices.bulk_update([("a", {"memoText": "1"}), ("b", {"memoText": "2"}), ("c", {"memoText": "3"})], retries=2)
+    assert report.succeeded == 1 and report.failed == 2
+    assert sorted(report.failedIds) == ["b", "c"]
+    failed = report.outcomes["b"]
+    assert failed.attempts == 3 and failed.status == 503 and failed.error == "Service Unavailable"
+    assert failed.result == problem(503, "Service Unavailable")
+    # Client errors are not worth retrying
+    assert report.outcomes["c"].attempts == 1 and report.outcomes["c"].status == 400
+    assert report.retries == 2
+    assert recorder.snapshot()["PATCH /api/v1/Invoices/{id}"]["retries"] == 2
+
+
+def test_empty_and_unchanged_updates_are_skipped(client, fake, slowClock):
+    fake.add("PATCH", INVOICES, lambda request: {"invoiceId": request.match["id"]})
+    decoder = ModelDecoder(trackChanges=True)
+    unchanged = decoder.decode(InvoiceModel, {"invoiceId": "d", "referenceCode": "D"})
+    changed = decoder.decode(InvoiceModel, {"invoiceId": "e", "referenceCode": "E", "specialTerms": "net 30"})
+    changed.referenceCode = "F"
+    report = client.invoices.bulk_update([("a", {}), ("b", None), ("c", {"memoText": "3"}), ("d", unchanged), ("e", changed)])
+    assert report.skipped == 3 and report.succeeded == 2
+    assert report.outcomes["a"].skipped and report.outcomes["d"].skipped and report.outcomes["d"].attempts == 0
+    sent = {request.path: request.json() for request in fake.requests}
+    assert sent == {"/api/v1/Invoices/c": {"memoText": "3"}, "/api/v1/Invoices/e": {"referenceCode": "F"}}
+
+
+def test_limiter_paces_requests_to_its_rate(slowClock):
+    limiter = RateLimiter(10, burst=2)
+    times = []
+    for _ in range(6):
+        limiter.acquire()
+        times.append(slowClock.now)
+    start = times[0]
+    # The burst goes out at once, then requests are spaced by 1 / rate
+    assert times == pytest.approx([start, start, start + 0.1, start + 0.2, start + 0.3, start + 0.4])
+    with pytest.raises(ValueError):
+        RateLimiter(0)
+
+
+def test_retry_after_accepts_seconds_and_dates():
+    assert retry_after({"Retry-After": "2.5"}) == 2.5
+    assert retry_after({"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}) == 0.0
+    assert retry_after({"Retry-After": "soon"}) is None
+    assert retry_after({}) is None
@@ -0,0 +1,87 @@
+#
+# Lockstep Software Development Kit for Python
+#
+# (c) 2021-2022 Lockstep, Inc.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+#
+# @author     Ted Spence <tspence@lockstep.io>
+# @copyright  2021-2022 Lockstep, Inc.
+# @version    2022.4
+# @link       https://github.com/Lockstep-Network/lockstep-sdk-python
+#
+
+import gzip
+import json
+import pytest
+from lockstep import CassetteMissError, CassetteTransport, FakeTransport, LockstepApi
+from lockstep import transports
+from lockstep.transports import StaticResponse
+
+
+def cassette_client(transport, url: str = "https://api.example.com") -> LockstepApi:
+    client = LockstepApi(url, "lockstep-tests")
+    client.with_api_key("test")
+    client.with_transport(transport)
+    return client
+
+
+def test_recorded_responses_are_replayed_in_order(tmp_path):
+    path = str(tmp_path / "cassettes" / "run.jsonl.gz")
+    counter = iter(range(1, 100))
+    fake = FakeTransport().add("GET", r"/api/v1/Invoices/query", lambda request: {"records": [], "totalCount": next(counter)})
+    fake.add("GET", r"/api/v1/Attachments/1/download", StaticResponse(200, bytes(range(256)), {"Content-Type": "application/pdf"}))
+    with CassetteTransport(path, "record", inner=fake) as recorder:
+        client = cassette_client(recorder)
+        assert [client.invoices.query_invoices(None, None, None, 10, 0)["totalCount"] for _ in range(2)] == [1, 2]
+        client.send_stream_request("GET", "/api/v1/Attachments/1/download", None).close()
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        interactions = [json.loads(line) for line in f]
+    assert [interaction["key"] for interaction in interactions][0] == "GET /api/v1/Invoices/query?pageNumber=0&pageSize=10"
+    # Binary bodies are stored as base64
+    assert "base64" in interactions[2]
+
+    # Replaying ignores the server address and starts over after the last recorded response
+    replay = cassette_client(CassetteTransport(path), "http://replay.invalid/")
+    assert [replay.invoices.query_invoices(None, None, None, 10, 0)["totalCount"] for _ in range(3)] == [1, 2, 1]
+    assert replay.send_stream_request("GET", "/api/v1/Attachments/1/download", None).content == bytes(range(256))
+    with pytest.raises(CassetteMissError):
+        replay.invoices.query_invoices(None, None, None, 10, 1)
+    assert len(fake.requests) == 3
+
+
+@pytest.mark.parametrize("matchBody", [True, False])
+def test_bodies_are_matched_unless_disabled(tmp_path, matchBody):
+    path = str(tmp_path / "run.jsonl.gz")
+    fake = FakeTransport().add("POST", r"/api/v1/Invoices", lambda request: request.json())
+    with CassetteTransport(path, "record", inner=fake, matchBody=matchBody) as recorder:
+        cassette_client(recorder).invoices.create_invoices([{"invoiceId": "invoice-1"}])
+    replay = cassette_client(CassetteTransport(path, "replay", matchBody=matchBody))
+    assert replay.invoices.create_invoices([{"invoiceId": "invoice-1"}]) == [{"invoiceId": "invoice-1"}]
+    if matchBody:
+        with pytest.raises(CassetteMissError):
+            replay.invoices.create_invoices([{"invoiceId": "invoice-2"}])
+    else:
+        assert replay.invoices.create_invoices([{"invoiceId": "invoice-2"}]) == [{"invoiceId": "invoice-1"}]
+
+
+def test_recorded_timing_waits_as_long_as_the_original_request(tmp_path, monkeypatch):
+    path = str(tmp_path / "run.jsonl.gz")
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write(json.dumps({"key": "GET /api/v1/Status?", "status": 200, "headers": {}, "ttfb": 0.2, "elapsed": 0.25, "text": '{"status": "ok"}'}) + "\n")
+    sleeps = []
+    monkeypatch.setattr(transports.time, "sleep", sleeps.append)
+    assert cassette_client(CassetteTransport(path, timing="recorded")).status.ping() == {"status": "ok"}
+    assert cassette_client(CassetteTransport(path)).status.ping() == {"status": "ok"}
+    assert sleeps == [0.25]
+    with pytest.raises(ValueError):
+        CassetteTransport(path, "rewind")
+
+
+def test_fake_transport_answers_unmatched_requests_with_404():
+    fake = FakeTransport().add("GET", r"/api/v1/Status", {"status": "ok"})
+    client = cassette_client(fake)
+    assert client.status.ping() == {"status": "ok"}
+    assert client.invoices.retrieve_invoice("missing", None)["status"] == 404
+    assert [request.path for request in fake.requests] == ["/api/v1/Status", "/api/v1/Invoices/missing"]
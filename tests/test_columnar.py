@@ -0,0 +1,90 @@
+#
+# Lockstep Software Development Kit for Python
+#
+# (c) 2021-2022 Lockstep, Inc.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+#
+# @author     Ted Spence <tspence@lockstep.io>
+# @copyright  2021-2022 Lockstep, Inc.
+# @version    2022.4
+# @link       https://github.com/Lockstep-Network/lockstep-sdk-python
+#
+
+import pytest
+from lockstep import ColumnarBatch, InvoiceModel, InvoiceSummaryModel, PaymentModel, to_dataframe
+from lockstep.serialization import nested_list_fields
+from conftest import paged
+
+INVOICES = [{"invoiceId": f"invoice-{i:03d}", "invoiceDate": "2022-03-01", "outstandingBalance": float(i), "status": "Open"} for i in range(45)]
+CUSTOMERS = [{"companyId": f"company-{i:03d}", "companyName": f"Company {i}", "outstandingAmount": float(i)} for i in range(45)]
+
+
+def test_batch_columns_and_values():
+    batch = ColumnarBatch.from_records(PaymentModel, [{"paymentId": "a", "paymentAmount": 2.5, "isOpen": True, "currencyCode": "USD"}, {"paymentId": "b"}])
+    assert len(batch) == 2
+    assert batch.values("paymentAmount") == [2.5, None]
+    assert batch.values("isOpen") == [True, None]
+    assert batch.values("currencyCode") == ["USD", None]
+    assert batch.categories("currencyCode") == ["USD"]
+
+
+def test_columns_are_stored_by_kind():
+    batch = ColumnarBatch(PaymentModel, columns=["paymentId", "paymentAmount", "isOpen", "currencyCode"])
+    batch.extend([{"paymentId": "a", "paymentAmount": 1.0, "isOpen": False, "currencyCode": "EUR"},
+                  {"paymentId": "b", "currencyCode": "USD"},
+                  {"paymentId": "c", "paymentAmount": 3.0, "isOpen": True, "currencyCode": "EUR"}])
+    assert batch.column("paymentAmount").typecode == "d"
+    assert list(batch.column("isOpen")) == [0, -1, 1]
+    assert list(batch.column("currencyCode")) == [0, 1, 0] and batch.categories("currencyCode") == ["EUR", "USD"]
+    assert batch.column("paymentId") == ["a", "b", "c"]
+
+
+def test_rows_and_records_omit_missing_values():
+    records = [{"paymentId": "a", "paymentAmount": 2.5, "isOpen": True, "currencyCode": "USD"}, {"paymentId": "b", "isOpen": False}]
+    batch = ColumnarBatch.from_records(PaymentModel, records)
+    assert batch.row(0) == PaymentModel(paymentId="a", paymentAmount=2.5, isOpen=True, currencyCode="USD")
+    assert batch.row(1) == PaymentModel(paymentId="b", isOpen=False)
+    assert batch.to_records() == records
+
+
+def test_nested_lists_are_not_stored():
+    batch = ColumnarBatch.from_records(InvoiceModel, [{"invoiceId": "invoice-1", "lines": [{"invoiceLineId": "line-1"}]}])
+    assert "lines" not in batch.names and batch.to_records() == [{"invoiceId": "invoice-1"}]
+    assert list(nested_list_fields(InvoiceModel))[:2] == ["addresses", "lines"]
+    assert nested_list_fields(PaymentModel)["applications"].__name__ == "PaymentAppliedModel"
+
+
+def test_dataframe_columns_are_typed():
+    pd = pytest.importorskip("pandas")
+    records = [{"paymentId": "a", "paymentAmount": 2.5, "isOpen": True, "currencyCode": "USD", "paymentDate": "2022-03-01"},
+               {"paymentId": "b", "currencyCode": "EUR"}]
+    frame = ColumnarBatch.from_records(PaymentModel, records, categorical=frozenset(["currencyCode"])).to_dataframe()
+    assert str(frame["paymentAmount"].dtype) == "float64" and pd.isna(frame["paymentAmount"][1])
+    assert str(frame["isOpen"].dtype) == "boolean" and frame["isOpen"][0] and pd.isna(frame["isOpen"][1])
+    assert str(frame["currencyCode"].dtype) == "category" and list(frame["currencyCode"]) == ["USD", "EUR"]
+    assert str(frame["paymentDate"].dtype).startswith("datetime64") and pd.isna(frame["paymentDate"][1])
+    assert list(frame["paymentId"]) == ["a", "b"]
+
+
+def test_summary_dataframes_default_to_stable_order(client, fake):
+    pytest.importorskip("pandas")
+    fake.add("GET", r"/api/v1/Invoices/views/summary", paged(INVOICES))
+    fake.add("GET", r"/api/v1/Companies/views/customer-summary", paged(CUSTOMERS))
+    invoices = client.invoices.invoice_summary_dataframe(pageSize=10)
+    customers = client.companies.customer_summary_dataframe(pageSize=10)
+    assert list(invoices["invoiceId"]) == [record["invoiceId"] for record in INVOICES]
+    assert list(customers["companyId"]) == [record["companyId"] for record in CUSTOMERS]
+    orders = {(request.path, request.query["order"]) for request in fake.requests}
+    assert orders == {("/api/v1/Invoices/views/summary", "invoiceId"), ("/api/v1/Companies/views/customer-summary", "companyId")}
+
+
+def test_parallel_dataframe_defaults_to_primary_key_order(client, fake):
+    pytest.importorskip("pandas")
+    fake.add("GET", r"/api/v1/Payments/query", paged([{"paymentId": f"payment-{i:03d}"} for i in range(25)]))
+    frame = to_dataframe(client.payments.query_payments, PaymentModel, pageSize=10)
+    assert len(frame) == 25
+    assert {request.query["order"] for request in fake.requests} == {"paymentId"}
+    with pytest.raises(ValueError, match="requires an order"):
+        to_dataframe(client.invoices.query_invoice_summary_view, InvoiceSummaryModel)
@@ -0,0 +1,91 @@
+#
+# Lockstep Software Development Kit for Python
+#
+# (c) 2021-2022 Lockstep, Inc.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+#
+# @author     Ted Spence <tspence@lockstep.io>
+# @copyright  2021-2022 Lockstep, Inc.
+# @version    2022.4
+# @link       https://github.com/Lockstep-Network/lockstep-sdk-python
+#
+
+import io
+import pytest
+from lockstep.error_result import LockstepError
+from lockstep.transports import StaticResponse
+
+DOWNLOAD = r"/api/v1/Attachments/(?P<id>[^/]+)/download"
+FILE = bytes(range(256)) * 40
+
+
+def serve_file(content: bytes = FILE, ranges: bool = True):
+    def respond(request):
+        header = request.headers.get("Range")
+        if not header or not ranges:
+            return StaticResponse(200, content, {"Content-Length": str(len(content))})
+        start = int(header[len("bytes="):-1])
+        if start >= len(content):
+            return StaticResponse(416, b"", {"Content-Range": f"bytes */{len(content)}"})
+        return StaticResponse(206, content[start:], {"Content-Length": str(len(content) - start), "Content-Range": f"bytes {start}-{len(content) - 1}/{len(content)}"})
+    return respond
+
+
+def test_downloads_in_chunks_with_progress(client, fake, tmp_path):
+    fake.add("GET", DOWNLOAD, serve_file())
+    progress = []
+    destination = tmp_path / "attachment.bin"
+    size = client.attachments.download_attachment_to_file("a-1", str(destination), chunkSize=4096, progress=lambda written, total: progress.append((written, total)))
+    assert size == len(FILE) and destination.read_bytes() == FILE
+    assert not (tmp_path / "attachment.bin.part").exists()
+    assert progress == [(0, len(FILE)), (4096, len(FILE)), (8192, len(FILE)), (len(FILE), len(FILE))]
+    request = fake.requests[0]
+    assert request.query == {"id": "a-1"} and "Range" not in request.headers
+    assert request.headers["Accept-Encoding"] == "identity"
+
+
+def test_resumes_a_partial_file_with_a_range_request(client, fake, tmp_path):
+    fake.add("GET", DOWNLOAD, serve_file())
+    destination = tmp_path / "attachment.bin"
+    (tmp_path / "attachment.bin.part").write_bytes(FILE[:3000])
+    progress = []
+    size = client.attachments.download_attachment_to_file("a-1", str(destination), progress=lambda written, total: progress.append((written, total)), resume=True)
+    assert size == len(FILE) and destination.read_bytes() == FILE
+    assert fake.requests[0].headers["Range"] == "bytes=3000-"
+    assert progress[0] == (3000, len(FILE))
+
+
+def test_resume_of_a_complete_partial_file_accepts_416(client, fake, tmp_path):
+    fake.add("GET", DOWNLOAD, serve_file())
+    destination = tmp_path / "attachment.bin"
+    (tmp_path / "attachment.bin.part").write_bytes(FILE)
+    assert client.attachments.download_attachment_to_file("a-1", str(destination), resume=True) == len(FILE)
+    assert destination.read_bytes() == FILE
+    assert fake.requests[0].headers["Range"] == f"bytes={len(FILE)}-"
+
+
+def test_resume_starts_over_when_the_server_ignores_the_range(client, fake, tmp_path):
+    fake.add("GET", DOWNLOAD, serve_file(ranges=False))
+    destination = tmp_path / "attachment.bin"
+    (tmp_path / "attachment.bin.part").write_bytes(b"stale partial contents")
+    assert client.attachments.download_attachment_to_file("a-1", str(destination), resume=True) == len(FILE)
+    assert destination.read_bytes() == FILE
+
+
+def test_downloads_to_a_file_object(client, fake):
+    fake.add("GET", DOWNLOAD, serve_file())
+    buffer = io.BytesIO()
+    assert client.attachments.download_attachment_to_file("a-1", buffer, chunkSize=1000) == len(FILE)
+    assert buffer.getvalue() == FILE
+
+
+def test_incomplete_and_failed_downloads_raise(client, fake, tmp_path):
+    fake.add("GET", r"/api/v1/Attachments/short/download", StaticResponse(200, FILE[:100], {"Content-Length": str(len(FILE))}))
+    with pytest.raises(IOError):
+        client.attachments.download_attachment_to_file("short", str(tmp_path / "short.bin"))
+    assert not (tmp_path / "short.bin").exists()
+    with pytest.raises(LockstepError) as error:
+        client.attachments.download_attachment_to_file("missing", io.BytesIO())
+    assert error.value.error["status"] == 404
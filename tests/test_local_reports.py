@@ -0,0 +1,259 @@
+#
+# Lockstep Software Development Kit for Python
+#
+# (c) 2021-2022 Lockstep, Inc.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+#
+# @author     Ted Spence <tspence@lockstep.io>
+# @copyright  2021-2022 Lockstep, Inc.
+# @version    2022.4
+# @link       https://github.com/Lockstep-Network/lockstep-sdk-python
+#
+
+import copy
+import datetime
+import random
+import pytest
+from lockstep import CashflowEngine, DsoEngine
+from conftest import paged
+
+START = datetime.date(2022, 1, 1)
+
+
+def day(offset: int) -> str:
+    return (START + datetime.timedelta(days=offset)).isoformat()
+
+
+def make_invoices(count: int, seed: int = 7) -> list[dict]:
+    rng = random.Random(seed)
+    invoices = []
+    for i in range(count):
+        invoiceDay = rng.randint(0, 300)
+        amount = float(rng.randint(10, 1000))
+        payments = []
+        paidDay = invoiceDay
+        for j in range(rng.randint(0, 3)):
+            paidDay += rng.randint(0, 40)
+            payments.append({"paymentAppliedId": f"applied-{i}-{j}", "invoiceId": f"invoice-{i}", "applyToInvoiceDate": day(paidDay),
+                             "paymentAppliedAmount": round(amount / 3, 2)})
+        closed = rng.random() < 0.7
+        invoices.append({
+            "invoiceId": f"invoice-{i}",
+            "customerId": f"customer-{i % 6}",
+            "salespersonCode": f"rep-{i % 3}",
+            "salespersonName": f"Rep {i % 3}",
+            "companyId": f"company-{i % 4}",
+            "currencyCode": ("USD", "EUR")[i % 2],
+            "invoiceTypeCode": "Invoice" if i % 10 else "Credit Memo",
+            "isVoided": i % 17 == 0,
+            "invoiceDate": day(invoiceDay),
+            "invoiceClosedDate": day(paidDay + rng.randint(0, 5)) + "T00:00:00" if closed else None,
+            "totalAmount": amount,
+            "payments": payments,
+        })
+    return invoices
+
+
+def edit_invoices(invoices: list[dict], seed: int = 11) -> list[dict]:
+    """Returns changed copies of some invoices: amounts, dates, groups, voids and moved applications"""
+    rng = random.Random(seed)
+    changed = []
+    for invoice in rng.sample(invoices, len(invoices) // 4):
+        invoice = copy.deepcopy(invoice)
+        action = rng.randrange(5)
+        if action == 0:
+            invoice["totalAmount"] += 100.0
+        elif action == 1:
+            invoice["invoiceClosedDate"] = None if invoice["invoiceClosedDate"] else day(310)
+        elif action == 2:
+            invoice["customerId"] = "customer-new"
+            invoice["currencyCode"] = "CAD"
+        elif action == 3:
+            invoice["isVoided"] = not invoice["isVoided"]
+        else:
+            # Out-of-order events: an application dated before every indexed event
+            invoice["payments"].append({"paymentAppliedId": f"late-{invoice['invoiceId']}", "invoiceId": invoice["invoiceId"],
+                                        "applyToInvoiceDate": day(-30), "paymentAppliedAmount": 5.0})
+        changed.append(invoice)
+    return changed
+
+
+def apply(records: list[dict], changed: list[dict], key: str = "invoiceId") -> list[dict]:
+    byId = {record[key]: record for record in records}
+    byId.update({record[key]: record for record in changed})
+    return list(byId.values())
+
+
+def summary(report) -> tuple:
+    return report.timeframe, report.invoiceCount, round(report.dailySalesOutstanding, 6)
+
+
+def summaries(reports) -> object:
+    if isinstance(reports, dict):
+        return {value: summaries(group) for value, group in reports.items()}
+    if isinstance(reports, list):
+        return [summary(report) for report in reports]
+    return summary(reports)
+
+
+def assert_same_dso(actual: DsoEngine, expected: DsoEngine):
+    assert len(actual) == len(expected)
+    for weighted in (True, False):
+        for start, end in ((day(-60), day(400)), (day(30), day(90)), (day(200), day(200))):
+            assert summaries(actual.report(start, end, weighted)) == summaries(expected.report(start, end, weighted))
+        for field in DsoEngine.DEFAULT_GROUP_FIELDS:
+            assert summaries(actual.report_by(field, day(0), day(365), weighted)) == summaries(expected.report_by(field, day(0), day(365), weighted))
+        for field in (None, "customerId"):
+            assert summaries(actual.series(day(0), day(360), 30, 7, field, weighted)) == summaries(expected.series(day(0), day(360), 30, 7, field, weighted))
+
+
+def rebuilt_dso(invoices: list[dict]) -> DsoEngine:
+    engine = DsoEngine()
+    engine.add_invoices(invoices)
+    return engine
+
+
+def test_dso_matches_hand_computed_values():
+    engine = DsoEngine()
+    engine.add_invoices([
+        {"invoiceId": "a", "invoiceDate": "2022-01-01", "invoiceClosedDate": "2022-01-31", "totalAmount": 100.0, "customerId": "c1",
+         "payments": [{"paymentAppliedId": "p1", "invoiceId": "a", "applyToInvoiceDate": "2022-01-11", "paymentAppliedAmount": 40.0},
+                      {"paymentAppliedId": "p2", "invoiceId": "a", "applyToInvoiceDate": "2022-01-31", "paymentAppliedAmount": 60.0}]},
+        {"invoiceId": "b", "invoiceDate": "2022-01-10", "invoiceClosedDate": "2022-01-20", "totalAmount": 50.0, "customerId": "c2"},
+        {"invoiceId": "c", "invoiceDate": "2022-01-05", "totalAmount": 70.0, "customerId": "c2"},
+    ])
+    # Weighted: (40 x 10 + 60 x 30 + 50 x 10) / 150 days; unweighted: (30 + 10) / 2 closed invoices
+    assert summary(engine.report("2022-01-01", "2022-01-31")) == ("2022-01-31T00:00:00", 2, round(2700 / 150, 6))
+    assert engine.report("2022-01-01", "2022-01-31", weighted=False).dailySalesOutstanding == 20.0
+    assert summary(engine.report_by("customerId", "2022-01-01", "2022-01-15")["c1"]) == ("2022-01-15T00:00:00", 0, 10.0)
+    # Moving an application to another invoice updates both
+    engine.add_payment_applications([{"paymentAppliedId": "p1", "invoiceId": "c", "applyToInvoiceDate": "2022-01-25", "paymentAppliedAmount": 40.0}])
+    assert engine.report_by("customerId", "2022-01-01", "2022-01-31")["c2"].dailySalesOutstanding == pytest.approx((40 * 20 + 50 * 10) / 90)
+
+
+def test_incremental_dso_matches_full_rebuild():
+    invoices = make_invoices(300)
+    engine = DsoEngine()
+    # Applications that arrive before their invoices, then invoices in pages, with reports in between
+    engine.add_payment_applications([payment for invoice in invoices[:40] for payment in invoice["payments"]])
+    for start in range(0, len(invoices), 50):
+        engine.add_invoices(invoices[start:start + 50])
+        engine.report(day(0), day(365))
+        engine.report_by("customerId", day(0), day(365))
+    assert_same_dso(engine, rebuilt_dso(invoices))
+
+    for seed in (11, 12, 13):
+        changed = edit_invoices(invoices, seed)
+        engine.add_invoices(changed)
+        invoices = apply(invoices, changed)
+        assert_same_dso(engine, rebuilt_dso(invoices))
+
+
+def test_dso_incremental_load_through_client(client, fake):
+    invoices = make_invoices(120)
+    changed = edit_invoices(invoices)
+    fake.add("GET", r"/api/v1/Invoices/query", lambda request: paged(changed if request.query.get("filter") else invoices)(request))
+    engine = DsoEngine()
+    assert engine.load(client.invoices.query_invoices, pageSize=25) == 120
+    assert engine.load(client.invoices.query_invoices, "modified ge 2022-06-01", pageSize=25, maxWorkers=1) == len(changed)
+    assert {request.query["include"] for request in fake.requests} == {"Payments"}
+    assert {request.query["order"] for request in fake.requests} == {"invoiceId"}
+    assert_same_dso(engine, rebuilt_dso(apply(invoices, changed)))
+
+
+def make_payments(count: int, seed: int = 5) -> list[dict]:
+    rng = random.Random(seed)
+    return [{"paymentId": f"payment-{i}", "companyId": f"company-{i % 4}", "currencyCode": ("USD", "EUR", "CAD")[i % 3],
+             "paymentDate": day(rng.randint(0, 364)) + "T00:00:00", "paymentAmount": float(rng.randint(1, 500)), "isVoided": i % 13 == 0}
+            for i in range(count)]
+
+
+def edit_payments(payments: list[dict], seed: int) -> list[dict]:
+    rng = random.Random(seed)
+    changed = []
+    for payment in rng.sample(payments, len(payments) // 4):
+        payment = dict(payment)
+        action = rng.randrange(3)
+        if action == 0:
+            payment["paymentDate"] = day(rng.randint(-10, 10))
+        elif action == 1:
+            payment["companyId"] = "company-new"
+        else:
+            payment["isVoided"] = not payment["isVoided"]
+        changed.append(payment)
+    return changed
+
+
+def rebuilt_cashflow(invoices: list[dict], payments: list[dict]) -> CashflowEngine:
+    engine = CashflowEngine()
+    engine.add_invoices(invoices)
+    engine.add_payments(payments)
+    return engine
+
+
+def cashflow_summaries(reports) -> object:
+    if isinstance(reports, dict):
+        return {value: cashflow_summaries(report) for value, report in reports.items()}
+    if isinstance(reports, list):
+        return [cashflow_summaries(report) for report in reports]
+    return (reports.timeframe, round(reports.paymentsCollected, 6), reports.paymentsCollectedCount,
+            round(reports.invoicesBilled, 6), reports.invoicesBilledCount)
+
+
+def assert_same_cashflow(actual: CashflowEngine, expected: CashflowEngine):
+    assert len(actual) == len(expected)
+    for start, end in ((day(-30), day(400)), (day(60), day(120)), (day(5), day(5))):
+        assert cashflow_summaries(actual.report(start, end)) == cashflow_summaries(expected.report(start, end))
+    for field in CashflowEngine.DEFAULT_GROUP_FIELDS:
+        assert cashflow_summaries(actual.report_by(field, day(0), day(365))) == cashflow_summaries(expected.report_by(field, day(0), day(365)))
+    for field in (None, ("companyId", "currencyCode")):
+        assert cashflow_summaries(actual.series(day(0), day(364), 7, 7, field)) == cashflow_summaries(expected.series(day(0), day(364), 7, 7, field))
+
+
+def test_cashflow_matches_hand_computed_values():
+    engine = CashflowEngine()
+    engine.add_invoices([{"invoiceId": "a", "invoiceDate": "2022-03-01", "totalAmount": 100.0, "companyId": "c1", "currencyCode": "USD"},
+                         {"invoiceId": "b", "invoiceDate": "2022-03-05", "totalAmount": 40.0, "companyId": "c1", "currencyCode": "EUR", "isVoided": True},
+                         {"invoiceId": "c", "invoiceDate": "2022-03-07", "totalAmount": 25.0, "companyId": "c2", "currencyCode": "USD"}])
+    engine.add_payments([{"paymentId": "p", "paymentDate": "2022-03-03T00:00:00", "paymentAmount": 60.0, "companyId": "c1", "currencyCode": "USD"}])
+    assert cashflow_summaries(engine.report("2022-03-01", "2022-03-07")) == (7, 60.0, 1, 125.0, 2)
+    assert cashflow_summaries(engine.cash_flow(3, "2022-03-07")) == (3, 0.0, 0, 25.0, 1)
+    byPair = engine.report_by(("companyId", "currencyCode"), "2022-03-01", "2022-03-31")
+    assert cashflow_summaries(byPair) == {("c1", "USD"): (31, 60.0, 1, 100.0, 1), ("c2", "USD"): (31, 0.0, 0, 25.0, 1)}
+    daily = engine.series("2022-03-01", "2022-03-03")
+    assert [report.paymentsCollectedCount for report in daily] == [0, 0, 1]
+    weekly = engine.series("2022-03-07", "2022-03-14", window=7, step=7, field="currencyCode")
+    assert cashflow_summaries(weekly) == {"USD": [(7, 60.0, 1, 125.0, 2), (7, 0.0, 0, 0.0, 0)]}
+    # Both engines return series in the same shape
+    dso = DsoEngine()
+    assert type(dso.series("2022-03-01", "2022-03-03")) is type(daily) is list
+
+
+def test_incremental_cashflow_matches_full_rebuild():
+    invoices, payments = make_invoices(250), make_payments(400)
+    engine = CashflowEngine()
+    for start in range(0, 400, 80):
+        engine.add_payments(payments[start:start + 80])
+        engine.add_invoices(invoices[start // 80 * 50:start // 80 * 50 + 50])
+        engine.series(day(0), day(364), 7, 7, "companyId")
+        engine.report(day(0), day(365))
+    assert_same_cashflow(engine, rebuilt_cashflow(invoices, payments))
+
+    for seed in (21, 22, 23):
+        changedInvoices, changedPayments = edit_invoices(invoices, seed), edit_payments(payments, seed)
+        engine.add_invoices(changedInvoices)
+        engine.add_payments(changedPayments)
+        invoices, payments = apply(invoices, changedInvoices), apply(payments, changedPayments, "paymentId")
+        assert_same_cashflow(engine, rebuilt_cashflow(invoices, payments))
+
+
+def test_cashflow_load_through_client(client, fake):
+    invoices, payments = make_invoices(60), make_payments(90)
+    fake.add("GET", r"/api/v1/Invoices/query", paged(invoices))
+    fake.add("GET", r"/api/v1/Payments/query", paged(payments))
+    engine = CashflowEngine()
+    assert engine.load(client.invoices.query_invoices, client.payments.query_payments, pageSize=20) == 150
+    assert {(request.path, request.query["order"]) for request in fake.requests} == {("/api/v1/Invoices/query", "invoiceId"), ("/api/v1/Payments/query", "paymentId")}
+    assert_same_cashflow(engine, rebuilt_cashflow(invoices, payments))
@@ -0,0 +1,42 @@
+#
+# Lockstep Software Development Kit for Python
+#
+# (c) 2021-2022 Lockstep, Inc.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+#
+# @author     Ted Spence <tspence@lockstep.io>
+# @copyright  2021-2022 Lockstep, Inc.
+# @version    2022.4
+# @link       https://github.com/Lockstep-Network/lockstep-sdk-python
+#
+
+from lockstep.models.invoicemodel import InvoiceModel
+
+
+def test_request_bodies_are_sent_as_json(client, fake):
+    fake.add("POST", r"/api/v1/Invoices", lambda request: request.json())
+    invoices = [InvoiceModel(invoiceId="invoice-1", erpKey="INV-1", invoiceDate="2022-04-01"), {"invoiceId": "invoice-2"}]
+    result = client.invoices.create_invoices(invoices)
+    request = fake.requests[0]
+    assert request.headers["Content-Type"] == "application/json"
+    assert request.json() == [{"invoiceId": "invoice-1", "erpKey": "INV-1", "invoiceDate": "2022-04-01"}, {"invoiceId": "invoice-2"}]
+    # The body is no longer copied into the query string
+    assert "body" not in request.query and "?" not in request.url
+    assert result == request.json()
+
+
+def test_patch_keeps_its_other_query_parameters(client, fake):
+    fake.add("PATCH", r"/api/v1/Invoices/(?P<id>[^/]+)", lambda request: {"invoiceId": request.match["id"], **request.json()})
+    client.invoices.update_invoice("invoice-1", {"specialTerms": "Net 30"})
+    request = fake.requests[0]
+    assert request.json() == {"specialTerms": "Net 30"}
+    assert request.query == {"id": "invoice-1"}
+    assert "body" not in request.url
+
+
+def test_requests_without_a_body_send_no_content_type(client, fake):
+    fake.add("GET", r"/api/v1/Invoices/[^/]+", {"invoiceId": "invoice-1"})
+    client.invoices.retrieve_invoice("invoice-1", None)
+    assert fake.requests[0].body == b"" and "Content-Type" not in fake.requests[0].headers
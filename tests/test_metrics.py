@@ -0,0 +1,82 @@
+#
+# Lockstep Software Development Kit for Python
+#
+# (c) 2021-2022 Lockstep, Inc.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+#
+# @author     Ted Spence <tspence@lockstep.io>
+# @copyright  2021-2022 Lockstep, Inc.
+# @version    2022.4
+# @link       https://github.com/Lockstep-Network/lockstep-sdk-python
+#
+
+import pytest
+from lockstep.metrics import EndpointMetrics, MetricsRecorder, normalize_path
+from lockstep.transports import StaticResponse
+
+INVOICE = "/api/v1/Invoices/7f0c3b1e-52a4-4c39-8a41-0f1b0d6b9a2e"
+
+
+def test_paths_are_reported_by_template():
+    assert normalize_path(INVOICE) == "/api/v1/Invoices/{id}"
+    assert normalize_path("/api/v1/Attachments/12345/download") == "/api/v1/Attachments/{id}/download"
+    assert normalize_path("/api/v1/Invoices/query") == "/api/v1/Invoices/query"
+
+
+def test_percentiles_interpolate_within_buckets():
+    recorder = MetricsRecorder()
+    for seconds in [0.003] * 8 + [0.2, 0.25]:
+        recorder.record_request("GET", INVOICE, 200, seconds)
+    snapshot = recorder.snapshot()["GET /api/v1/Invoices/{id}"]
+    assert snapshot["count"] == 10 and snapshot["latencySum"] == pytest.approx(0.474)
+    assert snapshot["p50"] == pytest.approx(0.005 * 5 / 8)
+    assert snapshot["p95"] == pytest.approx(0.1 + 0.15 * 1.5 / 2)
+    assert snapshot["p99"] == pytest.approx(0.1 + 0.15 * 1.9 / 2)
+    # A latency equal to a bucket bound is counted in that bucket
+    assert snapshot["buckets"][0.005] == 8 and snapshot["buckets"][0.25] == 2 and snapshot["buckets"]["+Inf"] == 0
+    recorder.record_request("GET", INVOICE, 200, 90.0)
+    assert recorder.snapshot()["GET /api/v1/Invoices/{id}"]["p99"] == 60.0
+    assert EndpointMetrics().percentile(50) is None
+
+
+def test_prometheus_buckets_are_cumulative():
+    recorder = MetricsRecorder()
+    for seconds in (0.004, 0.02, 0.02, 0.7, 45.0, 120.0):
+        recorder.record_request("GET", INVOICE, 200, seconds, 10, 100)
+    recorder.record_request("GET", INVOICE, 404, 0.004)
+    recorder.record_retry("GET", INVOICE)
+    recorder.record_cache_hit("POST", "/api/v1/Reports/cashflow")
+    lines = recorder.to_prometheus().splitlines()
+    labels = 'method="GET",endpoint="/api/v1/Invoices/{id}"'
+    buckets = {line.split('le="')[1].split('"')[0]: int(line.rsplit(" ", 1)[1]) for line in lines if line.startswith("lockstep_client_request_duration_seconds_bucket{" + labels)}
+    assert buckets == {"0.005": 2, "0.01": 2, "0.025": 4, "0.05": 4, "0.1": 4, "0.25": 4, "0.5": 4, "1.0": 5, "2.5": 5, "5.0": 5, "10.0": 5, "30.0": 5, "60.0": 6, "+Inf": 7}
+    assert f"lockstep_client_request_duration_seconds_count{{{labels}}} 7" in lines
+    assert "# TYPE lockstep_client_request_duration_seconds histogram" in lines
+    assert f"lockstep_client_request_bytes_total{{{labels}}} 60" in lines
+    assert f"lockstep_client_response_bytes_total{{{labels}}} 600" in lines
+    assert f"lockstep_client_retries_total{{{labels}}} 1" in lines
+    assert 'lockstep_client_cache_hits_total{method="POST",endpoint="/api/v1/Reports/cashflow"} 1' in lines
+    assert f'lockstep_client_responses_total{{{labels},status="200"}} 6' in lines
+    assert f'lockstep_client_responses_total{{{labels},status="404"}} 1' in lines
+
+
+def test_client_records_requests_once_enabled(client, fake):
+    fake.add("GET", r"/api/v1/Invoices/[^/]+", {"invoiceId": "invoice-1"})
+    fake.add("GET", r"/api/v1/Attachments/[^/]+/download", StaticResponse(200, b"x" * 300, {"Content-Length": "300"}))
+    client.invoices.retrieve_invoice("1", None)
+    recorder = client.enable_metrics()
+    client.invoices.retrieve_invoice("2", None)
+    client.invoices.retrieve_invoice("3", None)
+    client.attachments.retrieve_attachment("4", None)
+    client.send_stream_request("GET", "/api/v1/Attachments/4/download", None).close()
+    snapshot = recorder.snapshot()
+    assert snapshot["GET /api/v1/Invoices/{id}"]["count"] == 2
+    assert snapshot["GET /api/v1/Invoices/{id}"]["responseBytes"] == 2 * len(b'{"invoiceId": "invoice-1"}')
+    assert snapshot["GET /api/v1/Attachments/{id}"]["statusCodes"] == {404: 1}
+    # Streamed responses are counted by their advertised length
+    assert snapshot["GET /api/v1/Attachments/{id}/download"]["responseBytes"] == 300
+    client.disable_metrics()
+    client.invoices.retrieve_invoice("5", None)
+    assert recorder.snapshot()["GET /api/v1/Invoices/{id}"]["count"] == 2
@@ -0,0 +1,84 @@
+#
+# Lockstep Software Development Kit for Python
+#
+# (c) 2021-2022 Lockstep, Inc.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+#
+# @author     Ted Spence <tspence@lockstep.io>
+# @copyright  2021-2022 Lockstep, Inc.
+# @version    2022.4
+# @link       https://github.com/Lockstep-Network/lockstep-sdk-python
+#
+
+import email.parser
+import email.policy
+import io
+import requests
+from lockstep.file_transfer import MultipartUpload
+
+CONTENTS = bytes(range(256)) * 100
+
+
+def parts(contentType: str, body: bytes) -> list:
+    message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(f"Content-Type: {contentType}\r\n\r\n".encode("utf-8") + body)
+    return [(part.get_param("name", header="content-disposition"), part.get_filename(), part.get_content_type(), part.get_payload(decode=True))
+            for part in message.iter_parts()]
+
+
+def test_body_is_produced_in_chunks_with_a_known_length(tmp_path):
+    path = tmp_path / "invoices.zip"
+    path.write_bytes(CONTENTS)
+    progress = []
+    body = MultipartUpload([("files", "invoices.zip", str(path), "application/zip"), ("files", "notes.txt", b"hello", None)], chunkSize=4096, progress=lambda sent, total: progress.append((sent, total)))
+    chunks = list(body)
+    data = b"".join(chunks)
+    assert body.len == len(data)
+    assert max(len(chunk) for chunk in chunks) == 4096
+    assert parts(body.contentType, data) == [("files", "invoices.zip", "application/zip", CONTENTS), ("files", "notes.txt", "application/octet-stream", b"hello")]
+    # Progress is reported as each chunk is produced
+    assert [sent for sent, _ in progress] == [sum(len(chunk) for chunk in chunks[:i + 1]) for i in range(len(chunks))]
+    assert {total for _, total in progress} == {len(data)}
+
+
+def test_length_is_unknown_for_iterables():
+    body = MultipartUpload([("files", "data.bin", iter([CONTENTS[:1000], b"", CONTENTS[1000:]]), None)])
+    assert body.len is None
+    assert parts(body.contentType, b"".join(body))[0][3] == CONTENTS
+    # requests falls back to chunked transfer encoding when the length is unknown
+    prepared = requests.Request("POST", "https://api.example.com/api/v1/Sync/zip", data=MultipartUpload([("files", "data.bin", iter([b"x"]), None)])).prepare()
+    assert prepared.headers["Transfer-Encoding"] == "chunked" and "Content-Length" not in prepared.headers
+
+
+def test_file_objects_are_sent_from_their_current_position():
+    source = io.BytesIO(CONTENTS)
+    source.seek(100)
+    body = MultipartUpload([("files", "data.bin", source, None)], chunkSize=1000)
+    prepared = requests.Request("POST", "https://api.example.com/api/v1/Sync/zip", data=body).prepare()
+    assert prepared.headers["Content-Length"] == str(body.len)
+    assert parts(body.contentType, b"".join(body))[0][3] == CONTENTS[100:]
+
+
+def test_upload_attachment_streams_a_multipart_request(client, fake, tmp_path):
+    fake.add("POST", r"/api/v1/Attachments", lambda request: [{"attachmentId": "a-1", "fileName": parts(request.headers["Content-Type"], request.body)[0][1]}])
+    path = tmp_path / "scan.pdf"
+    path.write_bytes(CONTENTS)
+    progress = []
+    result = client.attachments.upload_attachment("Invoice", "invoice-1", str(path), progress=lambda sent, total: progress.append((sent, total)))
+    assert result == [{"attachmentId": "a-1", "fileName": "scan.pdf"}]
+    request = fake.requests[0]
+    assert request.query == {"tableName": "Invoice", "objectId": "invoice-1"}
+    assert request.headers["Content-Type"].startswith("multipart/form-data; boundary=")
+    assert parts(request.headers["Content-Type"], request.body) == [("files", "scan.pdf", "application/octet-stream", CONTENTS)]
+    assert progress[-1] == (len(request.body), len(request.body))
+
+
+def test_upload_sync_file_names_file_objects(client, fake):
+    fake.add("POST", r"/api/v1/Sync/zip", {"syncRequestId": "sync-1"})
+    source = io.BytesIO(CONTENTS)
+    source.name = "/exports/erp.zip"
+    assert client.sync.upload_sync_file(source) == {"syncRequestId": "sync-1"}
+    request = fake.requests[0]
+    assert request.query == {}
+    assert parts(request.headers["Content-Type"], request.body) == [("files", "erp.zip", "application/zip", CONTENTS)]
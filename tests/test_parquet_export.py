@@ -0,0 +1,90 @@
+#
+# Lockstep Software Development Kit for Python
+#
+# (c) 2021-2022 Lockstep, Inc.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+#
+# @author     Ted Spence <tspence@lockstep.io>
+# @copyright  2021-2022 Lockstep, Inc.
+# @version    2022.4
+# @link       https://github.com/Lockstep-Network/lockstep-sdk-python
+#
+
+import dataclasses
+import importlib
+import json
+import pkgutil
+import typing
+import pytest
+import lockstep.models
+from lockstep import InvoiceModel, InvoiceSummaryModel, ParquetExporter, export_parquet
+from lockstep.serialization import nested_list_fields, scalar_fields
+from conftest import paged
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+SAMPLES = {str: "text", float: 1.5, int: 2, bool: True, list[str]: ["a", "b"]}
+
+
+def all_models() -> list[type]:
+    models = []
+    for module in pkgutil.iter_modules(lockstep.models.__path__):
+        for value in vars(importlib.import_module(f"lockstep.models.{module.name}")).values():
+            # Models with only nested fields, such as TransferOwnerModel, have no columns
+            if dataclasses.is_dataclass(value) and value.__module__ == f"lockstep.models.{module.name}" and scalar_fields(value):
+                models.append(value)
+    return models
+
+
+def sample_record(model: type) -> dict:
+    hints = typing.get_type_hints(model)
+    record = {name: SAMPLES.get(hints[name], {"key": [1, "two"]}) for name in scalar_fields(model)}
+    for name, nested in nested_list_fields(model).items():
+        record[name] = [sample_record(nested)]
+    return record
+
+
+def expected(model: type, name: str, value: object) -> object:
+    hint = typing.get_type_hints(model).get(name)
+    if value is None or hint in SAMPLES:
+        return value
+    return json.dumps(value)
+
+
+@pytest.mark.parametrize("model", all_models(), ids=lambda model: model.__name__)
+def test_every_model_round_trips_through_parquet(tmp_path, model):
+    path = str(tmp_path / "records.parquet")
+    empty = {name: None for name in scalar_fields(model)}
+    with ParquetExporter(path, model) as exporter:
+        exporter.write([sample_record(model), empty])
+    rows = pq.read_table(path).to_pylist()
+    assert len(rows) == 2
+    for name, value in sample_record(model).items():
+        if name in rows[0]:
+            assert rows[0][name] == expected(model, name, value), name
+    assert all(value is None for value in rows[1].values())
+    for name in exporter.report.files[1:]:
+        assert len(pq.read_table(name)) == 1
+
+
+def test_export_invoice_summary_view(tmp_path, client, fake):
+    records = [dict(sample_record(InvoiceSummaryModel), invoiceId=f"invoice-{i}") for i in range(25)]
+    fake.add("GET", r"/api/v1/Invoices/views/summary", paged(records))
+    path = str(tmp_path / "summary.parquet")
+    report = export_parquet(client.invoices.query_invoice_summary_view, path, InvoiceSummaryModel, order="invoiceId", pageSize=10)
+    table = pq.read_table(path)
+    assert report.rows[""] == 25
+    assert table.column("invoiceId").to_pylist() == [f"invoice-{i}" for i in range(25)]
+    assert table.column("paymentNumbers").to_pylist()[0] == ["a", "b"]
+
+
+def test_child_tables_carry_parent_key(tmp_path):
+    path = str(tmp_path / "invoices.parquet")
+    records = [{"invoiceId": "a", "lines": [{"invoiceLineId": "a1"}, {"invoiceLineId": "a2"}]}, {"invoiceId": "b", "lines": []}]
+    with ParquetExporter(path, InvoiceModel, children=["lines"], rowGroupSize=1) as exporter:
+        exporter.write(records)
+    assert exporter.report.rows == {"": 2, "lines": 2}
+    lines = pq.read_table(str(tmp_path / "invoices.lines.parquet")).to_pylist()
+    assert [(line["invoiceId"], line["invoiceLineId"]) for line in lines] == [("a", "a1"), ("a", "a2")]
@@ -0,0 +1,38 @@
+#
+# Lockstep Software Development Kit for Python
+#
+# (c) 2021-2022 Lockstep, Inc.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+#
+# @author     Ted Spence <tspence@lockstep.io>
+# @copyright  2021-2022 Lockstep, Inc.
+# @version    2022.4
+# @link       https://github.com/Lockstep-Network/lockstep-sdk-python
+#
+
+import pytest
+from lockstep import InvoiceSummaryModel, PaymentModel, export_records
+from conftest import paged
+
+PAYMENTS = [{"paymentId": f"payment-{i:03d}", "paymentAmount": float(i), "currencyCode": "USD"} for i in range(95)]
+
+
+def test_parallel_export_defaults_to_primary_key_order(tmp_path, client, fake):
+    fake.add("GET", r"/api/v1/Payments/query", paged(PAYMENTS))
+    report = export_records(client.payments.query_payments, str(tmp_path / "payments.csv"), PaymentModel, pageSize=10, maxWorkers=4)
+    assert report.rows == 95
+    assert {request.query["order"] for request in fake.requests} == {"paymentId"}
+
+
+def test_parallel_export_matches_sequential_export(tmp_path, client, fake):
+    fake.add("GET", r"/api/v1/Payments/query", paged(PAYMENTS))
+    export_records(client.payments.query_payments, str(tmp_path / "sequential.jsonl"), PaymentModel, order="paymentId", pageSize=10, maxWorkers=1)
+    export_records(client.payments.query_payments, str(tmp_path / "parallel.jsonl"), PaymentModel, order="paymentId", pageSize=10, maxWorkers=4)
+    assert (tmp_path / "sequential.jsonl").read_bytes() == (tmp_path / "parallel.jsonl").read_bytes()
+
+
+def test_parallel_export_without_primary_key_requires_order(tmp_path, client):
+    with pytest.raises(ValueError, match="requires an order"):
+        export_records(client.invoices.query_invoice_summary_view, str(tmp_path / "summary.csv"), InvoiceSummaryModel)
@@ -0,0 +1,57 @@
+#
+# Lockstep Software Development Kit for Python
+#
+# (c) 2021-2022 Lockstep, Inc.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+#
+# @author     Ted Spence <tspence@lockstep.io>
+# @copyright  2021-2022 Lockstep, Inc.
+# @version    2022.4
+# @link       https://github.com/Lockstep-Network/lockstep-sdk-python
+#
+
+import datetime
+from lockstep import ResultCache
+
+REPORTS = {
+    "cashflow": {"timeframe": 30, "paymentsCollected": 10.0},
+    "dailysalesoutstanding": [{"timeframe": "2022-01-01T00:00:00", "invoiceCount": 1}],
+    "riskrates": [{"reportPeriod": "2022-01-01T00:00:00"}],
+    "ar-header": {"reportPeriod": "2022-01-01T00:00:00"},
+    "ar-aging-header": [{"reportBucket": "0"}],
+    "aging": [{"bucket": 0}],
+    "attachments-header": {"totalAttachments": 3},
+}
+
+
+def add_reports(fake, failing: str = None):
+    for name, payload in REPORTS.items():
+        status = 500 if name == failing else 200
+        body = {"type": "about:blank", "title": "Server Error", "status": 500} if name == failing else payload
+        fake.add("GET", f"/api/v1/Reports/{name}", body, status)
+
+
+def test_dashboard_defaults_report_date_to_today(client, fake):
+    add_reports(fake)
+    dashboard = client.reports.dashboard(companyId="company-1")
+    assert not dashboard.errors
+    assert dashboard.cashFlow.paymentsCollected == 10.0
+    assert dashboard.attachmentsHeader.totalAttachments == 3
+    header = next(request for request in fake.requests if request.path.endswith("/ar-header"))
+    assert header.query == {"reportDate": datetime.date.today().isoformat(), "companyId": "company-1"}
+    assert all("None" not in request.url for request in fake.requests)
+
+
+def test_dashboard_serves_cached_reports_but_not_errors(client, fake):
+    add_reports(fake, failing="riskrates")
+    client.with_result_cache(ResultCache(ttl=60))
+    first = client.reports.dashboard()
+    assert list(first.errors) == ["riskRates"]
+    assert first.cacheHits == 0
+    second = client.reports.dashboard()
+    assert second.cacheHits == 6
+    assert list(second.errors) == ["riskRates"]
+    assert sum(request.path.endswith("/riskrates") for request in fake.requests) == 2
+    assert len(fake.requests) == 8
@@ -0,0 +1,151 @@
+#
+# Lockstep Software Development Kit for Python
+#
+# (c) 2021-2022 Lockstep, Inc.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+#
+# @author     Ted Spence <tspence@lockstep.io>
+# @copyright  2021-2022 Lockstep, Inc.
+# @version    2022.4
+# @link       https://github.com/Lockstep-Network/lockstep-sdk-python
+#
+
+import json
+import pytest
+from lockstep.models.companymodel import CompanyModel
+from lockstep.models.contactmodel import ContactModel
+from lockstep.models.invoicemodel import InvoiceModel
+from lockstep.pagination import scan
+from lockstep.serialization import InternTable, ModelDecoder, changed_fields, is_tracked, patch_body, start_tracking
+from conftest import paged
+
+
+def invoice(number: int, customer: str, contact: str) -> dict:
+    return {
+        "invoiceId": f"invoice-{number}",
+        "company": {"companyId": "group", "companyName": "Group"},
+        "customer": {"companyId": customer, "companyName": customer.title(), "contacts": [{"contactId": contact}]},
+        "customerPrimaryContact": {"contactId": contact, "contactName": contact.title()},
+    }
+
+
+INVOICES = [invoice(i, f"customer-{i % 3}", f"contact-{i % 3}") for i in range(12)]
+
+
+def test_decodes_nested_models_and_lists():
+    decoded = ModelDecoder().decode(InvoiceModel, INVOICES[4])
+    assert decoded.invoiceId == "invoice-4"
+    assert decoded.customer == CompanyModel(companyId="customer-1", companyName="Customer-1", contacts=[ContactModel(contactId="contact-1")])
+    assert decoded.customerPrimaryContact == ContactModel(contactId="contact-1", contactName="Contact-1")
+    assert decoded.lines is None
+
+
+def test_identity_map_shares_nested_companies_and_contacts():
+    decoder = ModelDecoder(identityMap=True)
+    invoices = decoder.decode_records(InvoiceModel, INVOICES)
+    assert all(decoded.company is invoices[0].company for decoded in invoices)
+    assert invoices[0].customer is invoices[3].customer and invoices[0].customer is not invoices[1].customer
+    assert invoices[2].customerPrimaryContact is invoices[11].customerPrimaryContact
+    # One group company, three customers and three contacts
+    assert len(decoder.identityMap) == 7
+
+
+def test_identity_map_is_off_by_default_and_skips_records_without_keys():
+    invoices = ModelDecoder().decode_records(InvoiceModel, INVOICES[:4])
+    assert invoices[0].customer == invoices[3].customer and invoices[0].customer is not invoices[3].customer
+    decoder = ModelDecoder(identityMap=True)
+    first, second = decoder.decode_records(InvoiceModel, [{"company": {"companyName": "No key"}}] * 2)
+    assert first.company == second.company and first.company is not second.company
+    assert len(decoder.identityMap) == 0
+
+
+def test_identity_map_lasts_for_a_whole_scan(client, fake):
+    fake.add("GET", r"/api/v1/Invoices/query", paged(INVOICES))
+    decoder = ModelDecoder(identityMap=True)
+    invoices = list(scan(client.invoices.query_invoices, None, None, "invoiceId", 5, InvoiceModel, decoder))
+    assert len(fake.requests) == 3
+    assert [decoded.invoiceId for decoded in invoices] == [record["invoiceId"] for record in INVOICES]
+    assert invoices[0].customer is invoices[9].customer
+
+
+def test_interning_shares_repeated_values_of_configured_fields():
+    # Decoding from JSON text gives every value its own string object, as an API call does
+    records = json.loads(json.dumps([{"invoiceId": f"invoice-{i}", "currencyCode": "USD", "erpKey": "ERP"} for i in range(3)]))
+    decoder = ModelDecoder(internStrings=True)
+    first, second, third = decoder.decode_records(InvoiceModel, records)
+    assert records[0]["currencyCode"] is not records[1]["currencyCode"]
+    assert first.currencyCode is second.currencyCode is third.currencyCode
+    assert first.erpKey == second.erpKey and first.erpKey is not second.erpKey
+    assert len(decoder.internTable) == 1
+    assert ModelDecoder().internTable is None
+
+
+def test_intern_table_stops_growing_at_max_size():
+    table = InternTable(maxSize=2)
+    usd, eur = table.intern("".join(["U", "SD"])), table.intern("".join(["E", "UR"]))
+    cad = "".join(["C", "AD"])
+    assert table.intern(cad) is cad
+    assert table.intern("".join(["C", "AD"])) is not cad
+    assert len(table) == 2
+    # Values interned before the table filled up are still shared
+    assert table.intern("".join(["U", "SD"])) is usd and table.intern("".join(["E", "UR"])) is eur
+    decoder = ModelDecoder(internStrings=True, internFields=frozenset(["erpKey"]), internTableSize=2)
+    decoder.decode_records(InvoiceModel, [{"erpKey": f"ERP-{i}"} for i in range(5)])
+    assert len(decoder.internTable) == 2
+
+
+def tracked_invoice() -> InvoiceModel:
+    return ModelDecoder(trackChanges=True).decode(InvoiceModel, {"invoiceId": "1", "referenceCode": "A", "totalAmount": 10.0, "specialTerms": "net 30", "lines": [{"lineNumber": "1"}]})
+
+
+def echo_patch(request):
+    return dict(request.json(), invoiceId=request.match.group(1))
+
+
+def test_tracked_models_report_changed_fields():
+    invoice = tracked_invoice()
+    assert is_tracked(invoice) and changed_fields(invoice) == [] and patch_body(invoice) == {}
+    invoice.referenceCode = "B"
+    invoice.specialTerms = None
+    # Lists of nested models are not tracked
+    invoice.lines[0].lineNumber = "2"
+    assert patch_body(invoice) == {"referenceCode": "B", "specialTerms": None}
+    assert not is_tracked(ModelDecoder().decode(InvoiceModel, {"invoiceId": "1"}))
+    manual = InvoiceModel(invoiceId="2", totalAmount=5.0)
+    with pytest.raises(ValueError):
+        changed_fields(manual)
+    start_tracking(manual)
+    manual.totalAmount = 6.0
+    assert patch_body(manual) == {"totalAmount": 6.0}
+
+
+def test_tracked_patch_sends_only_changed_fields(client, fake):
+    fake.add("PATCH", r"/api/v1/Invoices/([^/]+)", echo_patch)
+    invoice = tracked_invoice()
+    invoice.referenceCode = "B"
+    assert client.invoices.update_invoice("1", invoice) == {"referenceCode": "B", "invoiceId": "1"}
+    assert [request.json() for request in fake.requests] == [{"referenceCode": "B"}]
+
+
+def test_unchanged_tracked_patch_sends_no_request(client, fake):
+    fake.add("PATCH", r"/api/v1/Invoices/([^/]+)", echo_patch)
+    invoice = tracked_invoice()
+    result = client.invoices.update_invoice("1", invoice)
+    assert fake.requests == []
+    assert result["referenceCode"] == "A" and result["totalAmount"] == 10.0
+
+
+def test_snapshot_resets_once_the_server_accepts_the_patch(client, fake):
+    fake.add("PATCH", r"/api/v1/Invoices/bad", {"type": "about:blank", "title": "Bad Request", "status": 400}, 400)
+    fake.add("PATCH", r"/api/v1/Invoices/([^/]+)", echo_patch)
+    invoice = tracked_invoice()
+    invoice.totalAmount = 12.5
+    # A rejected update keeps the changes pending
+    client.invoices.update_invoice("bad", invoice)
+    assert changed_fields(invoice) == ["totalAmount"]
+    client.invoices.update_invoice("1", invoice)
+    assert changed_fields(invoice) == []
+    client.invoices.update_invoice("1", invoice)
+    assert [request.json() for request in fake.requests] == [{"totalAmount": 12.5}, {"totalAmount": 12.5}]
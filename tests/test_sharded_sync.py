@@ -0,0 +1,139 @@
+#
+# Lockstep Software Development Kit for Python
+#
+# (c) 2021-2022 Lockstep, Inc.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+#
+# @author     Ted Spence <tspence@lockstep.io>
+# @copyright  2021-2022 Lockstep, Inc.
+# @version    2022.4
+# @link       https://github.com/Lockstep-Network/lockstep-sdk-python
+#
+
+import email.parser
+import email.policy
+import io
+import json
+import re
+import zipfile
+import pytest
+from lockstep.models.invoicemodel import InvoiceModel
+from lockstep.sharded_sync import ShardedSyncUploader
+from lockstep.sync_tracker import SyncTracker
+
+FILTER = re.compile(r"syncRequestId IN \((.*)\)")
+
+
+def uploaded_zip(request) -> dict:
+    message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(f"Content-Type: {request.headers['Content-Type']}\r\n\r\n".encode("utf-8") + request.body)
+    part = next(message.iter_parts())
+    with zipfile.ZipFile(io.BytesIO(part.get_payload(decode=True))) as zf:
+        entries = {name: [json.loads(line) for line in zf.read(name).decode("utf-8").splitlines()] for name in zf.namelist()}
+    return part.get_filename(), entries
+
+
+class SyncServer:
+    """Accepts Sync ZIP uploads and reports a final status for each shard"""
+
+    def __init__(self, fake, statuses: dict = None, failingUploads: set = ()):
+        self.statuses = statuses or {}
+        self.failingUploads = failingUploads
+        self.uploads = {}
+        fake.add("POST", r"/api/v1/Sync/zip", self.upload)
+        fake.add("GET", r"/api/v1/Sync/query", self.query)
+
+    def upload(self, request):
+        fileName, entries = uploaded_zip(request)
+        index = int(fileName[len("shard-"):-len(".zip")])
+        if index in self.failingUploads:
+            raise ConnectionError(f"Connection reset while uploading {fileName}")
+        self.uploads[index] = entries
+        return {"syncRequestId": f"sync-{index}", "statusCode": "Ready"}
+
+    def query(self, request):
+        records = []
+        for value in FILTER.fullmatch(request.query["filter"]).group(1).split(","):
+            id = value.strip()[1:-1]
+            if id.startswith("sync-"):
+                index = int(id[len("sync-"):])
+                entities = self.uploads[index]
+                details = {name[:-len(".jsonl")]: {"insertCount": len(records), "updateCount": 1, "skipCount": 0, "errorCount": 0, "errors": []} for name, records in entities.items()}
+                records.append({"syncRequestId": id, "statusCode": self.statuses.get(index, "Success"), "processResultMessage": f"shard {index} done", "details": details})
+            else:
+                records.append({"syncRequestId": id, "statusCode": "In Progress"})
+        return {"records": records, "totalCount": len(records)}
+
+
+def invoices(count: int):
+    for i in range(count):
+        yield InvoiceModel(invoiceId=f"invoice-{i}", erpKey=f"INV-{i:03d}")
+
+
+def test_records_are_split_by_key_and_results_are_combined(client, fake, clock):
+    server = SyncServer(fake)
+    uploader = ShardedSyncUploader(client, boundaries=["INV-010", "INV-020"])
+    uploader.add("Invoices", invoices(25), "erpKey")
+    uploader.add("Payments", [{"paymentId": "payment-1", "erpKey": "INV-015"}], lambda payment: payment["erpKey"])
+    report = uploader.run()
+    assert sorted(server.uploads) == [0, 1, 2]
+    assert [invoice["erpKey"] for invoice in server.uploads[1]["Invoices.jsonl"]] == [f"INV-{i:03d}" for i in range(10, 20)]
+    assert server.uploads[1]["Payments.jsonl"] == [{"paymentId": "payment-1", "erpKey": "INV-015"}]
+    assert server.uploads[0]["Payments.jsonl"] == []
+    assert [sync.syncRequestId for sync in report.shards] == ["sync-0", "sync-1", "sync-2"]
+    assert (report.insertCount, report.updateCount, report.failedShards, report.timedOut) == (26, 6, [], False)
+    assert report.entities["Invoices"].insertCount == 25 and report.entities["Invoices"].updateCount == 3
+    assert report.entities["Payments"].insertCount == 1
+
+
+def test_hashed_shards_skip_empty_files(client, fake, clock):
+    server = SyncServer(fake)
+    uploader = ShardedSyncUploader(client, shards=8)
+    uploader.add("Invoices", invoices(3), "erpKey")
+    report = uploader.run()
+    assert sum(len(entries["Invoices.jsonl"]) for entries in server.uploads.values()) == 3
+    assert len(server.uploads) == len(report.shards) <= 3
+
+
+def test_failed_uploads_and_tasks_fail_only_their_shard(client, fake, clock):
+    SyncServer(fake, statuses={2: "Failed"}, failingUploads={1})
+    uploader = ShardedSyncUploader(client, boundaries=["INV-010", "INV-020"])
+    uploader.add("Invoices", invoices(25), "erpKey")
+    report = uploader.run()
+    assert report.failedShards == [1, 2]
+    assert isinstance(report.errors[0], ConnectionError)
+    assert "shard 2 done" in report.errors
+    assert [sync.syncRequestId for sync in report.shards] == ["sync-0", "sync-2"]
+    # The failed task's counts are still reported
+    assert report.insertCount == 15
+
+
+def test_unfinished_tasks_fail_their_shard_after_the_timeout(client, fake, clock):
+    SyncServer(fake, statuses={0: "In Progress"})
+    uploader = ShardedSyncUploader(client, boundaries=["INV-010"])
+    uploader.add("Invoices", invoices(15), "erpKey")
+    report = uploader.run(timeout=30)
+    assert report.timedOut and report.failedShards == [0]
+    assert report.errors == ["Sync task sync-0 for shard 0 did not finish within 30 seconds"]
+    assert [sync.syncRequestId for sync in report.shards] == ["sync-1"]
+    assert report.insertCount == 5
+
+
+def test_a_shared_tracker_only_waits_for_this_run(client, fake, clock):
+    SyncServer(fake)
+    tracker = SyncTracker(client)
+    other = tracker.track("other-sync")
+    uploader = ShardedSyncUploader(client, shards=2, tracker=tracker)
+    uploader.add("Invoices", invoices(10), "erpKey")
+    report = uploader.run(timeout=30)
+    assert not report.timedOut and report.failedShards == [] and report.insertCount == 10
+    assert clock.now < 1030.0
+    assert not other.done() and tracker.pending == 1
+
+
+def test_entities_can_only_be_added_once(client):
+    uploader = ShardedSyncUploader(client)
+    uploader.add("Invoices", invoices(2), "erpKey")
+    with pytest.raises(ValueError):
+        uploader.add("Invoices", invoices(2), "erpKey")
@@ -0,0 +1,91 @@
+#
+# Lockstep Software Development Kit for Python
+#
+# (c) 2021-2022 Lockstep, Inc.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+#
+# @author     Ted Spence <tspence@lockstep.io>
+# @copyright  2021-2022 Lockstep, Inc.
+# @version    2022.4
+# @link       https://github.com/Lockstep-Network/lockstep-sdk-python
+#
+
+import json
+import logging
+import pstats
+from lockstep import lockstep_api
+
+ID = "7f0c3b1e-52a4-4c39-8a41-0f1b0d6b9a2e"
+INVOICE = {"invoiceId": ID, "erpKey": "INV-1"}
+
+
+class Timer:
+    """Replaces `time.perf_counter` in the client so that every reading is `step` seconds after the last one"""
+
+    def __init__(self, step: float):
+        self.now = 0.0
+        self.step = step
+
+    def perf_counter(self) -> float:
+        self.now += self.step
+        return self.now
+
+    def strftime(self, format: str) -> str:
+        return "20220401-120000"
+
+
+def slow_records(caplog) -> list:
+    return [record for record in caplog.records if record.name == "lockstep" and hasattr(record, "lockstep")]
+
+
+def test_calls_under_the_threshold_are_not_logged(client, fake, caplog, monkeypatch):
+    monkeypatch.setattr(lockstep_api, "time", Timer(0.1))
+    fake.add("GET", r"/api/v1/Invoices/[^/]+", INVOICE)
+    client.with_slow_request_log(1.0)
+    with caplog.at_level(logging.WARNING, "lockstep"):
+        assert client.invoices.retrieve_invoice(ID, None) == INVOICE
+    assert slow_records(caplog) == []
+
+
+def test_slow_calls_are_logged_with_their_timings(client, fake, caplog, monkeypatch):
+    monkeypatch.setattr(lockstep_api, "time", Timer(0.5))
+    fake.add("GET", r"/api/v1/Invoices/[^/]+", INVOICE)
+    client.with_slow_request_log(0.75)
+    with caplog.at_level(logging.WARNING, "lockstep"):
+        client.invoices.retrieve_invoice(ID, "Lines")
+        client.invoices.retrieve_invoice(ID, "Payments")
+    first, second = [record.lockstep for record in slow_records(caplog)]
+    assert first == {"method": "GET", "endpoint": "/api/v1/Invoices/{id}", "paramsHash": first["paramsHash"], "status": 200,
+                     "responseBytes": len(json.dumps(INVOICE)),
+                     "totalSeconds": 1.0, "ttfbSeconds": 0.0, "bodySeconds": 0.5, "decodeSeconds": 0.5}
+    # Parameter values are hashed rather than logged
+    assert first["paramsHash"] != second["paramsHash"] and len(first["paramsHash"]) == 12
+    assert "Lines" not in caplog.records[0].getMessage() and ID not in caplog.records[0].getMessage()
+    client.with_slow_request_log(None)
+    client.invoices.retrieve_invoice(ID, None)
+    assert len(slow_records(caplog)) == 2
+
+
+def test_slow_uploads_are_logged(client, fake, caplog, monkeypatch):
+    monkeypatch.setattr(lockstep_api, "time", Timer(1.0))
+    fake.add("POST", r"/api/v1/Sync/zip", {"syncRequestId": "sync-1"})
+    client.with_slow_request_log(0.5)
+    with caplog.at_level(logging.WARNING, "lockstep"):
+        client.sync.upload_sync_file(b"PK", "erp.zip")
+    [record] = slow_records(caplog)
+    assert (record.lockstep["method"], record.lockstep["endpoint"], record.lockstep["totalSeconds"]) == ("POST", "/api/v1/Sync/zip", 2.0)
+
+
+def test_the_json_parse_of_slow_responses_is_profiled(client, fake, caplog, monkeypatch, tmp_path):
+    monkeypatch.setattr(lockstep_api, "time", Timer(1.0))
+    fake.add("GET", r"/api/v1/Invoices/[^/]+", INVOICE)
+    client.with_slow_request_log(0.5, profileDirectory=str(tmp_path / "profiles"))
+    with caplog.at_level(logging.WARNING, "lockstep"):
+        client.invoices.retrieve_invoice(ID, None)
+    [record] = slow_records(caplog)
+    path = record.lockstep["profile"]
+    assert path == str(tmp_path / "profiles" / f"20220401-120000-GET-api-v1-Invoices-id-{record.lockstep['paramsHash']}.prof")
+    functions = {function for _, _, function in pstats.Stats(path).stats}
+    assert "json" in functions
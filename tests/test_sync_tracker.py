@@ -0,0 +1,110 @@
+#
+# Lockstep Software Development Kit for Python
+#
+# (c) 2021-2022 Lockstep, Inc.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+#
+# @author     Ted Spence <tspence@lockstep.io>
+# @copyright  2021-2022 Lockstep, Inc.
+# @version    2022.4
+# @link       https://github.com/Lockstep-Network/lockstep-sdk-python
+#
+
+import re
+import pytest
+from lockstep.models.syncrequestmodel import SyncRequestModel
+from lockstep.sync_tracker import SyncTracker
+
+FILTER = re.compile(r"syncRequestId IN \((.*)\)")
+
+
+def serve_syncs(fake, statuses: dict):
+    """Answers `query_syncs` with the next status of each requested task; a task stays at its last status"""
+    def respond(request):
+        ids = [value.strip()[1:-1] for value in FILTER.fullmatch(request.query["filter"]).group(1).split(",")]
+        records = []
+        for id in ids:
+            history = statuses.get(id)
+            if history:
+                status = history.pop(0) if len(history) > 1 else history[0]
+                records.append({"syncRequestId": id, "statusCode": status})
+        return {"records": records, "totalCount": len(records)}
+    fake.add("GET", r"/api/v1/Sync/query", respond)
+
+
+def polled_ids(fake) -> list[list[str]]:
+    return [[value.strip()[1:-1] for value in FILTER.fullmatch(request.query["filter"]).group(1).split(",")] for request in fake.requests]
+
+
+def test_due_tasks_are_polled_in_batches(client, fake, clock):
+    serve_syncs(fake, {f"sync-{i}": ["Success"] for i in range(5)})
+    tracker = SyncTracker(client, batchSize=2)
+    futures = [tracker.track(f"sync-{i}") for i in range(5)]
+    futures.append(tracker.track({"syncRequestId": "sync-0"}))
+    assert futures[0] is futures[5] and tracker.pending == 5
+    assert tracker.poll() is None
+    assert polled_ids(fake) == [["sync-0", "sync-1"], ["sync-2", "sync-3"], ["sync-4"]]
+    assert fake.requests[0].query["include"] == "Details" and fake.requests[0].query["pageSize"] == "2"
+    assert futures[3].result() == SyncRequestModel(syncRequestId="sync-3", statusCode="Success")
+    assert tracker.pending == 0
+
+
+def test_polling_backs_off_until_the_status_changes(client, fake, clock):
+    serve_syncs(fake, {"sync-1": ["Ready", "Ready", "Ready", "In Progress", "In Progress", "Success"], "sync-2": ["Ready"]})
+    tracker = SyncTracker(client, minInterval=1.0, maxInterval=3.0, backoffFactor=2.0)
+    done = tracker.track("sync-1")
+    tracker.track("sync-2")
+    delays = []
+    while not done.done():
+        delay = tracker.poll()
+        delays.append(delay)
+        clock.sleep(delay)
+    # The first status counts as a change; the delay then doubles up to maxInterval and resets when the status moves
+    assert delays[:6] == [1.0, 2.0, 3.0, 1.0, 2.0, 3.0]
+    assert done.result().statusCode == "Success"
+    assert tracker.pending == 1
+
+
+def test_tasks_the_server_does_not_return_keep_backing_off(client, fake, clock):
+    serve_syncs(fake, {})
+    tracker = SyncTracker(client, minInterval=1.0, maxInterval=10.0, backoffFactor=2.0)
+    tracker.track("unknown")
+    assert [tracker.poll(), clock.sleep(2.0), tracker.poll()] == [2.0, None, 4.0]
+
+
+def test_a_failing_callback_does_not_stop_the_other_tasks(client, fake, clock):
+    serve_syncs(fake, {"sync-1": ["Failed"], "sync-2": ["Success"], "sync-3": ["Cancelled"]})
+    tracker = SyncTracker(client)
+    seen = []
+
+    def callback(model):
+        seen.append(model.syncRequestId)
+        raise RuntimeError("callback failed")
+
+    futures = [tracker.track(f"sync-{i}", callback) for i in (1, 2, 3)]
+    assert tracker.poll() is None
+    assert seen == ["sync-1", "sync-2", "sync-3"]
+    assert [future.result().statusCode for future in futures] == ["Failed", "Success", "Cancelled"]
+
+
+def test_wait_returns_final_models(client, fake, clock):
+    serve_syncs(fake, {"sync-1": ["Ready", "In Progress", "Success"], "sync-2": ["Failed"]})
+    tracker = SyncTracker(client, minInterval=5.0)
+    tracker.track("sync-1")
+    tracker.track("sync-2")
+    results = tracker.wait(timeout=60)
+    assert {id: model.statusCode for id, model in results.items()} == {"sync-1": "Success", "sync-2": "Failed"}
+    assert clock.now == 1010.0
+
+
+def test_wait_raises_when_tasks_do_not_finish_in_time(client, fake, clock):
+    serve_syncs(fake, {"sync-1": ["In Progress"], "sync-2": ["Success"]})
+    tracker = SyncTracker(client, minInterval=1.0)
+    tracker.track("sync-1")
+    finished = tracker.track("sync-2")
+    with pytest.raises(TimeoutError):
+        tracker.wait(timeout=30)
+    assert clock.now == 1030.0
+    assert finished.done() and tracker.pending == 1
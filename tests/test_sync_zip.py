@@ -0,0 +1,94 @@
+#
+# Lockstep Software Development Kit for Python
+#
+# (c) 2021-2022 Lockstep, Inc.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+#
+# @author     Ted Spence <tspence@lockstep.io>
+# @copyright  2021-2022 Lockstep, Inc.
+# @version    2022.4
+# @link       https://github.com/Lockstep-Network/lockstep-sdk-python
+#
+
+import csv
+import io
+import json
+import zipfile
+import pytest
+from lockstep.models.invoicemodel import InvoiceModel
+from lockstep.models.paymentmodel import PaymentModel
+from lockstep.serialization import scalar_fields
+from lockstep.sync_zip import SyncZipBuilder
+
+
+def invoices(count: int):
+    for i in range(count):
+        yield InvoiceModel(invoiceId=f"invoice-{i}", erpKey=f"INV-{i}", totalAmount=100.0 + i, specialTerms=None if i % 2 else "line one\nline, two")
+
+
+def read_zip(data: bytes) -> dict:
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        return {name: zf.read(name).decode("utf-8") for name in zf.namelist()}
+
+
+def test_jsonl_entries_hold_one_encoded_record_per_line():
+    builder = SyncZipBuilder().add("Invoices", invoices(3)).add("Payments", [{"paymentId": "payment-1", "paymentAmount": 5.0}])
+    entries = read_zip(b"".join(builder))
+    assert list(entries) == ["Invoices.jsonl", "Payments.jsonl"]
+    lines = [json.loads(line) for line in entries["Invoices.jsonl"].splitlines()]
+    assert lines[0] == {"invoiceId": "invoice-0", "erpKey": "INV-0", "totalAmount": 100.0, "specialTerms": "line one\nline, two"}
+    # Fields that are None are left out
+    assert lines[1] == {"invoiceId": "invoice-1", "erpKey": "INV-1", "totalAmount": 101.0}
+    assert entries["Payments.jsonl"] == '{"paymentId":"payment-1","paymentAmount":5.0}\n'
+
+
+def test_csv_entries_have_a_header_of_scalar_fields():
+    builder = SyncZipBuilder("csv").add("Invoices", invoices(2)).add("Payments", [{"paymentId": "payment-1", "paymentAmount": 5.0}], PaymentModel)
+    entries = read_zip(b"".join(builder))
+    rows = list(csv.reader(io.StringIO(entries["Invoices.csv"])))
+    assert rows[0] == scalar_fields(InvoiceModel)
+    first = dict(zip(rows[0], rows[1]))
+    assert (first["invoiceId"], first["totalAmount"], first["specialTerms"], first["customerId"]) == ("invoice-0", "100.0", "line one\nline, two", "")
+    assert len(rows) == 3
+    payments = list(csv.DictReader(io.StringIO(entries["Payments.csv"])))
+    assert payments[0]["paymentId"] == "payment-1" and payments[0]["paymentAmount"] == "5.0"
+
+
+def test_csv_entries_of_dictionaries_require_a_model():
+    with pytest.raises(ValueError):
+        list(SyncZipBuilder("csv").add("Payments", [{"paymentId": "payment-1"}]))
+    with pytest.raises(ValueError):
+        SyncZipBuilder("xml")
+
+
+def test_large_entries_are_produced_in_chunks():
+    consumed = []
+
+    def tracked(count: int):
+        for invoice in invoices(count):
+            consumed.append(invoice.invoiceId)
+            yield invoice
+
+    builder = SyncZipBuilder(chunkSize=16 * 1024, compression=zipfile.ZIP_STORED).add("Invoices", tracked(5000))
+    chunks = iter(builder)
+    first = next(chunks)
+    # The first chunk is produced before the iterator has been read to the end
+    assert len(first) >= 16 * 1024 and len(consumed) < 5000
+    data = first + b"".join(chunks)
+    assert len(read_zip(data)["Invoices.jsonl"].splitlines()) == 5000
+
+
+def test_write_to_writes_the_whole_zip(tmp_path):
+    path = tmp_path / "sync.zip"
+    with open(path, "wb") as f:
+        written = SyncZipBuilder().add("Invoices", invoices(10)).write_to(f)
+    assert written == path.stat().st_size
+    assert len(read_zip(path.read_bytes())["Invoices.jsonl"].splitlines()) == 10
+
+
+def test_entry_names_must_be_unique():
+    builder = SyncZipBuilder().add("Invoices", invoices(1))
+    with pytest.raises(ValueError):
+        builder.add("Invoices", invoices(1))
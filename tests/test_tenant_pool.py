@@ -0,0 +1,54 @@
+#
+# Lockstep Software Development Kit for Python
+#
+# (c) 2021-2022 Lockstep, Inc.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+#
+# @author     Ted Spence <tspence@lockstep.io>
+# @copyright  2021-2022 Lockstep, Inc.
+# @version    2022.4
+# @link       https://github.com/Lockstep-Network/lockstep-sdk-python
+#
+
+from concurrent.futures import ThreadPoolExecutor
+from lockstep import FakeTransport, TenantPool
+
+
+class RecordingLimiter:
+    """Records how many gate slots were taken whenever a request waits for the limiter"""
+
+    def __init__(self, gate):
+        self.gate = gate
+        self.activeWhenWaiting = []
+
+    def acquire(self, tokens: int = 1) -> float:
+        self.activeWhenWaiting.append(self.gate.active)
+        return 0.0
+
+
+def make_pool(maxConcurrent: int = 2) -> TenantPool:
+    pool = TenantPool("https://api.example.com", "lockstep-tests", maxConcurrent=maxConcurrent)
+    pool.with_transport(FakeTransport().add("GET", r"/api/v1/Status", lambda request: {"apiKey": request.headers.get("Api-Key")}))
+    return pool
+
+
+def test_pool_rate_limit_is_waited_for_before_taking_a_slot():
+    pool = make_pool(maxConcurrent=1)
+    limiter = RecordingLimiter(pool.gate)
+    pool.with_rate_limiter(limiter)
+    tenant = pool.add_tenant("a", apiKey="key-a")
+    for _ in range(3):
+        tenant.status.ping()
+    assert limiter.activeWhenWaiting == [0, 0, 0]
+    assert pool.gate.active == 0
+
+
+def test_tenants_send_their_own_credentials():
+    pool = make_pool()
+    tenants = [pool.add_tenant(f"tenant-{i}", apiKey=f"key-{i}") for i in range(4)]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda i: tenants[i % 4].status.ping()["apiKey"], range(40)))
+    assert results == [f"key-{i % 4}" for i in range(40)]
+    assert pool.gate.active == 0
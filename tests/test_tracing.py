@@ -0,0 +1,82 @@
+#
+# Lockstep Software Development Kit for Python
+#
+# (c) 2021-2022 Lockstep, Inc.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+#
+# @author     Ted Spence <tspence@lockstep.io>
+# @copyright  2021-2022 Lockstep, Inc.
+# @version    2022.4
+# @link       https://github.com/Lockstep-Network/lockstep-sdk-python
+#
+
+import pytest
+from lockstep import OpenTelemetryTracer
+from lockstep.batch_retrieve import retrieve_many
+from lockstep.pagination import scan_pages, scan_pages_parallel
+from conftest import paged
+
+pytest.importorskip("opentelemetry.sdk")
+from opentelemetry import trace  # noqa: E402
+from opentelemetry.sdk.trace import TracerProvider  # noqa: E402
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor  # noqa: E402
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter  # noqa: E402
+
+INVOICES = [{"invoiceId": f"invoice-{i:03d}"} for i in range(35)]
+
+
+@pytest.fixture
+def spans(client, fake):
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    client.with_tracer(OpenTelemetryTracer(provider.get_tracer("lockstep-tests")))
+    fake.add("GET", r"/api/v1/Invoices/query", paged(INVOICES))
+    yield exporter, provider.get_tracer("caller")
+    provider.shutdown()
+
+
+def parent_names(exporter) -> dict:
+    finished = exporter.get_finished_spans()
+    names = {span.context.span_id: span.name for span in finished}
+    return [(span.name, names.get(span.parent.span_id) if span.parent else None) for span in finished]
+
+
+@pytest.mark.parametrize("parallel", [False, True])
+def test_scan_requests_are_children_of_the_scan_but_caller_spans_are_not(client, spans, parallel):
+    exporter, caller = spans
+    with caller.start_as_current_span("caller"):
+        if parallel:
+            pages = scan_pages_parallel(client.invoices.query_invoices, None, None, "invoiceId", 10, maxWorkers=3)
+        else:
+            pages = scan_pages(client.invoices.query_invoices, None, None, "invoiceId", 10)
+        for page in pages:
+            with caller.start_as_current_span("handle page"):
+                assert trace.get_current_span().name == "handle page"
+        assert trace.get_current_span().name == "caller"
+    relations = parent_names(exporter)
+    assert relations.count(("handle page", "caller")) == 4
+    assert relations.count(("lockstep.request", "lockstep.scan")) == 4
+    assert ("lockstep.scan", "caller") in relations
+    assert not trace.get_current_span().is_recording()
+
+
+def test_abandoned_scan_restores_the_caller_context(client, spans):
+    exporter, caller = spans
+    with caller.start_as_current_span("caller"):
+        pages = scan_pages_parallel(client.invoices.query_invoices, None, None, "invoiceId", 10, maxWorkers=2)
+        next(pages)
+        pages.close()
+        assert trace.get_current_span().name == "caller"
+    scan = next(span for span in exporter.get_finished_spans() if span.name == "lockstep.scan")
+    assert scan.status.is_ok
+
+
+def test_worker_thread_requests_keep_their_parent(client, spans):
+    exporter, caller = spans
+    retrieve_many(client.invoices.query_invoices, "invoiceId", [invoice["invoiceId"] for invoice in INVOICES], None, maxWorkers=4, pageSize=5)
+    relations = parent_names(exporter)
+    assert relations.count(("lockstep.request", "lockstep.retrieve_many")) == 7
+    assert ("lockstep.retrieve_many", None) in relations
@@ -0,0 +1,82 @@
+#
+# Lockstep Software Development Kit for Python
+#
+# (c) 2021-2022 Lockstep, Inc.
+#
+# For the full copyright and license information, please view the LICENSE
+# file that was distributed with this source code.
+#
+# @author     Ted Spence <tspence@lockstep.io>
+# @copyright  2021-2022 Lockstep, Inc.
+# @version    2022.4
+# @link       https://github.com/Lockstep-Network/lockstep-sdk-python
+#
+
+import pytest
+from lockstep import LockstepApi
+from lockstep.tracing import Span, Tracer
+
+httpx = pytest.importorskip("httpx")
+
+
+class RecordingTracer(Tracer):
+    enabled = True
+
+    def __init__(self):
+        self.names = []
+
+    def start_span(self, name: str, attributes: dict = None, current: bool = True) -> Span:
+        self.names.append(name)
+        return Span()
+
+
+class FailingStream(httpx.SyncByteStream):
+    def __iter__(self):
+        yield b'{"records": '
+        raise httpx.ReadError("connection reset")
+
+
+def http2_client(handler) -> LockstepApi:
+    client = LockstepApi("https://api.example.com", "lockstep-tests")
+    client.with_api_key("test")
+    client.with_http2(maxConnections=1, maxStreamsPerConnection=4)
+    # Answer requests in-process while keeping the transport's slot accounting
+    client.transport._client = httpx.Client(transport=httpx.MockTransport(handler))
+    return client
+
+
+@pytest.mark.parametrize("metrics,tracer", [(True, False), (False, True), (True, True)])
+def test_http2_with_metrics_reads_body_and_releases_slots(metrics, tracer):
+    client = http2_client(lambda request: httpx.Response(200, json={"status": "ok"}))
+    if metrics:
+        client.enable_metrics()
+    if tracer:
+        client.with_tracer(RecordingTracer())
+    # Fewer calls than slots, so that a leaked slot fails the assertion rather than blocking
+    for _ in range(3):
+        assert client.status.ping() == {"status": "ok"}
+    assert client.transport._slots._value == client.transport.maxConcurrentRequests
+    if metrics:
+        snapshot = client.metrics.snapshot()["GET /api/v1/Status"]
+        assert snapshot["count"] == 3
+        assert snapshot["responseBytes"] == 3 * len(b'{"status":"ok"}')
+    if tracer:
+        assert "lockstep.http.body" in client.tracer.names
+
+
+def test_http2_with_metrics_releases_slot_when_body_fails():
+    client = http2_client(lambda request: httpx.Response(200, stream=FailingStream()))
+    client.enable_metrics()
+    for _ in range(3):
+        with pytest.raises(httpx.ReadError):
+            client.status.ping()
+    assert client.transport._slots._value == client.transport.maxConcurrentRequests
+
+
+def test_http2_stream_request_releases_slot_on_close():
+    client = http2_client(lambda request: httpx.Response(200, content=b"file contents"))
+    client.enable_metrics()
+    response = client.send_stream_request("GET", "/api/v1/Attachments/1/download-file", None)
+    assert client.transport._slots._value == client.transport.maxConcurrentRequests - 1
+    assert b"".join(response.iter_content(4)) == b"file contents"
+    assert client.transport._slots._value == client.transport.maxConcurrentRequests